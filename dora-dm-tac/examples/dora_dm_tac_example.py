@@ -5,6 +5,7 @@ import cv2
 import numpy as np
 from dmrobotics import put_arrows_on_image
 from dora import Node
+from dora_pika_client import decode
 
 logger = logging.getLogger(__name__)
 
@@ -28,21 +29,17 @@ def main() -> None:
 
                     print(f"当前帧率: {fps:.2f} FPS, 收到帧数{frame_count}， 运行时间{elapsed}")
 
-                    img = struct["img"]
-                    img = np.array(img.values).reshape(240, 320).astype(np.uint8)
+                    data = decode(event)
+                    img = data["img"]
                     black_img = np.zeros_like(img)
                     black_img = np.stack([black_img]*3, axis=-1)
 
-                    shear = struct["shear"]
-                    shear = np.array(shear.values).reshape(240, 320,2).astype(np.float32)
+                    shear = data["shear"]
 
-                    depth = struct["depth"]
-                    depth = np.array(depth.values).reshape(240, 320).astype(np.float32)
+                    depth = data["depth"]
                     depth_img = cv2.applyColorMap((depth*0.25* 255.0).astype('uint8'), cv2.COLORMAP_HOT)
 
-
-                    deformation = struct["deformation"]
-                    deformation = np.array(deformation.values).reshape(240, 320,2).astype(np.float32)
+                    deformation = data["deformation"]
 
                     # 显示图像
                     cv2.imshow('depth', depth_img)
@@ -3,21 +3,32 @@ import os
 import threading
 import time
 from dataclasses import dataclass, field
+from typing import Optional
 
 import numpy as np
-import pyarrow as pa
-from dmrobotics import Sensor
 from dora import Node
-from pa_shema import pa_sensor_schema as sensor_schema
-from typing_extensions import Self
+from dora_pika_common.arrow import record_batch
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.timing import StageTimer
+
+from dora_dm_tac.pa_shema import sensor_schema
+
+# hardware (default) or sim: a simulated gel replacing dmrobotics.Sensor
+BACKEND = os.getenv("BACKEND", "hardware")
+if BACKEND == "sim":
+    from dora_dm_tac.sim import Sensor
+else:
+    from dmrobotics import Sensor
 
 logger = logging.getLogger(__name__)
 
+# Opt-in per-stage timing (STAGE_TIMING=1), see dora_pika_common.timing
+stage_timer = StageTimer("dm_tac")
+
 @dataclass
 class SensorData:
-    """"""
-    _lock: threading.Lock = field(default_factory=threading.Lock)
-    _has_data: bool = False
+    """DM-Tac sensor slot, exchanged through a LatestValue."""
     img: np.ndarray = field(default_factory=lambda: np.zeros((240, 320), dtype=np.uint8))
     shear: np.ndarray = field(default_factory=lambda: np.zeros((240, 320, 2), dtype=np.float32))
     depth: np.ndarray = field(default_factory=lambda: np.zeros((240, 320), dtype=np.float32))
@@ -25,36 +36,6 @@ class SensorData:
     timestamp: int = 0
     serial_number: str = ""
 
-    def update_data(
-        self: Self,
-        serial_number:str,
-        img: np.ndarray,
-        shear: np.ndarray,
-        depth: np.ndarray,
-        deformation: np.ndarray,
-        timestamp: int,
-    ) -> None:
-        """更新数据"""
-        with self._lock:
-            self.serial_number = serial_number
-            self.img = img
-            self.shear = shear
-            self.depth = depth
-            self.deformation = deformation
-            self.timestamp = timestamp
-            self._has_data = True
-
-    def read_data(self: Self) -> tuple[bool, str, np.ndarray, np.ndarray, np.ndarray, int]:
-        with self._lock:
-            return (
-                self._has_data,
-                self.serial_number,
-                self.img,
-                self.shear,
-                self.depth,
-                self.deformation,
-                self.timestamp,
-            )
 def configure_sensor(
     serial_number: str,
     ) -> Sensor:
@@ -66,7 +47,7 @@ def configure_sensor(
     return sensor
 
 def capture_sensor_data(
-    sensor_data:SensorData,
+    sensor_store: LatestValue[SensorData],
     dora_stop_event: threading.Event,
     sensor_close_event:threading.Event,
     serial_number: str,
@@ -75,20 +56,19 @@ def capture_sensor_data(
     try:
         sensor = configure_sensor(serial_number)
         while not dora_stop_event.is_set():
-            img = sensor.getRawImage()
-            shear = sensor.getShear()
-            deformation = sensor.getDeformation2D()
-            depth = sensor.getDepth() # output the deformed depth
-
-            timestamp = int(time.time_ns())
-            sensor_data.update_data(
-                serial_number,
-                img,
-                shear,
-                depth,
-                deformation,
-                timestamp,
-            )
+            data = sensor_store.acquire()
+            with stage_timer.stage("getRawImage"):
+                data.img = sensor.getRawImage()
+            with stage_timer.stage("getShear"):
+                data.shear = sensor.getShear()
+            with stage_timer.stage("getDeformation2D"):
+                data.deformation = sensor.getDeformation2D()
+            with stage_timer.stage("getDepth"):
+                data.depth = sensor.getDepth() # output the deformed depth
+            data.timestamp = int(time.time_ns())
+            data.serial_number = serial_number
+            sensor_store.publish()
+            stage_timer.count("captured")
 
     except Exception as e:
         print(f"触觉传感器错误: {e}")
@@ -101,33 +81,36 @@ def capture_sensor_data(
             sensor.disconnect()
 
 def send_data_through_dora(
-    sensor_data: SensorData,
+    sensor_store: LatestValue[SensorData],
     dora_stop_event: threading.Event,
     sensor_close_event: threading.Event,
+    node: Optional[Node] = None,
     ) -> None:
-    node = Node()
+    if node is None:
+        node = Node()
+    publisher = Publisher(node, {"touch_sensor_data": sensor_store}, timer=stage_timer)
     try:
-        for event in node:
+        for event in publisher:
             if sensor_close_event.is_set():
                 dora_stop_event.set()
                 print("停止发送了")
                 break
             if event["type"] == "INPUT" and event["id"] == "tick":
-                has_data, serial_number, img, shear, depth, deformation, timestamp =  sensor_data.read_data()
-                if  has_data:
-                    sensor_batch = pa.record_batch(
-                        {
-                            "serial_number": [serial_number],
-                            "img": [img.ravel()],
-                            "shear": [shear.ravel()],
-                            "depth": [depth.ravel()],
-                            "deformation": [deformation.ravel()],
-                            "timestamp": [timestamp],
-                        },
-                        schema = sensor_schema,
-                    )
-                    node.send_output("touch_sensor_data", sensor_batch)
-                time.sleep(0.001)
+                seq, data = publisher.read("touch_sensor_data")
+                if data is not None:
+                    with stage_timer.stage("batch/touch_sensor_data"):
+                        sensor_batch = record_batch(
+                            {
+                                "serial_number": data.serial_number,
+                                "img": data.img,
+                                "shear": data.shear,
+                                "depth": data.depth,
+                                "deformation": data.deformation,
+                                "timestamp": data.timestamp,
+                            },
+                            schema = sensor_schema(*data.img.shape[:2]),
+                        )
+                    publisher.send("touch_sensor_data", sensor_batch, seq)
             elif event["type"] == "STOP":
                 dora_stop_event.set()
                 break
@@ -136,19 +119,22 @@ def send_data_through_dora(
 def main()-> None:
     """Main entry point"""
     logging.basicConfig(level=logging.INFO)
+    stage_timer.install_signal_handler()
     serial_number = os.getenv("DEVICE_SERIAL", "")
-    sensor_data = SensorData()
+    # Created here so that main() fails right away outside a dataflow.
+    node = Node()
+    sensor_store = LatestValue(SensorData)
     dora_stop_event = threading.Event()
     sensor_close_event = threading.Event()
     sensor_thread = threading.Thread(
         target=capture_sensor_data,
-        args=(sensor_data, dora_stop_event, sensor_close_event, serial_number),
+        args=(sensor_store, dora_stop_event, sensor_close_event, serial_number),
          daemon=True,
     )
 
     dora_thread = threading.Thread(
         target=send_data_through_dora,
-        args=(sensor_data, dora_stop_event, sensor_close_event),
+        args=(sensor_store, dora_stop_event, sensor_close_event, node),
          daemon=True,
     )
     dora_thread.start()
@@ -1,18 +1,24 @@
+from functools import lru_cache
+
 import pyarrow as pa
+from dora_pika_common.arrow import tensor_field
 
 pa_vec3 = pa.list_(pa.float64(), 3)
-pa_image = pa.list_(pa.uint8(), 240*320)
-pa_shear = pa.list_(pa.float32(), 240*320*2)
-pa_depth = pa.list_(pa.float32(), 240*320)
-pa_deformation = pa.list_(pa.float32(), 240*320*2)
 
-# 定义 image_schema
-pa_sensor_fields = [
-  pa.field("serial_number", pa.string()),
-  pa.field("img", pa_image),
-  pa.field("shear", pa_shear),
-  pa.field("depth", pa_depth),
-  pa.field("deformation", pa_deformation),
-  pa.field("timestamp", pa.int64()),
-]
-pa_sensor_schema = pa.schema(pa_sensor_fields)
+
+# 定义 image_schema，按传感器输出的分辨率构建
+@lru_cache
+def sensor_schema(height: int, width: int) -> pa.Schema:
+  """DM-Tac schema for ``height`` x ``width`` sensor fields."""
+  return pa.schema([
+    pa.field("serial_number", pa.string()),
+    tensor_field("img", (height, width), pa.uint8()),
+    tensor_field("shear", (height, width, 2), pa.float32()),
+    tensor_field("depth", (height, width), pa.float32()),
+    tensor_field("deformation", (height, width, 2), pa.float32()),
+    pa.field("timestamp", pa.int64()),
+  ])
+
+
+# 默认 320x240 的 schema
+pa_sensor_schema = sensor_schema(240, 320)
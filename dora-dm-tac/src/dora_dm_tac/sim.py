@@ -0,0 +1,66 @@
+"""Simulated DM-Tac backend (``BACKEND=sim``).
+
+`SimSensor` implements the subset of ``dmrobotics.Sensor`` used by the node.
+Each `getRawImage` call waits for the next frame at ``SIM_FPS`` (default 30);
+the other getters return the matching depth, shear and deformation fields of a
+Gaussian contact that circles over the 240x320 gel.
+"""
+
+import os
+
+import numpy as np
+from dora_pika_common.sim import FrameSource
+from typing_extensions import Self
+
+HEIGHT, WIDTH = 240, 320
+
+
+def _contacts(count: int) -> tuple[np.ndarray, np.ndarray]:
+    """Depth (count, H, W) and its gradient (count, H, W, 2) for a moving press."""
+    rows = np.arange(HEIGHT, dtype=np.float32)[:, None]
+    cols = np.arange(WIDTH, dtype=np.float32)[None, :]
+    depth = np.empty((count, HEIGHT, WIDTH), dtype=np.float32)
+    flow = np.empty((count, HEIGHT, WIDTH, 2), dtype=np.float32)
+    for index in range(count):
+        angle = 2.0 * np.pi * index / count
+        center_y = HEIGHT / 2 + HEIGHT / 4 * np.sin(angle)
+        center_x = WIDTH / 2 + WIDTH / 4 * np.cos(angle)
+        depth[index] = np.exp(-((rows - center_y) ** 2 + (cols - center_x) ** 2) / (2 * 30.0**2))
+        grad_y, grad_x = np.gradient(depth[index])
+        flow[index] = np.stack((grad_x, grad_y), axis=-1) * 30.0
+    depth.flags.writeable = False
+    flow.flags.writeable = False
+    return depth, flow
+
+
+class SimSensor:
+    """Stand-in for ``dmrobotics.Sensor``."""
+
+    def __init__(self: Self, serial_number: str) -> None:
+        self.serial_number = serial_number
+        self._raw = FrameSource((HEIGHT, WIDTH), np.uint8, float(os.getenv("SIM_FPS", "30")))
+        self._depth, self._flow = _contacts(len(self._raw.frames))
+
+    def _index(self: Self) -> int:
+        return max(self._raw.index, 0) % len(self._depth)
+
+    def getRawImage(self: Self) -> np.ndarray:  # noqa: N802
+        return self._raw.read()
+
+    def getShear(self: Self) -> np.ndarray:  # noqa: N802
+        return self._flow[self._index()]
+
+    def getDeformation2D(self: Self) -> np.ndarray:  # noqa: N802
+        return self._flow[self._index()]
+
+    def getDepth(self: Self) -> np.ndarray:  # noqa: N802
+        return self._depth[self._index()]
+
+    def reset(self: Self) -> None:
+        pass
+
+    def disconnect(self: Self) -> None:
+        pass
+
+
+Sensor = SimSensor
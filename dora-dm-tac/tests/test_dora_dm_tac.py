@@ -11,3 +11,38 @@ def test_import_main() -> None:
     # as we're not running in a Dora dataflow.
     with pytest.raises(RuntimeError):
         main()
+
+
+def test_sim_capture_to_publish(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Runs the capture and send threads against the simulated sensor."""
+    import threading
+
+    import numpy as np
+    from dora_pika_client import decode
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    import dora_dm_tac.main as dm_tac
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(dm_tac, "Node", lambda: node)
+
+    sensor_store = LatestValue(dm_tac.SensorData)
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    capture = threading.Thread(
+        target=dm_tac.capture_sensor_data,
+        args=(sensor_store, stop_event, close_event, "2501130170"),
+    )
+    capture.start()
+    assert wait_for_data(sensor_store)
+    dm_tac.send_data_through_dora(sensor_store, stop_event, close_event)
+    capture.join(timeout=2.0)
+
+    assert not close_event.is_set()
+    outputs = node.outputs("touch_sensor_data")
+    assert outputs
+    data = decode(outputs[-1][0])
+    assert data["img"].shape == (240, 320) and data["img"].dtype == np.uint8
+    assert data["shear"].shape == (240, 320, 2)
+    assert data["depth"].max() > 0.5
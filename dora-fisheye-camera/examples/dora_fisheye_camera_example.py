@@ -3,8 +3,8 @@
 import logging
 
 import cv2
-import numpy as np
 from dora import Node
+from dora_pika_client import tensor
 
 logger = logging.getLogger(__name__)
 
@@ -30,8 +30,7 @@ def main() -> None:
           frame_count_left += 1
           fps = frame_count_left / (elapsed + 0.00000000000001)
           print(f"左鱼眼相机当前帧率: {fps:.2f} FPS, 收到帧数{frame_count_right}， 运行时间{elapsed}")
-          image = struct["image"]
-          frame = np.array(image.values).reshape(480, 640, 3).astype(np.uint8)
+          frame = tensor(event["value"], "image")
           cv2.imshow("left", frame)
           cv2.waitKey(1)  # 刷新显示
 
@@ -39,8 +38,7 @@ def main() -> None:
           frame_count_right += 1
           fps = frame_count_right / (elapsed + 0.00000000000001)
           print(f"右鱼眼相机当前帧率: {fps:.2f} FPS, 收到帧数{frame_count_right}， 运行时间{elapsed}")
-          image = struct["image"]
-          frame = np.array(image.values).reshape(480, 640, 3).astype(np.uint8)
+          frame = tensor(event["value"], "image")
           cv2.imshow("right", frame)
           cv2.waitKey(1)  # 刷新显示
 
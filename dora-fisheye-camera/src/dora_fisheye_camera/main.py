@@ -4,66 +4,67 @@ import os
 import threading
 import time
 from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Optional
 
 import cv2
 import numpy as np
-import pyarrow as pa
 from dora import Node
-from typing_extensions import Self
+from dora_pika_common.arrow import COMPRESSED_ENCODINGS, record_batch
+from dora_pika_common.encode import DEFAULT_QUALITY, EncodePool, encode_image, encode_params
+from dora_pika_common.frames import FramePool, transform_into
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.timing import StageTimer
 
-from dora_fisheye_camera.pa_schema import pa_image_schema as image_schema
+from dora_fisheye_camera.pa_schema import image_schema
+from dora_fisheye_camera.sim import SimVideoCapture
+from dora_fisheye_camera.v4l2 import V4l2Capture, V4l2Config
 
 logger = logging.getLogger(__name__)
 
+# Opt-in per-stage timing (STAGE_TIMING=1), see dora_pika_common.timing
+stage_timer = StageTimer("fisheye")
+
+# hardware (default) or sim: a deterministic stand-in for cv2.VideoCapture
+BACKEND = os.getenv("BACKEND", "hardware")
+
+# ENCODING=mjpeg: the camera's own MJPEG frames, published as jpeg without decoding
+MJPEG = "mjpeg"
+# CAPTURE_API: any (cv2.VideoCapture's choice, default) or v4l2 (see dora_fisheye_camera.v4l2)
+CAPTURE_APIS = ("any", "v4l2")
+
 @dataclass
 class FisheyeImageData:
-    """Stores Fisheye Image data from Fisheye Camera with thread-safe access."""
-    _lock: threading.Lock = field(default_factory=threading.Lock)
-    _has_data: bool = False
+    """Fisheye image slot, exchanged through a LatestValue."""
     frame: np.ndarray = field(default_factory=lambda: np.zeros((480, 640, 3), dtype=np.uint8))
     width: int = 640
     height: int = 480
     encoding: str = "rgb8"
     timestamp: int = 0
     camera_id: str = ""
-    def updata_data(
-        self: Self,
-        camera_id: str,
-        frame: np.ndarray,
-        width: int,
-        height: int,
-        encoding: str,
-        timestamp: int,
-    ) -> None:
-        """Update Fisheye Image data."""
-        with self._lock:
-            self.camera_id = camera_id
-            self.frame = frame
-            self.width =width
-            self.height = height
-            self.encoding = encoding
-            self.timestamp = timestamp
-            self._has_data = True
-
-    def read_data(self: Self) -> tuple[bool, np.ndarray, int, int, str, int]:
-        """Read Fisheye Image data"""
-        with self._lock:
-            return (
-                self._has_data,
-                self.camera_id,
-                self.frame.copy(),
-                self.width,
-                self.height,
-                self.encoding,
-                self.timestamp,
-            )
+    quality: int = 0  # of compressed encodings
+    encode_ns: int = 0
+
 def configure_fisheye_camera(
     camera_id: str,
     image_width: int,
     image_height: int,
+    mjpeg: bool = False,
+    v4l2_config: Optional[V4l2Config] = None,
     ) -> cv2.VideoCapture :
-    "Configure and initialize fisheye camera"
-    cap = cv2.VideoCapture(camera_id)
+    """Configure and initialize fisheye camera.
+
+    With ``mjpeg`` the camera streams MJPEG and ``read()`` returns the
+    compressed bytes of each frame as a ``(1, N)`` buffer instead of pixels.
+    With ``v4l2_config`` the camera is opened through the V4L2 backend with
+    its number of driver buffers.
+    """
+    api = cv2.CAP_V4L2 if v4l2_config is not None else cv2.CAP_ANY
+    if BACKEND == "sim":
+        cap = SimVideoCapture(camera_id, api)
+    else:
+        cap = cv2.VideoCapture(camera_id, api)
     if not cap.isOpened():
         raise ConnectionError(f"无法打开相机设备 {camera_id}")
     # 获取相机信息
@@ -71,15 +72,55 @@ def configure_fisheye_camera(
     logger.info(f"已连接相机 (ID: {camera_id}, 后端: {backend})")
     # 应用配置
     try:
+        if mjpeg:
+            # The pixel format goes before the size, V4L2 negotiates both together.
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, image_width)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, image_height)
-        return cap
+        if mjpeg:
+            cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        if v4l2_config is not None:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, v4l2_config.buffers)
     except Exception as e:
         cap.release()
         raise ConnectionError(f"相机配置失败: {str(e)}")
+    if mjpeg and int(cap.get(cv2.CAP_PROP_FOURCC)) != cv2.VideoWriter_fourcc(*"MJPG"):
+        cap.release()
+        raise ConnectionError(f"相机 {camera_id} 不支持 MJPG 输出")
+    return cap
+
+def store_encoded_image(
+    image_store: LatestValue[FisheyeImageData],
+    encoded: np.ndarray,
+    encode_ns: int,
+    *,
+    camera_id: str,
+    encoding: str,
+    width: int,
+    height: int,
+    timestamp: int,
+    quality: int,
+    release: Optional[Callable[[], None]] = None,
+) -> None:
+    """Publish an encoded frame; called by the `EncodePool` collector.
+
+    ``release`` recycles the raw frame that was encoded.
+    """
+    if release is not None:
+        release()
+    image = image_store.acquire()
+    image.camera_id = camera_id
+    image.frame = encoded
+    image.height, image.width = height, width
+    image.encoding = encoding
+    image.timestamp = timestamp
+    image.quality = quality
+    image.encode_ns = encode_ns
+    image_store.publish()
+
 
 def capture_fisheye_camera_data(
-    image_data: FisheyeImageData,
+    image_store: LatestValue[FisheyeImageData],
     dora_stop_event: threading.Event,
     fisheye_camera_close_event: threading.Event,
     camera_id: str,
@@ -87,46 +128,121 @@ def capture_fisheye_camera_data(
     image_height: int,
     flip: str,
     encoding: str,
+    encode_pool: Optional[EncodePool] = None,
+    v4l2_config: Optional[V4l2Config] = None,
     ) -> None:
-    """Capture and process fisheye camera data in a separate thread."""
+    """Capture and process fisheye camera data in a separate thread.
+
+    With ``encode_pool`` compressed encodings are encoded and published by the
+    pool instead of this thread. ``encoding`` `MJPEG` publishes the frames the
+    camera compressed as ``jpeg``, with no decode, flip or re-encode. With
+    ``v4l2_config`` frames are read through a `V4l2Capture` and stamped with
+    their kernel capture time instead of the time the read returned.
+    """
 
+    pooled = encode_pool is not None and encoding in COMPRESSED_ENCODINGS
+    compressed = encoding in COMPRESSED_ENCODINGS
+    # Raw frames waiting for the encode pool, recycled once encoded
+    frame_pool = FramePool(
+        (image_height, image_width, 3), np.uint8,
+        (encode_pool.max_pending if pooled else 0) + 1,
+    )
+    frame_shape = (image_height, image_width, 3)
+    scratch = None  # raw frame of the inline encoder
+    passthrough = encoding == MJPEG
     try:
-        cap = configure_fisheye_camera(camera_id, image_width, image_height)
+        cap = configure_fisheye_camera(
+            camera_id, image_width, image_height, passthrough, v4l2_config,
+        )
+        capture = V4l2Capture(cap, v4l2_config) if v4l2_config is not None else None
+        # 相机可能不支持请求的分辨率，按协商的尺寸记录
+        mjpeg_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                      int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
         while not dora_stop_event.is_set():
-            # 捕获一帧图像
-            ret, frame = cap.read()
+            # 捕获一帧图像，直接写入可复用的缓冲区:
+            # raw: a free slot; pooled: a pool buffer until encoded; inline encoding: scratch;
+            # mjpeg: a new buffer per frame, the JPEG size varies
+            image = None
+            if passthrough:
+                buffer = None
+            elif pooled:
+                buffer = frame_pool.acquire(frame_shape)
+            elif compressed:
+                buffer = scratch
+            else:
+                image = image_store.acquire()
+                buffer = image.frame
+            if capture is not None:
+                # Dequeue without decoding, so stale frames are dropped cheaply.
+                with stage_timer.stage("grab"):
+                    ret = capture.grab()
+                if capture.drained:
+                    stage_timer.count("drained", capture.drained)
+                with stage_timer.stage("retrieve"):
+                    ret, frame = capture.retrieve(buffer) if ret else (False, None)
+                timestamp = capture.timestamp
+                stage_timer.record("frame_age", capture.age())
+            else:
+                with stage_timer.stage("read"):
+                    ret, frame = cap.read(buffer)
+                timestamp = int(time.time_ns())
             if not ret:
+                if pooled:
+                    frame_pool.release(buffer)
                 logger.warning("无法获取图像帧，继续尝试...")
                 time.sleep(0.1)
                 continue
+            if passthrough:
+                width, height = mjpeg_size
+                store_encoded_image(
+                    image_store, frame.reshape(-1), 0, camera_id=camera_id, encoding="jpeg",
+                    width=width, height=height, timestamp=timestamp, quality=0,
+                )
+                stage_timer.count("captured")
+                continue
+            frame_shape = frame.shape
+
+            # 应用图像翻转 (in place: the buffer is ours, not the driver's)
+            with stage_timer.stage("flip"):
+                frame = transform_into(frame, frame, flip)
+
+            # 相机可能不支持请求的分辨率，按实际帧尺寸记录
+            height, width = frame.shape[:2]
+            if pooled:
+                submitted = encode_pool.submit(
+                    frame,
+                    partial(
+                        store_encoded_image, image_store, camera_id=camera_id,
+                        encoding=encoding, width=width, height=height, timestamp=timestamp,
+                        quality=encode_pool.quality, release=partial(frame_pool.release, frame),
+                    ),
+                )
+                if not submitted:
+                    frame_pool.release(frame)
+                stage_timer.count("captured")
+                continue
 
-            # 应用图像翻转
-            if flip == "VERTICAL":
-                frame = cv2.flip(frame, 0)
-            elif flip == "HORIZONTAL":
-                frame = cv2.flip(frame, 1)
-            elif flip == "BOTH":
-                frame = cv2.flip(frame, -1)
-
-            if encoding == "bgr8":
-                # BGR格式 (OpenCV默认格式)
-                pass
-            elif encoding in ["jpeg", "jpg", "jpe", "bmp", "webp", "png"]:
+            encode_ns = 0
+            if compressed:
                 # 编码为指定格式
-                ret, encoded_frame = cv2.imencode("." + encoding, frame)
-                if not ret:
-                    logger.error(f"图像编码失败: {encoding}")
-                    continue
+                scratch = frame
+                with stage_timer.stage("encode"):
+                    try:
+                        frame, encode_ns = encode_image(frame, encoding, encode_params(encoding))
+                    except ValueError:
+                        logger.error(f"图像编码失败: {encoding}")
+                        continue
+                image = image_store.acquire()
              # 更新图像数据
-            timestamp = int(time.time_ns())
-            image_data.updata_data(
-                camera_id,
-                frame,
-                image_width,
-                image_height,
-                encoding,
-                timestamp,
-            )
+            image.camera_id = camera_id
+            image.frame = frame
+            image.height, image.width = height, width
+            image.encoding = encoding
+            image.timestamp = timestamp
+            image.quality = DEFAULT_QUALITY.get(encoding, 0)
+            image.encode_ns = encode_ns
+            image_store.publish()
+            stage_timer.count("captured")
     except Exception as e:
         logger.exception(f"鱼眼相机错误: {e}")
         fisheye_camera_close_event.set()
@@ -137,35 +253,39 @@ def capture_fisheye_camera_data(
         logger.info(f"鱼眼相机 (ID:{camera_id}) 已关闭")
 
 def send_data_through_dora(
-    image_data: FisheyeImageData,
+    image_store: LatestValue[FisheyeImageData],
     dora_stop_event: threading.Event,
     fisheye_camera_close_event: threading.Event,
+    node: Optional[Node] = None,
     ) -> None:
     """Sends image and depth data."""
 
-    node = Node()
+    if node is None:
+        node = Node()
+    publisher = Publisher(node, {"image": image_store}, timer=stage_timer)
     try:
-        for event in node:
+        for event in publisher:
             if fisheye_camera_close_event.is_set():
                 dora_stop_event.set()
                 break
             if event["type"] == "INPUT" and event["id"] == "tick":
-                has_data, camera_id, frame, width, height, encoding, timestamp = image_data.read_data()
-                if has_data:
-                    image_batch = pa.record_batch(
-                        {
-                            "camera_id": [camera_id],
-                            "image": [frame.ravel()],
-                            "timestamp": [timestamp],
-                            "width": [width],
-                            "height": [height],
-                            "encoding": [encoding],
-                        },
-                        schema = image_schema,
-                    )
-                    node.send_output("image", image_batch)
-
-                time.sleep(0.01)
+                seq, image = publisher.read("image")
+                if image is not None:
+                    with stage_timer.stage("batch/image"):
+                        image_batch = record_batch(
+                            {
+                                "camera_id": image.camera_id,
+                                "image": image.frame,
+                                "timestamp": image.timestamp,
+                                "width": image.width,
+                                "height": image.height,
+                                "encoding": image.encoding,
+                                "quality": image.quality,
+                                "encode_ns": image.encode_ns,
+                            },
+                            schema = image_schema(image.height, image.width, image.encoding),
+                        )
+                    publisher.send("image", image_batch, seq)
 
             elif event["type"] == "STOP":
                 dora_stop_event.set()
@@ -176,28 +296,47 @@ def send_data_through_dora(
 def main()-> None:
     """Main entry point"""
     logging.basicConfig(level=logging.INFO)
+    stage_timer.install_signal_handler()
     flip = os.getenv("FLIP", "")
     camera_id = os.getenv("CAMERA_ID", "")
     image_height = int(os.getenv("IMAGE_HEIGHT", "480"))
     image_width = int(os.getenv("IMAGE_WIDTH", "640"))
     encoding = os.getenv("ENCODING", "rgb8")
+    capture_api = os.getenv("CAPTURE_API", "any").lower()
+    if capture_api not in CAPTURE_APIS:
+        raise ValueError(f"CAPTURE_API must be one of {CAPTURE_APIS}, got {capture_api!r}.")
+    v4l2_config = V4l2Config.from_env() if capture_api == "v4l2" else None
+    if encoding == MJPEG and flip:
+        raise ValueError("FLIP needs decoded frames, it cannot be combined with ENCODING=mjpeg.")
+    encode_pool = None
+    if encoding in COMPRESSED_ENCODINGS:
+        # ENCODE_QUALITY: jpeg/webp quality (0-100) or png compression level (0-9)
+        quality = os.getenv("ENCODE_QUALITY", "")
+        encode_pool = EncodePool(
+            encoding, int(quality) if quality else None, int(os.getenv("ENCODE_WORKERS", "2")),
+            timer=stage_timer,
+        )
+        encode_pool.start()
+
+    # Created here so that main() fails right away outside a dataflow.
+    node = Node()
 
     # Initialize data classes
-    image_data = FisheyeImageData()
+    image_store = LatestValue(FisheyeImageData)
     dora_stop_event = threading.Event()
     fisheye_camera_close_event = threading.Event()
     # Start threads
     fisheye_camera_thread = threading.Thread(
         target=capture_fisheye_camera_data,
-        args=(image_data,  dora_stop_event, fisheye_camera_close_event,
-              camera_id, image_width, image_height, flip, encoding),
+        args=(image_store,  dora_stop_event, fisheye_camera_close_event,
+              camera_id, image_width, image_height, flip, encoding, encode_pool, v4l2_config),
         daemon=True,
 
     )
 
     dora_thread = threading.Thread(
         target=send_data_through_dora,
-        args=(image_data, dora_stop_event, fisheye_camera_close_event),
+        args=(image_store, dora_stop_event, fisheye_camera_close_event, node),
         daemon=True,
 
     )
@@ -217,6 +356,8 @@ def main()-> None:
     logger.info("Waiting for threads to finish...")
     fisheye_camera_thread.join(timeout=2.0)  # 设置超时时间
     dora_thread.join(timeout=2.0)
+    if encode_pool is not None:
+        encode_pool.close()
 
     # 确认所有资源已释放
     if fisheye_camera_thread.is_alive():
@@ -1,14 +1,32 @@
+from functools import lru_cache
+
 import pyarrow as pa
+from dora_pika_common.arrow import COMPRESSED_ENCODINGS, encoded_field, tensor_field
+
+
+# 定义 image_schema，按实际分辨率和编码构建
+@lru_cache
+def image_schema(height: int, width: int, encoding: str = "rgb8") -> pa.Schema:
+  """Image schema for ``height`` x ``width`` frames sent as ``encoding``."""
+  fields = []
+  if encoding in COMPRESSED_ENCODINGS:
+    image = encoded_field("image")
+    fields = [
+      pa.field("quality", pa.int16()),  # jpeg/webp quality or png compression level
+      pa.field("encode_ns", pa.int64()),  # time spent encoding this frame
+    ]
+  else:
+    image = tensor_field("image", (height, width, 3), pa.uint8())
+  return pa.schema([
+    pa.field("camera_id", pa.string()),
+    image,
+    pa.field("timestamp", pa.int64()),
+    pa.field("width", pa.int16()),
+    pa.field("height", pa.int16()),
+    pa.field("encoding", pa.string()),
+    *fields,
+  ])
+
 
-pa_image = pa.list_(pa.uint8(), 480*640*3)
-
-# 定义 image_schema
-pa_image_fields = [
-  pa.field("camera_id", pa.string()),
-  pa.field("image", pa_image),
-  pa.field("timestamp", pa.int64()),
-  pa.field("width", pa.int16()),
-  pa.field("height", pa.int16()),
-  pa.field("encoding", pa.string()),
-]
-pa_image_schema = pa.schema(pa_image_fields)
+# 默认 640x480 的 schema
+pa_image_schema = image_schema(480, 640)
@@ -0,0 +1,118 @@
+"""Simulated fisheye camera backend (``BACKEND=sim``).
+
+`SimVideoCapture` implements the subset of ``cv2.VideoCapture`` used by the
+node and returns deterministic synthetic (or ``SIM_REPLAY``) BGR frames at
+``SIM_FPS`` (default 30) in the configured resolution. With the ``MJPG``
+fourcc and ``CAP_PROP_CONVERT_RGB`` off it returns the JPEG bytes of each frame
+as a ``(1, N)`` buffer, like the V4L2 backend does for an MJPEG camera.
+
+Like a V4L2 driver, the camera fills up to ``CAP_PROP_BUFFERSIZE`` (default 4)
+buffers in capture order and drops new frames while they are all full, so a
+slow consumer's ``grab()`` returns old frames. ``CAP_PROP_POS_MSEC`` is the
+``CLOCK_MONOTONIC`` capture time of the grabbed frame.
+"""
+
+import collections
+import os
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+from dora_pika_common.sim import FrameSource
+from typing_extensions import Self
+
+
+class SimVideoCapture:
+    """Stand-in for ``cv2.VideoCapture``."""
+
+    def __init__(self: Self, camera_id: str, api_preference: int = cv2.CAP_ANY) -> None:
+        self.camera_id = camera_id
+        self._props = {
+            cv2.CAP_PROP_FRAME_WIDTH: 640.0,
+            cv2.CAP_PROP_FRAME_HEIGHT: 480.0,
+            cv2.CAP_PROP_FPS: float(os.getenv("SIM_FPS", "30")),
+            cv2.CAP_PROP_FOURCC: float(cv2.VideoWriter_fourcc(*"YUYV")),
+            cv2.CAP_PROP_CONVERT_RGB: 1.0,
+            cv2.CAP_PROP_BUFFERSIZE: 4.0,
+        }
+        self._source: Optional[FrameSource] = None
+        # (frame index, monotonic capture time) of the filled driver buffers
+        self._queue: collections.deque = collections.deque()
+        self._start: Optional[float] = None
+        self._captured = 0
+        self._grabbed: Optional[tuple[int, float]] = None
+        self._encoded: dict[int, np.ndarray] = {}  # "camera-side" JPEG of each source frame
+        self._opened = True
+
+    def isOpened(self: Self) -> bool:  # noqa: N802
+        return self._opened
+
+    def getBackendName(self: Self) -> str:  # noqa: N802
+        return "SIM"
+
+    def set(self: Self, prop: int, value: float) -> bool:
+        self._props[prop] = float(value)
+        self._source = None
+        self._encoded.clear()
+        return True
+
+    def get(self: Self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self._grabbed[1] * 1000.0 if self._grabbed is not None else 0.0
+        return self._props.get(prop, 0.0)
+
+    def _frames(self: Self) -> FrameSource:
+        if self._source is None:
+            width = int(self._props[cv2.CAP_PROP_FRAME_WIDTH])
+            height = int(self._props[cv2.CAP_PROP_FRAME_HEIGHT])
+            self._source = FrameSource((height, width, 3), np.uint8, self._props[cv2.CAP_PROP_FPS])
+        return self._source
+
+    def _fill(self: Self) -> float:
+        """Queue the frames captured since the last call; return the frame period."""
+        period = 1.0 / self._props[cv2.CAP_PROP_FPS]
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+        captured = int((now - self._start) / period) + 1
+        for index in range(self._captured, captured):
+            if len(self._queue) < self._props[cv2.CAP_PROP_BUFFERSIZE]:
+                self._queue.append((index, self._start + index * period))
+        self._captured = max(self._captured, captured)
+        return period
+
+    def grab(self: Self) -> bool:
+        period = self._fill()
+        if not self._queue:
+            time.sleep(max(0.0, self._start + self._captured * period - time.monotonic()))
+            self._fill()
+        self._grabbed = self._queue.popleft()
+        return True
+
+    def retrieve(
+        self: Self, image: Optional[np.ndarray] = None,
+    ) -> tuple[bool, Optional[np.ndarray]]:
+        if self._grabbed is None:
+            return False, None
+        frames = self._frames().frames
+        index = self._grabbed[0] % len(frames)
+        frame = frames[index]
+        mjpeg = int(self._props[cv2.CAP_PROP_FOURCC]) == cv2.VideoWriter_fourcc(*"MJPG")
+        if mjpeg and not self._props[cv2.CAP_PROP_CONVERT_RGB]:
+            if index not in self._encoded:
+                self._encoded[index] = cv2.imencode(".jpg", frame)[1].reshape(1, -1)
+            return True, self._encoded[index].copy()
+        if image is not None and image.shape == frame.shape and image.dtype == frame.dtype:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+    def read(self: Self, image: Optional[np.ndarray] = None) -> tuple[bool, Optional[np.ndarray]]:
+        self.grab()
+        return self.retrieve(image)
+
+    def release(self: Self) -> None:
+        self._opened = False
+        self._source = None
+        self._encoded.clear()
@@ -0,0 +1,127 @@
+"""Low-latency V4L2 capture for the fisheye node (``CAPTURE_API=v4l2``).
+
+``cv2.VideoCapture`` lets the driver queue up to ``CAP_PROP_BUFFERSIZE``
+(default 4) mmap buffers. A consumer that falls behind dequeues the oldest
+one, so ``cap.read()`` returns frames several periods old. The timestamp the
+node used to publish is also taken after the decode, not at capture.
+
+`V4l2Capture` splits the read in two:
+
+- ``grab()`` dequeues a buffer without decoding it. With ``latest`` set it keeps
+  dequeuing while the grabbed frame is older than one frame period, up to the
+  number of buffers, so only the newest queued frame is decoded.
+- ``retrieve()`` decodes (or, for MJPEG passthrough, copies out) that frame.
+
+The frame's timestamp is the kernel buffer timestamp (``CAP_PROP_POS_MSEC``
+of the V4L2 backend, ``CLOCK_MONOTONIC``), mapped to wall-clock time by
+`MonotonicClock` so that it compares with the other nodes' timestamps. The
+``frame_age`` stage (``STAGE_TIMING=1``) is the time from that timestamp to
+the end of ``retrieve()``.
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+import numpy as np
+from typing_extensions import Self
+
+
+@dataclass
+class V4l2Config:
+    """Driver buffering of the V4L2 capture."""
+    buffers: int = 2  # mmap buffers queued in the driver (CAP_PROP_BUFFERSIZE)
+    latest: bool = True  # drop queued frames older than one period at every grab
+
+    @classmethod
+    def from_env(cls: type["V4l2Config"]) -> "V4l2Config":
+        buffers = int(os.getenv("V4L2_BUFFERS", "2"))
+        if buffers < 1:
+            raise ValueError(f"V4L2_BUFFERS must be at least 1, got {buffers}.")
+        return cls(buffers=buffers, latest=os.getenv("V4L2_LATEST", "1") in ("1", "true"))
+
+
+class MonotonicClock:
+    """Maps ``CLOCK_MONOTONIC`` nanoseconds to wall-clock (``CLOCK_REALTIME``) ones.
+
+    The offset between the clocks is re-measured every ``refresh`` seconds so
+    that NTP adjustments of the wall clock are followed.
+    """
+
+    def __init__(self: Self, refresh: float = 10.0) -> None:
+        self.refresh = refresh
+        self._offset = 0
+        self._next_refresh = 0.0
+
+    def offset(self: Self) -> int:
+        """Current ``realtime - monotonic`` offset in ns."""
+        now = time.monotonic()
+        if now >= self._next_refresh:
+            # Bracket the wall-clock read; keep the tightest of a few samples.
+            samples = []
+            for _ in range(3):
+                before = time.monotonic_ns()
+                realtime = time.time_ns()
+                after = time.monotonic_ns()
+                samples.append((after - before, realtime - (before + after) // 2))
+            self._offset = min(samples)[1]
+            self._next_refresh = now + self.refresh
+        return self._offset
+
+    def to_realtime(self: Self, monotonic_ns: int) -> int:
+        return monotonic_ns + self.offset()
+
+
+class V4l2Capture:
+    """``grab()``/``retrieve()`` over a V4L2 ``cv2.VideoCapture`` with kernel timestamps."""
+
+    def __init__(
+        self: Self,
+        cap: cv2.VideoCapture,
+        config: V4l2Config,
+        clock: Optional[MonotonicClock] = None,
+    ) -> None:
+        self.cap = cap
+        self.config = config
+        self.clock = clock or MonotonicClock()
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        self.period_ns = int(1e9 / fps) if fps > 0 else 0
+        self.timestamp = 0  # wall-clock ns of the grabbed frame
+        self.monotonic_ns = 0  # kernel timestamp of the grabbed frame
+        self.drained = 0  # stale frames dropped by the last grab
+
+    def _kernel_ns(self: Self) -> int:
+        msec = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+        # Drivers without buffer timestamps: the dequeue time.
+        return int(msec * 1e6) if msec > 0 else time.monotonic_ns()
+
+    def grab(self: Self) -> bool:
+        """Dequeue the next frame (the newest queued one with ``latest``)."""
+        if not self.cap.grab():
+            return False
+        self.monotonic_ns = self._kernel_ns()
+        self.drained = 0
+        if self.config.latest and self.period_ns:
+            # A frame older than one period means a newer one is already queued.
+            while (
+                self.drained < self.config.buffers - 1
+                and time.monotonic_ns() - self.monotonic_ns > self.period_ns
+            ):
+                if not self.cap.grab():
+                    return False
+                self.monotonic_ns = self._kernel_ns()
+                self.drained += 1
+        self.timestamp = self.clock.to_realtime(self.monotonic_ns)
+        return True
+
+    def retrieve(
+        self: Self, image: Optional[np.ndarray] = None,
+    ) -> tuple[bool, Optional[np.ndarray]]:
+        """Decode the grabbed frame, into ``image`` when its shape matches."""
+        return self.cap.retrieve(image)
+
+    def age(self: Self) -> float:
+        """Seconds since the kernel timestamp of the grabbed frame."""
+        return (time.monotonic_ns() - self.monotonic_ns) / 1e9
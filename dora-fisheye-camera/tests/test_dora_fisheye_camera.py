@@ -11,3 +11,191 @@ def test_import_main() -> None:
     # as we're not running in a Dora dataflow.
     with pytest.raises(RuntimeError):
         main()
+
+
+def test_sim_capture_to_publish(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Runs the capture and send threads against the simulated backend."""
+    import threading
+
+    import numpy as np
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    import dora_fisheye_camera.main as fisheye
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(fisheye, "Node", lambda: node)
+
+    image_store = LatestValue(fisheye.FisheyeImageData)
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    capture = threading.Thread(
+        target=fisheye.capture_fisheye_camera_data,
+        args=(image_store, stop_event, close_event, "0", 640, 480, "", "bgr8"),
+    )
+    capture.start()
+    assert wait_for_data(image_store)
+    fisheye.send_data_through_dora(image_store, stop_event, close_event)
+    capture.join(timeout=2.0)
+
+    assert not close_event.is_set()
+    images = node.outputs("image")
+    assert images
+    seqs = [metadata["seq"] for _, metadata in images]
+    assert seqs == sorted(set(seqs))
+    image = images[-1][0].column("image").flatten().to_numpy()
+    assert image.dtype == np.uint8 and image.size == 480 * 640 * 3
+
+
+@pytest.mark.parametrize("pooled", [False, True])
+def test_sim_jpeg(monkeypatch: pytest.MonkeyPatch, pooled: bool) -> None:
+    """jpeg frames are sent encoded, in order, with quality and encode time."""
+    import threading
+
+    import cv2
+    from dora_pika_common.encode import EncodePool
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    import dora_fisheye_camera.main as fisheye
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(fisheye, "Node", lambda: node)
+
+    pool = EncodePool("jpeg", 70) if pooled else None
+    if pool is not None:
+        pool.start()
+    image_store = LatestValue(fisheye.FisheyeImageData)
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    capture = threading.Thread(
+        target=fisheye.capture_fisheye_camera_data,
+        args=(image_store, stop_event, close_event, "0", 640, 480, "BOTH", "jpeg", pool),
+    )
+    capture.start()
+    assert wait_for_data(image_store)
+    fisheye.send_data_through_dora(image_store, stop_event, close_event)
+    capture.join(timeout=2.0)
+    if pool is not None:
+        pool.close()
+
+    images = [batch for batch, _ in node.outputs("image")]
+    assert images
+    timestamps = [batch.column("timestamp")[0].as_py() for batch in images]
+    assert timestamps == sorted(set(timestamps))
+    batch = images[-1]
+    assert batch.column("quality")[0].as_py() == (70 if pooled else 95)
+    assert batch.column("encode_ns")[0].as_py() > 0
+    image = batch.column("image").flatten().to_numpy()
+    assert cv2.imdecode(image, cv2.IMREAD_COLOR).shape == (480, 640, 3)
+
+
+def test_sim_mjpeg_passthrough(monkeypatch: pytest.MonkeyPatch) -> None:
+    """ENCODING=mjpeg publishes the camera's JPEG bytes as they are."""
+    import threading
+
+    from dora_pika_client import decode_image
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    import dora_fisheye_camera.main as fisheye
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(fisheye, "Node", lambda: node)
+
+    image_store = LatestValue(fisheye.FisheyeImageData)
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    capture = threading.Thread(
+        target=fisheye.capture_fisheye_camera_data,
+        args=(image_store, stop_event, close_event, "0", 640, 480, "", "mjpeg"),
+    )
+    capture.start()
+    assert wait_for_data(image_store)
+    fisheye.send_data_through_dora(image_store, stop_event, close_event)
+    capture.join(timeout=2.0)
+
+    assert not close_event.is_set()
+    images = [batch for batch, _ in node.outputs("image")]
+    assert images
+    batch = images[-1]
+    assert batch.column("encoding")[0].as_py() == "jpeg"
+    # Nothing was encoded by the node.
+    assert (batch.column("quality")[0].as_py(), batch.column("encode_ns")[0].as_py()) == (0, 0)
+    data = batch.column("image")[0].values.to_numpy()
+    assert bytes(data[:2]) == b"\xff\xd8" and data.size < 480 * 640 * 3
+    assert decode_image(batch).shape == (480, 640, 3)
+    assert decode_image(batch, reduce=2).shape == (240, 320, 3)
+
+
+@pytest.mark.parametrize("latest", [False, True])
+def test_v4l2_latest_frame_only(latest: bool) -> None:
+    """A slow consumer gets stale queued frames unless they are drained at grab."""
+    import time
+
+    import cv2
+
+    from dora_fisheye_camera.sim import SimVideoCapture
+    from dora_fisheye_camera.v4l2 import V4l2Capture, V4l2Config
+
+    config = V4l2Config(buffers=4, latest=latest)
+    cap = SimVideoCapture("0", cv2.CAP_V4L2)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, config.buffers)
+    capture = V4l2Capture(cap, config)
+    ages = []
+    for _ in range(8):
+        assert capture.grab()
+        ages.append(capture.age())
+        ret, frame = capture.retrieve()
+        assert ret and frame.shape == (480, 640, 3)
+        time.sleep(0.1)  # 3 frame periods of processing
+    if latest:
+        assert max(ages[2:]) < 0.07 and capture.drained > 0
+    else:
+        # Four buffers of frames waiting ~0.1 s each.
+        assert min(ages[4:]) > 0.2 and capture.drained == 0
+
+
+def test_monotonic_clock_maps_to_wall_clock() -> None:
+    """Kernel (monotonic) timestamps map onto time.time_ns()."""
+    import time
+
+    from dora_fisheye_camera.v4l2 import MonotonicClock
+
+    clock = MonotonicClock()
+    mapped = clock.to_realtime(time.monotonic_ns())
+    assert abs(mapped - time.time_ns()) < 1_000_000
+
+
+def test_sim_v4l2_capture(monkeypatch: pytest.MonkeyPatch) -> None:
+    """With the V4L2 backend frames carry their capture time, not the read time."""
+    import threading
+    import time
+
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    import dora_fisheye_camera.main as fisheye
+    from dora_fisheye_camera.v4l2 import V4l2Config
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(fisheye, "Node", lambda: node)
+
+    image_store = LatestValue(fisheye.FisheyeImageData)
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    start = time.time_ns()
+    capture = threading.Thread(
+        target=fisheye.capture_fisheye_camera_data,
+        args=(image_store, stop_event, close_event, "0", 640, 480, "", "bgr8", None,
+              V4l2Config(buffers=2)),
+    )
+    capture.start()
+    assert wait_for_data(image_store)
+    fisheye.send_data_through_dora(image_store, stop_event, close_event)
+    capture.join(timeout=2.0)
+
+    assert not close_event.is_set()
+    timestamps = [batch.column("timestamp")[0].as_py() for batch, _ in node.outputs("image")]
+    assert timestamps and timestamps == sorted(set(timestamps))
+    assert start - 1_000_000 <= timestamps[0] and timestamps[-1] <= time.time_ns()
@@ -6,6 +6,7 @@ import cv2
 import numpy as np
 from config import GSConfig  # 导入GSConfig用于加载JSON配置
 from dora import Node
+from dora_pika_client import decode
 
 from utilities.image_processing import (
     apply_cmap,
@@ -57,32 +58,11 @@ def main() -> None:
                 if event["id"] == "data":
                     frame_count += 1
                     fps = frame_count / elapsed
-                    # 提取和处理数据
-                    image = struct["image"]
-                    image = np.array(image.values).reshape(
-                        config.camera_height,
-                        config.camera_width,
-                        3
-                    ).astype(np.uint8)
-
-                    depth_map = struct["depth_map"]
-                    depth_map = np.array(depth_map.values).reshape(
-                        config.camera_height,
-                        config.camera_width
-                    ).astype(np.float64)
-
-                    contact_mask = struct["contact_mask"]
-                    contact_mask = np.array(contact_mask.values).reshape(
-                        config.camera_height,
-                        config.camera_width
-                    ).astype(np.bool_)
-
-                    gradients = struct["gradients"]
-                    gradients = np.array(gradients.values).reshape(
-                        config.camera_height,
-                        config.camera_width,
-                        2
-                    ).astype(np.float64)
+                    # 提取和处理数据（只读视图，无拷贝）
+                    data = decode(event)
+                    image = data["image"]
+                    depth_map = data["depth_map"]
+                    contact_mask = data["contact_mask"]
 
                     # 处理深度图用于显示
                     depth_map_trimmed = trim_outliers(depth_map, 1, 99)
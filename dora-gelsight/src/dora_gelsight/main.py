@@ -3,21 +3,32 @@ import os
 import signal
 import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 
 import cv2
 import numpy as np
-import pyarrow as pa
 from config import GSConfig
 from dora import Node
-from typing_extensions import Self
+from dora_pika_common.arrow import record_batch, reuse_buffer
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.timing import StageTimer
 
-from dora_gelsight.pa_schema import pa_gelsight_schema as sensor_schema
-from utilities.gelsightmini import GelSightMini
-from utilities.reconstruction import Reconstruction3D
+from dora_gelsight.pa_schema import gelsight_schema
+
+# hardware (default) or sim: a simulated gel replacing the camera and the network
+BACKEND = os.getenv("BACKEND", "hardware")
+if BACKEND == "sim":
+    from dora_gelsight.sim import GelSightMini, Reconstruction3D
+else:
+    from utilities.gelsightmini import GelSightMini
+    from utilities.reconstruction import Reconstruction3D
 
 logger = logging.getLogger(__name__)
 
+# Opt-in per-stage timing (STAGE_TIMING=1), see dora_pika_common.timing
+stage_timer = StageTimer("gelsight")
+
 RUNNER_CI = True if os.getenv("CI") == "true" else False
 MAX_RETRIES = 5  # 最大重试次数
 RETRY_DELAY = 0.1  # 重试延迟(秒)
@@ -29,45 +40,16 @@ CONFIG_PATH = os.getenv("GS_CONFIG_PATH", "default_config.json")
 
 @dataclass
 class ImageData:
-    """Stores image data from GelSight with thread-safe access."""
+    """GelSight image slot, exchanged through a LatestValue."""
 
-    _lock: threading.Lock = field(default_factory=threading.Lock)
-    _has_data: bool = False
     raw_image: np.ndarray = None
     depth_map: np.ndarray = None
     contact_mask: np.ndarray = None
     gradients: np.ndarray = None
     timestamp: int = 0
-    def update_data(
-        self: Self,
-        raw_image: np.ndarray,
-        depth_map: np.ndarray,
-        contact_mask: np.ndarray,
-        gradients: np.ndarray,
-        timestamp: int
-    ) -> None:
-        """Update image data."""
-        with self._lock:
-            self.raw_image = raw_image
-            self.depth_map = depth_map
-            self.contact_mask = contact_mask
-            self.gradients = gradients
-            self._has_data = True
-            self.timestamp = timestamp
-    def read_data(self: Self) -> tuple[bool, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
-        """Read image data."""
-        with self._lock:
-            return (
-                self._has_data,
-                self.raw_image,
-                self.depth_map,
-                self.contact_mask,
-                self.gradients,
-                self.timestamp,
-            )
 
 def receive_data_from_gelsight(
-    image_data: ImageData,
+    image_store: LatestValue[ImageData],
     dora_stop_event: threading.Event,
     gelsight_close_event: threading.Event,
 ) -> None:
@@ -118,7 +100,8 @@ def receive_data_from_gelsight(
             # 从相机获取帧(带重试逻辑)
             frame = None
             for _ in range(MAX_RETRIES):
-                frame = cam_stream.update(dt=0)
+                with stage_timer.stage("update"):
+                    frame = cam_stream.update(dt=0)
                 if frame is not None:
                     break
                 time.sleep(RETRY_DELAY)
@@ -131,17 +114,28 @@ def receive_data_from_gelsight(
 
             try:
                 # 转换为RGB格式
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                with stage_timer.stage("cvtColor"):
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
                 # 计算深度图、接触掩模和梯度
-                depth_map, contact_mask, grad_x, grad_y = reconstruction.get_depthmap(
-                    image=frame,
-                    markers_threshold=(config.marker_mask_min, config.marker_mask_max)
-                )
-                gradients = np.stack([grad_x, grad_y], axis=-1)
-                timestamp = time.time_ns()
+                with stage_timer.stage("get_depthmap"):
+                    depth_map, contact_mask, grad_x, grad_y = reconstruction.get_depthmap(
+                        image=frame,
+                        markers_threshold=(config.marker_mask_min, config.marker_mask_max)
+                    )
                 # 更新共享数据
-                image_data.update_data(frame, depth_map, contact_mask, gradients, timestamp)
+                data = image_store.acquire()
+                data.raw_image = frame
+                data.depth_map = depth_map
+                data.contact_mask = contact_mask
+                with stage_timer.stage("stack"):
+                    data.gradients = reuse_buffer(
+                        data.gradients, (*grad_x.shape, 2), grad_x.dtype,
+                    )
+                    np.stack([grad_x, grad_y], axis=-1, out=data.gradients)
+                data.timestamp = time.time_ns()
+                image_store.publish()
+                stage_timer.count("captured")
 
             except Exception as e:
                 logger.exception("Error processing frame: %s", e)
@@ -153,36 +147,36 @@ def receive_data_from_gelsight(
         logger.info("Closing GelSight camera...")
         if 'cam_stream' in locals() and cam_stream.camera is not None:
             cam_stream.camera.release()
-        cv2.destroyAllWindows()
         gelsight_close_event.set()
 
 def send_data_through_dora(
-    image_data: ImageData,
+    image_store: LatestValue[ImageData],
     dora_stop_event: threading.Event,
     gelsight_close_event: threading.Event,
 ) -> None:
     """Sends image and processed data via Dora outputs."""
     node = Node()
+    publisher = Publisher(node, {"gelsight_data": image_store}, timer=stage_timer)
     try:
-        for event in node:
+        for event in publisher:
             if gelsight_close_event.is_set():
                 dora_stop_event.set()
                 break
             if event["type"] == "INPUT" and event["id"] == "tick":
-                has_data, raw_image, depth_map, contact_mask, gradients,timestamp = image_data.read_data()
-                if has_data:
-                    sensor_batch = pa.record_batch(
-                        {
-                            "image": [raw_image.ravel()],
-                            "depth_map": [depth_map.ravel()],
-                            "contact_mask": [contact_mask.ravel()],
-                            "gradients": [gradients.ravel()],
-                            "timestamp": [timestamp],
-                        },
-                        schema = sensor_schema,
-                    )
-                    node.send_output("gelsight_data", sensor_batch)
-                time.sleep(0.001)  # 控制发送频率
+                seq, data = publisher.read("gelsight_data")
+                if data is not None:
+                    with stage_timer.stage("batch/gelsight_data"):
+                        sensor_batch = record_batch(
+                            {
+                                "image": data.raw_image,
+                                "depth_map": data.depth_map,
+                                "contact_mask": data.contact_mask,
+                                "gradients": data.gradients,
+                                "timestamp": data.timestamp,
+                            },
+                            schema = gelsight_schema(*data.raw_image.shape[:2]),
+                        )
+                    publisher.send("gelsight_data", sensor_batch, seq)
 
             elif event["type"] == "STOP":
                 dora_stop_event.set()
@@ -203,24 +197,25 @@ if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
     # 创建事件和数据存储
-    image_data = ImageData()
+    image_store = LatestValue(ImageData)
     dora_stop_event = threading.Event()
     gelsight_close_event = threading.Event()
 
     # 设置信号处理
     signal.signal(signal.SIGINT, signal_handler)
+    stage_timer.install_signal_handler()
     logger.info("Press Ctrl+C to exit...")
 
     # 启动线程
     gelsight_thread = threading.Thread(
         target=receive_data_from_gelsight,
-        args=(image_data, dora_stop_event, gelsight_close_event),
+        args=(image_store, dora_stop_event, gelsight_close_event),
         daemon=True,  # 设置为守护线程，主线程退出时自动终止
 
     )
     dora_thread = threading.Thread(
         target=send_data_through_dora,
-        args=(image_data, dora_stop_event, gelsight_close_event),
+        args=(image_store, dora_stop_event, gelsight_close_event),
         daemon=True,  # 设置为守护线程，主线程退出时自动终止
 
     )
@@ -1,15 +1,21 @@
+from functools import lru_cache
+
 import pyarrow as pa
+from dora_pika_common.arrow import tensor_field
+
+
+# 定义 image_schema，按 IMAGE_WIDTH/IMAGE_HEIGHT 构建
+@lru_cache
+def gelsight_schema(height: int, width: int) -> pa.Schema:
+  """GelSight schema for ``height`` x ``width`` frames."""
+  return pa.schema([
+    tensor_field("image", (height, width, 3), pa.uint8()),
+    tensor_field("depth_map", (height, width), pa.float64()),
+    tensor_field("contact_mask", (height, width), pa.bool_()),
+    tensor_field("gradients", (height, width, 2), pa.float64()),
+    pa.field("timestamp", pa.int64()),
+  ])
+
 
-pa_image = pa.list_(pa.uint8(), 240*320*3)
-pa_depth = pa.list_(pa.float64(), 240*320)
-pa_contact_mask = pa.list_(pa.bool_(), 240*320)
-pa_gradients = pa.list_(pa.float64(), 240*320*2)
-# 定义 image_schema
-pa_gelsight_fields = [
-  pa.field("image", pa_image),
-  pa.field("depth_map", pa_depth),
-  pa.field("contact_mask", pa_contact_mask),
-  pa.field("gradients", pa_gradients),
-  pa.field("timestamp", pa.int64()),
-]
-pa_gelsight_schema = pa.schema(pa_gelsight_fields)
+# 默认 320x240 的 schema
+pa_gelsight_schema = gelsight_schema(240, 320)
@@ -0,0 +1,93 @@
+"""Simulated GelSight Mini backend (``BACKEND=sim``).
+
+`SimGelSightMini` and `SimReconstruction3D` implement the subset of
+``utilities.gelsightmini.GelSightMini`` and
+``utilities.reconstruction.Reconstruction3D`` used by the node, without a
+camera, torch or the network weights. Frames arrive at ``SIM_FPS`` (default
+25, the Mini's rate); the reconstruction returns the depth, contact mask and
+gradients of a spherical indenter that circles over the gel.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+from dora_pika_common.sim import FrameSource
+from typing_extensions import Self
+
+
+class SimCamera:
+    """Stand-in for ``utilities.gelsightmini.Camera``."""
+
+    def __init__(self: Self, device: str) -> None:
+        self.device = device
+
+    def release(self: Self) -> None:
+        pass
+
+
+class SimGelSightMini:
+    """Stand-in for ``GelSightMini``."""
+
+    def __init__(
+        self: Self,
+        target_width: int = 320,
+        target_height: int = 240,
+        border_fraction: float = 0.15,
+    ) -> None:
+        self.camera: Optional[SimCamera] = None
+        self.target_width = target_width
+        self.target_height = target_height
+        self._source: Optional[FrameSource] = None
+
+    def get_device_list(self: Self) -> dict:
+        return {0: "GelSight Mini (sim)"}
+
+    def select_device(self: Self, device_idx: Optional[int] = None) -> None:
+        self.camera = SimCamera(self.get_device_list()[device_idx or 0])
+
+    def start(self: Self) -> None:
+        self._source = FrameSource(
+            (self.target_height, self.target_width, 3),
+            np.uint8,
+            float(os.getenv("SIM_FPS", "25")),
+        )
+
+    def update(self: Self, dt: float) -> Optional[np.ndarray]:
+        if self.camera is None or self._source is None:
+            return None
+        return self._source.read()
+
+
+class SimReconstruction3D:
+    """Stand-in for ``Reconstruction3D``: analytic contact instead of the network."""
+
+    def __init__(
+        self: Self, image_width: int = 320, image_height: int = 240, use_gpu: bool = False,
+    ) -> None:
+        self.image_width = image_width
+        self.image_height = image_height
+        self._count = 0
+
+    def load_nn(self: Self, net_path: str) -> Self:
+        return self
+
+    def get_depthmap(
+        self: Self,
+        image: np.ndarray,
+        markers_threshold: Optional[tuple[int, int]] = None,
+        contact_mask: Optional[np.ndarray] = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        height, width = image.shape[:2]
+        angle = 2.0 * np.pi * (self._count % 50) / 50
+        self._count += 1
+        rows = np.arange(height)[:, None] - (height / 2 + height / 5 * np.sin(angle))
+        cols = np.arange(width)[None, :] - (width / 2 + width / 5 * np.cos(angle))
+        radius = min(height, width) / 4
+        depth_map = -np.sqrt(np.clip(radius**2 - rows**2 - cols**2, 0.0, None)) / radius
+        grad_x, grad_y = np.gradient(depth_map)
+        return depth_map, depth_map < 0.0, grad_x, grad_y
+
+
+GelSightMini = SimGelSightMini
+Reconstruction3D = SimReconstruction3D
@@ -11,3 +11,41 @@ def test_import_main() -> None:
     # as we're not running in a Dora dataflow.
     with pytest.raises(RuntimeError):
         main()
+
+
+def test_sim_capture_to_publish(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Runs the receive and send threads against the simulated gel."""
+    import pathlib
+    import threading
+
+    import numpy as np
+    from dora_pika_client import decode
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    # main.py imports its config module the way ``dora`` runs it, as a script.
+    monkeypatch.syspath_prepend(str(pathlib.Path(__file__).parents[1] / "src" / "dora_gelsight"))
+    monkeypatch.setenv("DEVICE_INDEX", "0")
+    import dora_gelsight.main as gelsight
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(gelsight, "Node", lambda: node)
+
+    image_store = LatestValue(gelsight.ImageData)
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    receiver = threading.Thread(
+        target=gelsight.receive_data_from_gelsight,
+        args=(image_store, stop_event, close_event),
+    )
+    receiver.start()
+    assert wait_for_data(image_store)
+    gelsight.send_data_through_dora(image_store, stop_event, close_event)
+    receiver.join(timeout=2.0)
+
+    outputs = node.outputs("gelsight_data")
+    assert outputs
+    data = decode(outputs[-1][0])
+    assert data["image"].shape == (240, 320, 3) and data["image"].dtype == np.uint8
+    assert data["gradients"].shape == (240, 320, 2)
+    assert data["contact_mask"].any()
@@ -0,0 +1,99 @@
+"""Benchmark: generic pa.record_batch vs zero-copy record_batch per node schema.
+
+For every node output carrying frames, builds a batch the old way
+(``pa.record_batch({"image": [frame.ravel()]}, schema=...)``) and with
+`dora_pika_common.arrow.record_batch`, and reports microseconds per publish and
+bytes allocated by Arrow (bytes copied) per batch.
+
+    python benchmarks/bench_arrow.py --repeat 200
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from dora_pika_common.arrow import record_batch
+
+# Frame columns of each node's pa_schema.py: name -> (shape, numpy dtype, arrow type).
+NODE_SCHEMAS = {
+    "pyrealsense/image": {"image": ((480, 640, 3), np.uint8, pa.uint8())},
+    "pyrealsense/depth": {"depth": ((480, 640), np.uint16, pa.uint16())},
+    "fisheye/image": {"image": ((480, 640, 3), np.uint8, pa.uint8())},
+    "xense/xense_data": {
+        "image": ((400, 700, 3), np.uint8, pa.uint8()),
+        "depth": ((400, 700), np.float32, pa.float32()),
+        "force": ((6,), np.float64, pa.float64()),
+        "mesh": ((35, 20, 3), np.float64, pa.float64()),
+    },
+    "gelsight/gelsight_data": {
+        "image": ((240, 320, 3), np.uint8, pa.uint8()),
+        "depth_map": ((240, 320), np.float64, pa.float64()),
+        "contact_mask": ((240, 320), np.bool_, pa.bool_()),
+        "gradients": ((240, 320, 2), np.float64, pa.float64()),
+    },
+    "dm_tac/touch_sensor_data": {
+        "img": ((240, 320), np.uint8, pa.uint8()),
+        "shear": ((240, 320, 2), np.float32, pa.float32()),
+        "depth": ((240, 320), np.float32, pa.float32()),
+        "deformation": ((240, 320, 2), np.float32, pa.float32()),
+    },
+    "pyaudio/audio_data": {"audio_data": ((1024,), np.int16, pa.int16())},
+}
+
+
+def build_case(columns: dict) -> tuple[pa.Schema, dict]:
+    rng = np.random.default_rng(0)
+    fields = []
+    values = {}
+    for name, (shape, dtype, arrow_type) in columns.items():
+        fields.append(pa.field(name, pa.list_(arrow_type, int(np.prod(shape)))))
+        values[name] = (rng.random(shape) * 200).astype(dtype)
+    fields.append(pa.field("timestamp", pa.int64()))
+    values["timestamp"] = time.time_ns()
+    return pa.schema(fields), values
+
+
+def measure(build: callable, repeat: int) -> tuple[float, int]:
+    copied = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        before = pa.total_allocated_bytes()
+        batch = build()
+        copied = pa.total_allocated_bytes() - before
+        del batch
+    return (time.perf_counter() - start) / repeat * 1e6, copied
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'output':<26} {'payload':>10} {'generic us':>11} {'copied':>10} "
+          f"{'zero-copy us':>13} {'copied':>10}")
+    for name, columns in NODE_SCHEMAS.items():
+        schema, values = build_case(columns)
+        payload = sum(v.nbytes for v in values.values() if isinstance(v, np.ndarray))
+
+        def generic(schema: pa.Schema = schema, values: dict = values) -> pa.RecordBatch:
+            return pa.record_batch(
+                {
+                    k: [v.ravel()] if isinstance(v, np.ndarray) else [v]
+                    for k, v in values.items()
+                },
+                schema=schema,
+            )
+
+        def zero_copy(schema: pa.Schema = schema, values: dict = values) -> pa.RecordBatch:
+            return record_batch(values, schema)
+
+        generic_us, generic_bytes = measure(generic, args.repeat)
+        zero_us, zero_bytes = measure(zero_copy, args.repeat)
+        print(f"{name:<26} {payload:>10} {generic_us:>11.1f} {generic_bytes:>10} "
+              f"{zero_us:>13.1f} {zero_bytes:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""End-to-end benchmark: run every node on its simulated backend into a latency sink.
+
+Starts ``dora run benchmarks/dataflow.yml``, samples CPU and RSS of every node
+process from ``/proc`` while it runs, stops the dataflow after ``--duration``
+seconds and merges the per-output sink statistics (p50/p99 capture-to-receive
+latency, delivered FPS, duplicate and dropped frames) with the per-node resource
+usage into one JSON file. ``--compare`` checks the run against a previous
+results file and exits non-zero on a regression.
+
+    python benchmarks/bench_dataflow.py --duration 30 --output results.json
+    python benchmarks/bench_dataflow.py --mode event --compare results.json
+
+Needs the ``dora`` CLI on ``PATH`` and Linux (``/proc``) for the resource
+columns.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import yaml
+from typing_extensions import Self
+
+BENCH_DIR = Path(__file__).resolve().parent
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def node_paths(dataflow: Path) -> dict[str, str]:
+    """Map node id to the absolute path of its script."""
+    with open(dataflow) as f:
+        nodes = yaml.safe_load(f)["nodes"]
+    return {node["id"]: str((dataflow.parent / node["path"]).resolve()) for node in nodes}
+
+
+def _cmdline(pid: str) -> str:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode(errors="replace")
+    except OSError:
+        return ""
+
+
+def _usage(pid: int) -> Optional[tuple[float, int]]:
+    """CPU seconds and RSS bytes of ``pid``, None once it has exited."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/statm") as f:
+            rss_pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    # utime and stime are fields 14 and 15 of stat, 12 and 13 after "pid (comm)".
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS, rss_pages * PAGE_SIZE
+
+
+class ResourceSampler:
+    """Tracks CPU and RSS of the node processes, found by their script path."""
+
+    def __init__(self: Self, paths: dict[str, str]) -> None:
+        self.paths = paths
+        self.pids: dict[str, int] = {}
+        self.first: dict[str, tuple[float, float]] = {}
+        self.last: dict[str, tuple[float, float]] = {}
+        self.peak_rss: dict[str, int] = {}
+
+    def _discover(self: Self) -> None:
+        missing = {node: path for node, path in self.paths.items() if node not in self.pids}
+        if not missing:
+            return
+        for pid in filter(str.isdigit, os.listdir("/proc")):
+            cmdline = _cmdline(pid)
+            for node, path in missing.items():
+                if path in cmdline and node not in self.pids:
+                    self.pids[node] = int(pid)
+
+    def sample(self: Self) -> None:
+        self._discover()
+        now = time.perf_counter()
+        for node, pid in self.pids.items():
+            usage = _usage(pid)
+            if usage is None:
+                continue
+            cpu_seconds, rss = usage
+            self.first.setdefault(node, (now, cpu_seconds))
+            self.last[node] = (now, cpu_seconds)
+            self.peak_rss[node] = max(self.peak_rss.get(node, 0), rss)
+
+    def summary(self: Self) -> dict[str, dict]:
+        result = {}
+        for node in self.paths:
+            if node not in self.first:
+                result[node] = {"cpu_percent": None, "peak_rss_mb": None}
+                continue
+            (start, cpu_start), (end, cpu_end) = self.first[node], self.last[node]
+            wall = end - start
+            result[node] = {
+                "cpu_percent": 100.0 * (cpu_end - cpu_start) / wall if wall > 0 else None,
+                "peak_rss_mb": self.peak_rss[node] / 2**20,
+            }
+        return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_dataflow(dataflow: Path, duration: float, mode: str, interval: float) -> dict:
+    paths = node_paths(dataflow)
+    sampler = ResourceSampler(paths)
+    with tempfile.TemporaryDirectory() as tmp:
+        sink_results = Path(tmp) / "sink_results.json"
+        env = dict(os.environ, PUBLISH_MODE=mode, BENCH_RESULTS=str(sink_results))
+        dora = subprocess.Popen(["dora", "run", str(dataflow)], cwd=dataflow.parent, env=env)
+        try:
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline and dora.poll() is None:
+                sampler.sample()
+                time.sleep(interval)
+        finally:
+            dora.send_signal(signal.SIGINT)
+            try:
+                dora.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                dora.kill()
+        if not sink_results.exists():
+            raise RuntimeError("the sink did not write its results; check the dora output")
+        with open(sink_results) as f:
+            outputs = json.load(f)
+    return {
+        "commit": git_commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "duration_s": duration,
+        "publish_mode": mode,
+        "outputs": outputs,
+        "nodes": sampler.summary(),
+    }
+
+
+def _fmt(value: Optional[float], digits: int = 1) -> str:
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def print_results(results: dict) -> None:
+    print(f"commit {results['commit']}  mode {results['publish_mode']}  "
+          f"{results['duration_s']:.0f} s")
+    print(f"{'output':<28} {'recv':>6} {'fps':>7} {'dup':>5} {'drop':>6} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+    for name, output in results["outputs"].items():
+        latency = output["latency_ms"] or {}
+        print(f"{name:<28} {output['received']:>6} {output['fps']:>7.1f} "
+              f"{output['duplicates']:>5} {output['dropped']:>6} "
+              f"{_fmt(latency.get('p50'), 2):>8} {_fmt(latency.get('p99'), 2):>8}")
+    print(f"{'node':<28} {'cpu %':>7} {'rss MB':>8}")
+    for name, node in results["nodes"].items():
+        print(f"{name:<28} {_fmt(node['cpu_percent']):>7} {_fmt(node['peak_rss_mb']):>8}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a line per output whose p99 latency or FPS regressed past ``tolerance``."""
+    regressions = []
+    for name, output in results["outputs"].items():
+        before = baseline["outputs"].get(name)
+        if before is None:
+            continue
+        if output["fps"] < before["fps"] * (1.0 - tolerance):
+            regressions.append(f"{name}: fps {before['fps']:.1f} -> {output['fps']:.1f}")
+        p99 = (output["latency_ms"] or {}).get("p99")
+        before_p99 = (before["latency_ms"] or {}).get("p99")
+        if p99 is not None and before_p99 is not None and p99 > before_p99 * (1.0 + tolerance):
+            regressions.append(f"{name}: p99 {before_p99:.2f} ms -> {p99:.2f} ms")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataflow", type=Path, default=BENCH_DIR / "dataflow.yml")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--mode", choices=("tick", "event"), default="tick")
+    parser.add_argument("--interval", type=float, default=0.5, help="resource sampling period")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--compare", type=Path, help="previous results to check against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = run_dataflow(args.dataflow.resolve(), args.duration, args.mode, args.interval)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print_results(results)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
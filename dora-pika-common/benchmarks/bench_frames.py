@@ -0,0 +1,94 @@
+"""Benchmark: capture-stage preprocessing, allocating vs into recycled buffers.
+
+For the RealSense and fisheye capture steps (flip, ``bgr8`` conversion, depth
+clamp) compares the old chain of ``cv2.flip`` / ``cv2.cvtColor`` / copy /
+boolean mask, which returns a new array at every step, with
+`dora_pika_common.frames` writing into a preallocated slot. Reports
+microseconds and bytes allocated per frame (numpy allocations traced with
+``tracemalloc``). The source frame is read-only, as the SDK buffer is.
+
+    python benchmarks/bench_frames.py --repeat 200 --width 1280 --height 720
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable
+
+import cv2
+import numpy as np
+
+from dora_pika_common.frames import clamp_into, transform_into
+from dora_pika_common.sim import synthetic_frames
+
+
+def old_color(src: np.ndarray, slot: np.ndarray, flip: int, conversion: int) -> np.ndarray:
+    frame = cv2.flip(src, flip)
+    frame = cv2.cvtColor(frame, conversion)
+    np.copyto(slot, frame)
+    return slot
+
+
+def old_depth(src: np.ndarray, slot: np.ndarray, max_depth: int) -> np.ndarray:
+    np.copyto(slot, src)
+    slot[slot > max_depth] = 0
+    return slot
+
+
+def measure(step: Callable[[], np.ndarray], repeat: int) -> tuple[float, float]:
+    """Microseconds and bytes allocated per call, freed or not (peak traced memory)."""
+    step()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        step()
+    elapsed = (time.perf_counter() - start) / repeat * 1e6
+    allocated = 0
+    tracemalloc.start()
+    for _ in range(repeat):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        step()
+        allocated += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return elapsed, allocated / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    shape = (args.height, args.width)
+    color = synthetic_frames((*shape, 3), np.uint8, 1)[0]
+    depth = synthetic_frames(shape, np.uint16, 1, low=300, high=8000)[0]
+    color_slot = np.empty_like(color)
+    depth_slot = np.empty_like(depth)
+
+    cases = {
+        "flip+bgr8": (
+            lambda: old_color(color, color_slot, -1, cv2.COLOR_RGB2BGR),
+            lambda: transform_into(color, color_slot, "BOTH", cv2.COLOR_RGB2BGR),
+        ),
+        "flip": (
+            lambda: np.copyto(color_slot, cv2.flip(color, 0)),
+            lambda: transform_into(color, color_slot, "VERTICAL"),
+        ),
+        "depth clamp": (
+            lambda: old_depth(depth, depth_slot, 5000),
+            lambda: clamp_into(depth, depth_slot, 5000),
+        ),
+    }
+    print(f"{'step':<12} {'frame bytes':>12} {'old us':>9} {'old bytes':>10} "
+          f"{'new us':>9} {'new bytes':>10}")
+    for name, (old, new) in cases.items():
+        frame_bytes = depth.nbytes if "depth" in name else color.nbytes
+        old_us, old_bytes = measure(old, args.repeat)
+        new_us, new_bytes = measure(new, args.repeat)
+        print(f"{name:<12} {frame_bytes:>12} {old_us:>9.1f} {old_bytes:>10.0f} "
+              f"{new_us:>9.1f} {new_bytes:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
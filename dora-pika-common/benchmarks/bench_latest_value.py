@@ -0,0 +1,171 @@
+"""Microbenchmark: locked dataclass + copy vs LatestValue triple buffer.
+
+Runs a capture thread and a publisher thread against both stores with a
+640x480x3 frame and reports per-operation latency for each side. The locked
+store reproduces the pattern the nodes used before (lock on update, lock and
+``frame.copy()`` on read); the LatestValue store copies the SDK frame once into a
+preallocated slot and reads it in place.
+
+    python benchmarks/bench_latest_value.py --seconds 3 --rate 30
+    python benchmarks/bench_latest_value.py --rate 0   # unpaced, worst-case contention
+"""
+
+import argparse
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from typing_extensions import Self
+
+from dora_pika_common.latest import LatestValue
+
+
+@dataclass
+class LockedImageData:
+    """The per-node pattern being replaced."""
+
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _has_data: bool = False
+    frame: np.ndarray = None
+    timestamp: int = 0
+
+    def update_data(self: Self, frame: np.ndarray, timestamp: int) -> None:
+        with self._lock:
+            self.frame = frame
+            self.timestamp = timestamp
+            self._has_data = True
+
+    def read_data(self: Self) -> tuple[bool, np.ndarray, int]:
+        with self._lock:
+            return self._has_data, self.frame.copy(), self.timestamp
+
+
+@dataclass
+class ImageSlot:
+    """Preallocated slot for the LatestValue store."""
+
+    frame: np.ndarray
+    timestamp: int = 0
+
+
+def _pace(next_tick: float, period: float) -> float:
+    if period <= 0:
+        return next_tick
+    delay = next_tick - time.perf_counter()
+    if delay > 0:
+        time.sleep(delay)
+    return next_tick + period
+
+
+def _summary(name: str, samples: list[float]) -> str:
+    arr = np.asarray(samples) * 1e6
+    if arr.size == 0:
+        return f"{name:<28} no samples"
+    return (
+        f"{name:<28} n={arr.size:<7d} mean={arr.mean():8.1f}us "
+        f"p50={np.percentile(arr, 50):8.1f}us p99={np.percentile(arr, 99):8.1f}us"
+    )
+
+
+def run_locked(shape: tuple[int, ...], seconds: float, period: float) -> tuple[list, list]:
+    store = LockedImageData()
+    stop = threading.Event()
+    write_times: list[float] = []
+    read_times: list[float] = []
+    source = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+
+    def writer() -> None:
+        next_tick = time.perf_counter()
+        while not stop.is_set():
+            # The SDK hands out a fresh buffer per frame.
+            frame = source.copy()
+            start = time.perf_counter()
+            store.update_data(frame, time.time_ns())
+            write_times.append(time.perf_counter() - start)
+            next_tick = _pace(next_tick, period)
+
+    def reader() -> None:
+        next_tick = time.perf_counter()
+        while not stop.is_set():
+            start = time.perf_counter()
+            has_data, frame, _ = store.read_data()
+            if has_data:
+                frame.ravel()
+                read_times.append(time.perf_counter() - start)
+            next_tick = _pace(next_tick, period)
+
+    store.update_data(source.copy(), 0)
+    _run(writer, reader, stop, seconds)
+    return write_times, read_times
+
+
+def run_latest(shape: tuple[int, ...], seconds: float, period: float) -> tuple[list, list]:
+    store = LatestValue(lambda: ImageSlot(np.zeros(shape, dtype=np.uint8)))
+    stop = threading.Event()
+    write_times: list[float] = []
+    read_times: list[float] = []
+    source = np.random.default_rng(0).integers(0, 255, shape, dtype=np.uint8)
+
+    def writer() -> None:
+        next_tick = time.perf_counter()
+        while not stop.is_set():
+            frame = source.copy()
+            start = time.perf_counter()
+            slot = store.acquire()
+            np.copyto(slot.frame, frame)
+            slot.timestamp = time.time_ns()
+            store.publish()
+            write_times.append(time.perf_counter() - start)
+            next_tick = _pace(next_tick, period)
+
+    def reader() -> None:
+        next_tick = time.perf_counter()
+        while not stop.is_set():
+            start = time.perf_counter()
+            _, slot = store.read()
+            if slot is not None:
+                slot.frame.ravel()
+                read_times.append(time.perf_counter() - start)
+            next_tick = _pace(next_tick, period)
+
+    _run(writer, reader, stop, seconds)
+    return write_times, read_times
+
+
+def _run(writer: callable, reader: callable, stop: threading.Event, seconds: float) -> None:
+    threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--rate", type=float, default=30.0, help="Hz per thread, 0 = unpaced")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    shape = (args.height, args.width, 3)
+    period = 1.0 / args.rate if args.rate > 0 else 0.0
+    frame_bytes = int(np.prod(shape))
+    print(f"frame {shape} ({frame_bytes / 1024:.0f} KiB), rate {args.rate or 'unpaced'}")
+
+    write_times, read_times = run_locked(shape, args.seconds, period)
+    print(_summary("locked  update_data", write_times))
+    print(_summary("locked  read_data+copy", read_times))
+    print(f"{'locked  bytes copied/read':<28} {frame_bytes}")
+
+    write_times, read_times = run_latest(shape, args.seconds, period)
+    print(_summary("latest  acquire+publish", write_times))
+    print(_summary("latest  read", read_times))
+    print(f"{'latest  bytes copied/read':<28} 0")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Instrumented sink node of the end-to-end benchmark dataflow.
+
+Subscribes to every node output and, per input, records the receive time, the
+capture-to-receive latency (receive time minus the ``timestamp`` column, for
+outputs that carry one) and the ``seq`` metadata set by the Publisher. A repeated
+or older ``seq`` counts as a duplicate, a gap as captures that were dropped
+before being sent. On ``STOP`` the summary is written as JSON to
+``BENCH_RESULTS`` (default ``sink_results.json``).
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pyarrow as pa
+from dora import Node
+from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InputStats:
+    """Receive statistics of one sink input."""
+
+    received: int = 0
+    duplicates: int = 0
+    dropped: int = 0
+    last_seq: Optional[int] = None
+    first_ns: int = 0
+    last_ns: int = 0
+    latencies_ns: list[int] = field(default_factory=list)
+
+    def record(self: Self, received_ns: int, seq: Optional[int], timestamp: Optional[int]) -> None:
+        if self.received == 0:
+            self.first_ns = received_ns
+        self.received += 1
+        self.last_ns = received_ns
+        if seq is not None:
+            if self.last_seq is not None and seq <= self.last_seq:
+                self.duplicates += 1
+                return
+            if self.last_seq is not None:
+                self.dropped += seq - self.last_seq - 1
+            self.last_seq = seq
+        if timestamp:
+            self.latencies_ns.append(received_ns - timestamp)
+
+    def summary(self: Self) -> dict:
+        elapsed = (self.last_ns - self.first_ns) / 1e9
+        result = {
+            "received": self.received,
+            "fps": (self.received - 1) / elapsed if elapsed > 0 else 0.0,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+            "latency_ms": None,
+        }
+        if self.latencies_ns:
+            latencies = np.asarray(self.latencies_ns, dtype=np.float64) / 1e6
+            result["latency_ms"] = {
+                "p50": float(np.percentile(latencies, 50)),
+                "p90": float(np.percentile(latencies, 90)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max()),
+                "mean": float(latencies.mean()),
+            }
+        return result
+
+
+def _timestamp(value: pa.StructArray) -> Optional[int]:
+    if isinstance(value, pa.StructArray) and value.type.get_field_index("timestamp") >= 0:
+        return value.field("timestamp")[0].as_py()
+    return None
+
+
+def run(node: Node) -> dict[str, InputStats]:
+    """Consume events until ``STOP`` and return the statistics per input."""
+    stats: dict[str, InputStats] = {}
+    for event in node:
+        if event["type"] == "INPUT":
+            received_ns = time.time_ns()
+            seq = (event.get("metadata") or {}).get("seq")
+            stats.setdefault(event["id"], InputStats()).record(
+                received_ns, seq, _timestamp(event["value"]),
+            )
+        elif event["type"] == "STOP":
+            break
+    return stats
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    output_path = os.getenv("BENCH_RESULTS", "sink_results.json")
+    stats = run(Node())
+    with open(output_path, "w") as f:
+        json.dump({input_id: s.summary() for input_id, s in sorted(stats.items())}, f, indent=2)
+    logger.info("sink results written to %s", output_path)
+
+
+if __name__ == "__main__":
+    main()
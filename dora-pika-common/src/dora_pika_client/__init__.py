@@ -0,0 +1,18 @@
+"""Zero-copy decoding of the dora pika node outputs.
+
+```python
+from dora_pika_client import decode
+
+for event in node:
+    if event["type"] == "INPUT":
+        data = decode(event)
+        frame = data["image"]  # read-only (480, 640, 3) uint8 view
+```
+
+`decode_image` also decodes compressed (jpeg/png/webp) image columns.
+"""
+
+from dora_pika_client.decode import decode, tensor
+from dora_pika_client.image import decode_image
+
+__all__ = ["decode", "decode_image", "tensor"]
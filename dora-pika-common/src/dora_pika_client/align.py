@@ -0,0 +1,129 @@
+"""Vectorized depth/color registration for RealSense frames sent with ``ALIGN=none``.
+
+With ``ALIGN=none`` the RealSense node skips ``rs.align`` and publishes the raw
+streams; their calibration comes on ``camera_info`` (see
+`dora_pika_client.camera_info`): ``intrinsics`` (``[fx, fy, ppx, ppy]``) per
+stream, and ``extrinsics`` (depth to color, row-major rotation then translation
+in metres) and ``depth_scale`` on the depth row. These helpers align only the
+frames a consumer actually uses::
+
+    from dora_pika_client import decode
+    from dora_pika_client.align import align_depth_to_color
+
+    image, depth = decode(image_event), decode(depth_event)
+    color_info, depth_info = cache.get(image, "color"), cache.get(depth, "depth")
+    aligned = align_depth_to_color(
+        depth["depth"], depth_info["intrinsics"], color_info["intrinsics"],
+        depth_info["extrinsics"], depth_info["depth_scale"], image["image"].shape[:2],
+    )
+
+Pixels are mapped by their centres with a pinhole model (lens distortion is
+ignored, as for the D400 depth stream), so upsampling to a larger color frame
+leaves small holes that ``rs.align`` would fill.
+"""
+
+from functools import lru_cache
+from typing import Sequence
+
+import numpy as np
+
+
+@lru_cache(maxsize=8)
+def pixel_rays(
+    height: int, width: int, fx: float, fy: float, ppx: float, ppy: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Normalized ``(x, y)`` image coordinates of every pixel, cached per camera."""
+    x = (np.arange(width, dtype=np.float32) - ppx) / fx
+    y = (np.arange(height, dtype=np.float32) - ppy) / fy
+    return np.broadcast_to(x, (height, width)), np.broadcast_to(y[:, None], (height, width))
+
+
+def deproject(depth: np.ndarray, intrinsics: Sequence[float], depth_scale: float) -> np.ndarray:
+    """``(H, W, 3)`` float32 points in metres of a depth frame (0 depth: origin)."""
+    x, y = pixel_rays(*depth.shape, *(float(v) for v in intrinsics))
+    z = depth.astype(np.float32) * np.float32(depth_scale)
+    return np.stack((x * z, y * z, z), axis=-1)
+
+
+def transform(points: np.ndarray, extrinsics: Sequence[float]) -> np.ndarray:
+    """Apply a row-major rotation + translation (12 values) to ``(..., 3)`` points."""
+    extrinsics = np.asarray(extrinsics, dtype=np.float32)
+    return points @ extrinsics[:9].reshape(3, 3).T + extrinsics[9:]
+
+
+def project(points: np.ndarray, intrinsics: Sequence[float]) -> tuple[np.ndarray, np.ndarray]:
+    """Nearest pixel ``(u, v)`` of ``(..., 3)`` points; points behind the camera get -1."""
+    fx, fy, ppx, ppy = (float(v) for v in intrinsics)
+    z = points[..., 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.rint(points[..., 0] / z * fx + ppx)
+        v = np.rint(points[..., 1] / z * fy + ppy)
+    behind = ~(z > 0)
+    u[behind] = -1
+    v[behind] = -1
+    return u.astype(np.int64), v.astype(np.int64)
+
+
+def _depth_in_color(
+    depth: np.ndarray,
+    depth_intrinsics: Sequence[float],
+    color_intrinsics: Sequence[float],
+    extrinsics: Sequence[float],
+    depth_scale: float,
+    color_shape: tuple[int, int],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Valid depth mask, flat color pixel index (-1 outside) and depth of each valid pixel."""
+    valid = depth > 0
+    points = transform(deproject(depth, depth_intrinsics, depth_scale)[valid], extrinsics)
+    u, v = project(points, color_intrinsics)
+    height, width = color_shape
+    inside = (u >= 0) & (u < width) & (v >= 0) & (v < height)
+    return valid, np.where(inside, v * width + u, -1), depth[valid]
+
+
+def align_depth_to_color(
+    depth: np.ndarray,
+    depth_intrinsics: Sequence[float],
+    color_intrinsics: Sequence[float],
+    extrinsics: Sequence[float],
+    depth_scale: float,
+    color_shape: tuple[int, int],
+) -> np.ndarray:
+    """Depth frame resampled into the color camera; the nearest surface wins.
+
+    Values stay in depth units, like ``rs.align``; pixels without depth are 0.
+    """
+    _, index, values = _depth_in_color(
+        depth, depth_intrinsics, color_intrinsics, extrinsics, depth_scale, color_shape,
+    )
+    keep = index >= 0
+    index, values = index[keep], values[keep]
+    # Per color pixel, keep the smallest depth: sort by pixel, then depth.
+    order = np.lexsort((values, index))
+    index, values = index[order], values[order]
+    first = np.ones(len(index), dtype=bool)
+    first[1:] = index[1:] != index[:-1]
+    aligned = np.zeros(color_shape[0] * color_shape[1], dtype=depth.dtype)
+    aligned[index[first]] = values[first]
+    return aligned.reshape(color_shape)
+
+
+def align_color_to_depth(
+    color: np.ndarray,
+    depth: np.ndarray,
+    depth_intrinsics: Sequence[float],
+    color_intrinsics: Sequence[float],
+    extrinsics: Sequence[float],
+    depth_scale: float,
+) -> np.ndarray:
+    """Color frame resampled into the depth camera; pixels without depth are 0."""
+    valid, index, _ = _depth_in_color(
+        depth, depth_intrinsics, color_intrinsics, extrinsics, depth_scale, color.shape[:2],
+    )
+    flat = color.reshape(color.shape[0] * color.shape[1], *color.shape[2:])
+    aligned = np.zeros((*depth.shape, *color.shape[2:]), dtype=color.dtype)
+    pixels = aligned[valid]
+    keep = index >= 0
+    pixels[keep] = flat[index[keep]]
+    aligned[valid] = pixels
+    return aligned
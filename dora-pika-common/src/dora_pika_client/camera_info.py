@@ -0,0 +1,42 @@
+"""Calibration of RealSense frames from the ``camera_info`` side channel.
+
+The RealSense node publishes intrinsics, distortion, depth scale and
+extrinsics on ``camera_info`` (one row per stream) only when they change, plus
+a periodic re-send for late subscribers. Image and depth frames carry just the
+``camera_info`` generation they were captured with. `CameraInfoCache` keeps
+every generation seen and resolves a frame to its calibration::
+
+    from dora_pika_client import decode
+    from dora_pika_client.camera_info import CameraInfoCache
+
+    cache = CameraInfoCache()
+    for event in node:
+        if event["id"] == "camera_info":
+            cache.update(event)
+        elif event["id"] == "depth":
+            depth = decode(event)
+            info = cache.get(depth, "depth")  # None until its camera_info arrived
+"""
+
+from typing import Any, Optional, Union
+
+from typing_extensions import Self
+
+from dora_pika_client.decode import Value
+
+
+class CameraInfoCache:
+    """Calibration rows by ``(serial_number, generation, stream)``."""
+
+    def __init__(self: Self) -> None:
+        self.rows: dict[tuple[str, int, str], dict[str, Any]] = {}
+
+    def update(self: Self, event: Union[dict, Value]) -> None:
+        """Store the rows of a ``camera_info`` event (re-sends overwrite identical rows)."""
+        value = event["value"] if isinstance(event, dict) else event
+        for row in value.to_pylist():
+            self.rows[(row["serial_number"], row["generation"], row["stream"])] = row
+
+    def get(self: Self, frame: dict[str, Any], stream: str) -> Optional[dict[str, Any]]:
+        """Calibration of ``stream`` for a decoded ``frame``, or None if not received yet."""
+        return self.rows.get((frame["serial_number"], frame["camera_info"], stream))
@@ -0,0 +1,108 @@
+"""Turn pika node events into read-only numpy views without copying.
+
+Every pika node sends a one-row record batch; dora delivers it as a
+``pa.StructArray`` in ``event["value"]``. Tensor columns (image, depth, shear,
+mesh, gradients, audio, ...) are fixed-size lists whose values buffer is exposed
+directly as a numpy array. The shape is resolved, in order, from:
+
+1. the ``shape`` argument,
+2. the ``shape`` metadata of the schema field (set in every ``pa_schema.py``),
+3. the ``height``/``width`` columns of the row,
+4. the ``channels`` column (audio: ``(samples, channels)``),
+
+and falls back to a flat 1-D view.
+
+Columns whose field carries ``codec`` metadata (RealSense ``depth`` with
+``DEPTH_CODEC``) are decompressed with `dora_pika_common.depth_codec`; those
+are new arrays rather than views.
+"""
+
+from typing import Any, Optional, Union
+
+import numpy as np
+import pyarrow as pa
+
+from dora_pika_common.depth_codec import decode_depth
+
+Value = Union[pa.StructArray, pa.RecordBatch]
+
+
+def _column(value: Value, name: str) -> pa.Array:
+    if isinstance(value, pa.RecordBatch):
+        return value.column(name)
+    return value.field(name)
+
+
+def _field(value: Value, name: str) -> pa.Field:
+    if isinstance(value, pa.RecordBatch):
+        return value.schema.field(name)
+    return value.type.field(name)
+
+
+def _names(value: Value) -> list[str]:
+    if isinstance(value, pa.RecordBatch):
+        return value.schema.names
+    return [field.name for field in value.type]
+
+
+def _is_tensor(arrow_type: pa.DataType) -> bool:
+    return (
+        pa.types.is_fixed_size_list(arrow_type)
+        or pa.types.is_list(arrow_type)
+        or pa.types.is_large_list(arrow_type)
+    )
+
+
+def _shape(value: Value, name: str, row: int, size: int) -> Optional[tuple[int, ...]]:
+    metadata = _field(value, name).metadata or {}
+    if b"shape" in metadata:
+        return tuple(int(dim) for dim in metadata[b"shape"].decode().split(","))
+    names = _names(value)
+    if "height" in names and "width" in names:
+        height = _column(value, "height")[row].as_py()
+        width = _column(value, "width")[row].as_py()
+        if height and width and size % (height * width) == 0:
+            channels = size // (height * width)
+            return (height, width) if channels == 1 else (height, width, channels)
+    if "channels" in names:
+        channels = _column(value, "channels")[row].as_py()
+        if channels and size % channels == 0:
+            return (size // channels, channels)
+    return None
+
+
+def tensor(
+    value: Value,
+    name: str,
+    row: int = 0,
+    shape: Optional[tuple[int, ...]] = None,
+) -> np.ndarray:
+    """Return column ``name`` of ``row`` as a read-only numpy view.
+
+    Boolean columns are bit-packed in Arrow and are the only ones that get
+    copied; compressed depth is decoded.
+    """
+    values = _column(value, name)[row].values
+    codec = (_field(value, name).metadata or {}).get(b"codec")
+    if codec is not None:
+        data = values.to_numpy(zero_copy_only=True)
+        return decode_depth(data, shape or _shape(value, name, row, 0), codec.decode())
+    if pa.types.is_boolean(values.type):
+        array = values.to_numpy(zero_copy_only=False)
+        array.flags.writeable = False
+    else:
+        array = values.to_numpy(zero_copy_only=True)
+    shape = shape or _shape(value, name, row, len(array))
+    return array.reshape(shape) if shape else array
+
+
+def decode(event: Union[dict, Value], row: int = 0) -> dict[str, Any]:
+    """Decode one row of a pika event into numpy views and Python scalars."""
+    value = event["value"] if isinstance(event, dict) else event
+    decoded = {}
+    for name in _names(value):
+        if _is_tensor(_field(value, name).type):
+            decoded[name] = tensor(value, name, row)
+        else:
+            decoded[name] = _column(value, name)[row].as_py()
+    return decoded
@@ -0,0 +1,78 @@
+"""Zero-copy Arrow construction for large frame outputs.
+
+``pa.record_batch({"image": [frame.ravel()]}, schema=...)`` converts the frame
+through the generic sequence path and copies it at least once. `record_batch`
+here wraps contiguous numpy buffers as `FixedSizeListArray` columns that point at
+the numpy memory directly, so building a batch costs no copy; dora copies the
+data exactly once when it is sent.
+
+The wrapped buffers are the preallocated slots of a `LatestValue`, which act as
+the buffer pool: a slot is not rewritten by the capture thread while the sender
+holds it, and it is recycled once the next frame is read. `reuse_buffer` lets the
+capture code keep writing into the same slot buffers instead of allocating.
+
+Schemas are built from the configured resolution rather than hard-coded:
+`tensor_field` gives a fixed-size list sized and tagged with the frame shape,
+`encoded_field` a variable-length ``uint8`` list for compressed frames (jpeg,
+png, ...) whose size changes every frame. Both are wrapped without copying.
+"""
+
+import math
+from typing import Any
+
+import numpy as np
+import pyarrow as pa
+
+
+def reuse_buffer(buffer: np.ndarray, shape: tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    """Return ``buffer`` if it matches ``shape``/``dtype``, otherwise a new one."""
+    if buffer is not None and buffer.shape == tuple(shape) and buffer.dtype == dtype:
+        return buffer
+    return np.empty(shape, dtype=dtype)
+
+
+# Image encodings that are compressed with cv2.imencode, so have no fixed size.
+COMPRESSED_ENCODINGS = ("jpeg", "jpg", "jpe", "bmp", "webp", "png")
+
+
+def tensor_field(name: str, shape: tuple[int, ...], value_type: pa.DataType) -> pa.Field:
+    """Fixed-size list field holding one ``shape`` tensor, with ``shape`` metadata."""
+    return pa.field(
+        name,
+        pa.list_(value_type, math.prod(shape)),
+        metadata={"shape": ",".join(str(dim) for dim in shape)},
+    )
+
+
+def encoded_field(name: str) -> pa.Field:
+    """Variable-length ``uint8`` list field holding one compressed frame."""
+    return pa.field(name, pa.list_(pa.uint8()))
+
+
+def tensor_column(array: np.ndarray, list_type: pa.DataType) -> pa.Array:
+    """Wrap ``array`` as a one-row list column of ``list_type``.
+
+    ``list_type`` is a fixed-size list (raw tensors) or a variable-size list
+    (compressed frames). No copy is made when ``array`` is C-contiguous and its
+    dtype matches the list value type; boolean arrays are always copied because
+    Arrow bit-packs them.
+    """
+    values = pa.array(np.ascontiguousarray(array).reshape(-1), type=list_type.value_type)
+    if pa.types.is_fixed_size_list(list_type):
+        return pa.FixedSizeListArray.from_arrays(values, type=list_type)
+    offsets = pa.array([0, len(values)], type=pa.int32())
+    return pa.ListArray.from_arrays(offsets, values, type=list_type)
+
+
+def record_batch(columns: dict[str, Any], schema: pa.Schema) -> pa.RecordBatch:
+    """Build a one-row record batch, wrapping numpy columns without copying."""
+    arrays = []
+    for field in schema:
+        value = columns[field.name]
+        if isinstance(value, np.ndarray) and (
+            pa.types.is_fixed_size_list(field.type) or pa.types.is_list(field.type)
+        ):
+            arrays.append(tensor_column(value, field.type))
+        else:
+            arrays.append(pa.array([value], type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
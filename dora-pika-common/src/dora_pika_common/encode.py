@@ -0,0 +1,135 @@
+"""Image compression off the capture thread.
+
+``cv2.imencode`` of a 640x480 frame takes several milliseconds (jpeg) to tens
+of milliseconds (png); run inline it caps the capture rate and delays every
+frame. `EncodePool` runs it on a few worker threads (cv2 releases the GIL while
+encoding) and hands the results back in submission order::
+
+    pool = EncodePool("jpeg", quality=90, workers=2, timer=stage_timer)
+    pool.start()
+    pool.submit(frame, partial(store_image, image_store, ...))
+
+The callback runs as ``callback(encoded, encode_ns)`` on the pool's collector
+thread, so it must be the only writer of the store it publishes into.
+At most ``max_pending`` frames are in flight; while they are, `submit`
+drops the new frame (counted as ``dropped/encode``) rather than blocking the
+capture loop. ``encode_ns`` is the frame's own encode time; it is also
+recorded as stage ``encode``.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+from typing_extensions import Self
+
+from dora_pika_common.timing import NULL_TIMER, StageTimer
+
+logger = logging.getLogger(__name__)
+
+# Default quality per encoding: jpeg/webp quality (0-100), png compression level (0-9).
+DEFAULT_QUALITY = {"jpeg": 95, "jpg": 95, "jpe": 95, "webp": 95, "png": 1, "bmp": 0}
+
+
+def encode_params(encoding: str, quality: Optional[int] = None) -> list[int]:
+    """``cv2.imencode`` parameters setting ``quality`` for ``encoding``."""
+    import cv2
+
+    quality = DEFAULT_QUALITY.get(encoding, 0) if quality is None else quality
+    if encoding in ("jpeg", "jpg", "jpe"):
+        return [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if encoding == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    if encoding == "png":
+        return [cv2.IMWRITE_PNG_COMPRESSION, quality]
+    return []
+
+
+def encode_image(
+    frame: np.ndarray, encoding: str, params: Optional[list[int]] = None,
+) -> tuple[np.ndarray, int]:
+    """Compress ``frame``; return the encoded bytes and the encode time in ns."""
+    import cv2
+
+    start = time.perf_counter_ns()
+    ret, encoded = cv2.imencode("." + encoding, frame, params or [])
+    elapsed = time.perf_counter_ns() - start
+    if not ret:
+        raise ValueError(f"Error encoding image as {encoding}.")
+    return encoded.reshape(-1), elapsed
+
+
+class EncodePool:
+    """Encodes frames on worker threads and delivers them in submission order."""
+
+    def __init__(
+        self: Self,
+        encoding: str,
+        quality: Optional[int] = None,
+        workers: int = 2,
+        max_pending: Optional[int] = None,
+        timer: Optional[StageTimer] = None,
+    ) -> None:
+        self.encoding = encoding
+        self.quality = DEFAULT_QUALITY.get(encoding, 0) if quality is None else quality
+        self.params = encode_params(encoding, self.quality)
+        self.timer = timer or NULL_TIMER
+        self.max_pending = max_pending or 2 * workers
+        self.dropped = 0
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="encode")
+        self._pending: queue.Queue = queue.Queue()  # (Future, callback), None to stop
+        self._slots = threading.Semaphore(self.max_pending)
+        self._collector = threading.Thread(
+            target=self._collect, name="encode-collector", daemon=True,
+        )
+
+    def start(self: Self) -> None:
+        self._collector.start()
+
+    def close(self: Self, timeout: float = 2.0) -> None:
+        """Deliver the frames in flight, then stop the workers."""
+        self._pending.put(None)
+        self._collector.join(timeout=timeout)
+        # Frames the collector did not reach; shutdown(cancel_futures=True) needs Python 3.9.
+        with self._pending.mutex:
+            left = [item[0] for item in self._pending.queue if item is not None]
+        for future in left:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+    def submit(self: Self, frame: np.ndarray, callback: Callable[[np.ndarray, int], None]) -> bool:
+        """Queue ``frame`` for encoding; False if it was dropped.
+
+        ``frame`` must stay untouched until ``callback`` has run.
+        """
+        if not self._slots.acquire(blocking=False):
+            self.dropped += 1
+            self.timer.count("dropped/encode")
+            return False
+        self._pending.put((self._executor.submit(self._encode, frame), callback))
+        return True
+
+    def _encode(self: Self, frame: np.ndarray) -> tuple[np.ndarray, int]:
+        encoded, elapsed = encode_image(frame, self.encoding, self.params)
+        self.timer.record("encode", elapsed / 1e9)
+        return encoded, elapsed
+
+    def _collect(self: Self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                break
+            future, callback = item
+            try:
+                if future.cancelled():  # by close
+                    continue
+                encoded, elapsed = future.result()
+                callback(encoded, elapsed)
+            except Exception as e:
+                logger.error("Image encoding failed: %s", e)
+            finally:
+                self._slots.release()
@@ -0,0 +1,104 @@
+"""Frame preprocessing into preallocated buffers.
+
+``cv2.flip(frame, code)`` and ``cv2.cvtColor(frame, code)`` return a new
+full-frame array on every call; chained in a capture loop, that is several
+allocations per frame at 30 Hz per camera. The helpers here write into a
+destination the caller recycles instead: a `LatestValue` slot, or a
+`FramePool` buffer for frames handed to another thread (the encode pool). The
+source is only read, so it can be an SDK buffer such as
+``np.asanyarray(frame.get_data())``::
+
+    image = image_store.acquire()
+    image.frame = transform_into(color, image.frame, flip, cv2.COLOR_RGB2BGR)
+    image_store.publish()
+"""
+
+import threading
+from typing import Optional
+
+import numpy as np
+from typing_extensions import Self
+
+from dora_pika_common.arrow import reuse_buffer
+
+# FLIP environment values -> cv2.flip codes
+FLIP_CODES = {"VERTICAL": 0, "HORIZONTAL": 1, "BOTH": -1}
+
+
+def transform_into(
+    src: np.ndarray,
+    dst: Optional[np.ndarray],
+    flip: str = "",
+    conversion: Optional[int] = None,
+) -> np.ndarray:
+    """Write ``src`` flipped by ``flip`` and converted by ``conversion`` into ``dst``.
+
+    ``conversion`` is a ``cv2.COLOR_*`` code that keeps the channel count;
+    ``dst`` is replaced by a new buffer only if its shape or dtype differ. A
+    ``dst`` that is ``src`` is transformed in place. Returns the buffer written.
+    """
+    import cv2
+
+    dst = reuse_buffer(dst, src.shape, src.dtype)
+    code = FLIP_CODES.get(flip)
+    if code is not None:
+        cv2.flip(src, code, dst=dst)
+        if conversion is not None:
+            cv2.cvtColor(dst, conversion, dst=dst)
+    elif conversion is not None:
+        cv2.cvtColor(src, conversion, dst=dst)
+    elif dst is not src:
+        np.copyto(dst, src)
+    return dst
+
+
+def clamp_into(src: np.ndarray, dst: Optional[np.ndarray], max_value: int) -> np.ndarray:
+    """Copy ``src`` into ``dst`` with values above ``max_value`` zeroed (0: no clamp).
+
+    One pass and no temporary mask (``cv2.threshold``, 8/16-bit frames).
+    """
+    import cv2
+
+    dst = reuse_buffer(dst, src.shape, src.dtype)
+    if max_value:
+        cv2.threshold(src, max_value, 0, cv2.THRESH_TOZERO_INV, dst=dst)
+    elif dst is not src:
+        np.copyto(dst, src)
+    return dst
+
+
+class FramePool:
+    """Recycled frame buffers for frames that outlive the capture iteration.
+
+    `acquire` hands out a free buffer of ``shape``/``dtype`` and `release` takes
+    it back; when all are in use (or the frame size changed) a new buffer is
+    allocated and counted in `allocated`. Size the pool to the number of frames
+    that can be in flight, e.g. the ``max_pending`` of an `EncodePool` plus one.
+    """
+
+    def __init__(self: Self, shape: tuple[int, ...], dtype: np.dtype, size: int = 4) -> None:
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.size = size
+        self.allocated = 0
+        self._lock = threading.Lock()
+        self._free = [np.empty(self.shape, self.dtype) for _ in range(size)]
+
+    def acquire(self: Self, shape: Optional[tuple[int, ...]] = None) -> np.ndarray:
+        """A buffer of ``shape`` (default: the pool's), recycled if possible."""
+        shape = self.shape if shape is None else tuple(shape)
+        with self._lock:
+            if shape != self.shape:
+                # New frame size: drop the old buffers, release() refills with new ones.
+                self.shape = shape
+                self._free.clear()
+            if self._free:
+                return self._free.pop()
+            self.allocated += 1
+        return np.empty(shape, self.dtype)
+
+    def release(self: Self, buffer: np.ndarray) -> None:
+        """Return ``buffer`` to the pool once nothing reads it anymore."""
+        with self._lock:
+            if buffer.shape == self.shape and len(self._free) < self.size:
+                self._free.append(buffer)
@@ -0,0 +1,90 @@
+"""Lock-free latest-value store shared by the pika nodes.
+
+Every node has one capture thread producing frames and one dora thread
+publishing them. `LatestValue` replaces the per-node locked dataclasses with a
+triple buffer: the capture thread fills a free preallocated slot and publishes
+it, the dora thread reads the most recent slot in place. Neither side takes a
+lock and the reader never copies.
+"""
+
+import itertools
+import threading
+from typing import Callable, Generic, Optional, TypeVar
+
+from typing_extensions import Self
+
+T = TypeVar("T")
+
+_NO_SLOT = -1
+
+
+class LatestValue(Generic[T]):
+    """Single-writer / single-reader triple buffer holding the latest value.
+
+    The writer calls `acquire()` to get a slot that neither the reader nor the
+    latest publish is using, fills it in place and calls `publish()`. The reader
+    calls `read()` and gets the newest published slot; the slot stays pinned and
+    untouched by the writer until the reader's next `read()`.
+
+    Synchronisation relies only on atomic attribute loads/stores under the GIL:
+    the reader pins a slot and then re-checks that it is still the latest one,
+    so a slot the writer was about to overwrite is never handed out.
+
+    If ``notify`` is set, every publish also sets that event so a waiting
+    sender can wake up immediately.
+    """
+
+    def __init__(self: Self, factory: Callable[[], T], slots: int = 3) -> None:
+        if slots < 3:
+            raise ValueError("LatestValue needs at least 3 slots.")
+        self._slots = [factory() for _ in range(slots)]
+        self._seqs = [0] * slots
+        self._counter = itertools.count(1)
+        self._latest = _NO_SLOT
+        self._pinned = _NO_SLOT
+        self._writing = _NO_SLOT
+        self.seq = 0
+        self.notify: Optional[threading.Event] = None
+
+    def acquire(self: Self) -> T:
+        """Return a free slot for the writer to fill."""
+        latest = self._latest
+        pinned = self._pinned
+        for index in range(len(self._slots)):
+            if index not in (latest, pinned):
+                self._writing = index
+                return self._slots[index]
+        raise RuntimeError("No free slot in LatestValue.")  # pragma: no cover
+
+    def publish(self: Self) -> int:
+        """Make the acquired slot the latest value and return its sequence number."""
+        index = self._writing
+        if index == _NO_SLOT:
+            raise RuntimeError("publish() called without acquire().")
+        seq = next(self._counter)
+        self._seqs[index] = seq
+        self._writing = _NO_SLOT
+        self._latest = index
+        self.seq = seq
+        if self.notify is not None:
+            self.notify.set()
+        return seq
+
+    def read(self: Self) -> tuple[int, Optional[T]]:
+        """Pin and return the latest slot as ``(seq, value)``.
+
+        ``seq`` is 0 and ``value`` is None until the first publish. The value is
+        shared, not copied: it is valid until the next call to `read()`.
+        """
+        while True:
+            index = self._latest
+            if index == _NO_SLOT:
+                return 0, None
+            self._pinned = index
+            if self._latest == index:
+                return self._seqs[index], self._slots[index]
+
+    @property
+    def has_data(self: Self) -> bool:
+        """Whether anything has been published yet."""
+        return self._latest != _NO_SLOT
@@ -0,0 +1,124 @@
+"""Send loop shared by the pika nodes.
+
+`Publisher` drives a node's dora thread in one of two modes, chosen with the
+``PUBLISH_MODE`` environment variable:
+
+- ``tick`` (default): publish when a ``tick`` input (usually
+  ``dora/timer/millis/33``) arrives, as the nodes always did.
+- ``event``: publish as soon as the capture thread publishes into one of the
+  watched `LatestValue` stores; ``tick`` inputs are ignored.
+
+In both modes every output carries a per-output sequence number in its metadata
+(``{"seq": n}``) and a value is never sent twice. Values replaced in their store
+before they could be sent show up as gaps in ``seq``; `Publisher.overwritten`
+counts them per output. With a `StageTimer`, every send
+is timed as stage ``send/<output>`` and counted, and the timer reports from the
+send loop.
+
+In both modes the dora events other than ``tick`` inputs, ``ERROR`` included,
+are yielded to the caller, and iteration ends when the event stream closes,
+with or without a ``STOP``.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Iterator, Optional, TypeVar
+
+from typing_extensions import Self
+
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.timing import NULL_TIMER, StageTimer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+PUBLISH_MODES = ("tick", "event")
+
+TICK_EVENT = {"type": "INPUT", "id": "tick", "value": None, "metadata": {}}
+
+# node.next timeout between captures in event mode (s). ``next`` returns None
+# right away once the event stream has closed, and only after the timeout when
+# nothing is pending, which a zero timeout could not tell apart.
+EVENT_PROBE = 0.001
+
+
+class Publisher:
+    """Yields send opportunities for a node and keeps per-output sequence numbers."""
+
+    def __init__(
+        self: Self,
+        node,  # noqa: ANN001
+        stores: dict[str, LatestValue],
+        mode: Optional[str] = None,
+        poll_interval: float = 0.005,
+        timer: Optional[StageTimer] = None,
+    ) -> None:
+        mode = (mode or os.getenv("PUBLISH_MODE", "tick")).lower()
+        if mode not in PUBLISH_MODES:
+            raise ValueError(f"PUBLISH_MODE must be one of {PUBLISH_MODES}, got {mode!r}.")
+        self.node = node
+        self.mode = mode
+        self.stores = stores
+        self.poll_interval = poll_interval
+        self.timer = timer or NULL_TIMER
+        self.wakeup = threading.Event()
+        self._send_stages = {output_id: f"send/{output_id}" for output_id in stores}
+        self._sent = dict.fromkeys(stores, 0)
+        self._overwritten_names = {output_id: f"overwritten/{output_id}" for output_id in stores}
+        self.overwritten = dict.fromkeys(stores, 0)
+        if mode == "event":
+            for store in stores.values():
+                store.notify = self.wakeup
+        logger.info("Publishing %s in %s mode", ", ".join(stores), mode)
+
+    def __iter__(self: Self) -> Iterator[dict]:
+        """Yield dora events; in event mode a synthetic tick stands for new data."""
+        if self.mode == "tick":
+            for event in self.node:
+                yield event
+                self.timer.report(self.node)
+            return
+
+        while True:
+            if self.wakeup.wait(self.poll_interval):
+                self.wakeup.clear()
+                yield TICK_EVENT
+                self.timer.report(self.node)
+            # Keep serving STOP and other inputs between captures.
+            while True:
+                started = time.perf_counter()
+                event = self.node.next(timeout=EVENT_PROBE)
+                if event is None:
+                    if time.perf_counter() - started < EVENT_PROBE / 2:
+                        logger.warning("Event stream closed without STOP")
+                        return
+                    break
+                if not (event["type"] == "INPUT" and event["id"] == "tick"):
+                    yield event
+                if event["type"] == "ERROR":
+                    break
+
+    def read(self: Self, output_id: str) -> tuple[int, Optional[T]]:
+        """Return ``(seq, value)`` for ``output_id`` if it has not been sent yet.
+
+        ``value`` is None when nothing new was captured since the last send.
+        """
+        seq, value = self.stores[output_id].read()
+        if value is None or seq <= self._sent[output_id]:
+            return seq, None
+        return seq, value
+
+    def send(self: Self, output_id: str, data, seq: int) -> None:  # noqa: ANN001
+        """Send ``data`` on ``output_id`` tagged with its sequence number."""
+        with self.timer.stage(self._send_stages[output_id]):
+            self.node.send_output(output_id, data, {"seq": seq})
+        previous = self._sent[output_id]
+        if previous and seq > previous + 1:
+            # Published but replaced by a newer value before this send.
+            self.overwritten[output_id] += seq - previous - 1
+            self.timer.count(self._overwritten_names[output_id], seq - previous - 1)
+        self._sent[output_id] = seq
+        self.timer.count(self._send_stages[output_id])
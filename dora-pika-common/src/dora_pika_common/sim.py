@@ -0,0 +1,101 @@
+"""Deterministic, hardware-free data sources for the simulated node backends.
+
+Every node can run with ``BACKEND=sim``. Its ``sim`` module mimics the subset of
+the device SDK the node uses and draws data from the helpers below, so the full
+capture-to-publish path runs on a CI box at the device's frame rate, resolution
+and dtype.
+
+Set ``SIM_REPLAY`` to a ``.npy`` file of shape ``(N, *frame_shape)`` to replay
+recorded frames instead of the synthetic pattern; the file is memory-mapped.
+"""
+
+import os
+import time
+from typing import Optional
+
+import numpy as np
+from typing_extensions import Self
+
+
+class Pacer:
+    """Sleeps so that successive `wait()` calls return at ``rate`` Hz."""
+
+    def __init__(self: Self, rate: float) -> None:
+        self.period = 1.0 / rate if rate > 0 else 0.0
+        self._next: Optional[float] = None
+        self.count = 0
+
+    def wait(self: Self) -> int:
+        """Block until the next period and return its index."""
+        now = time.perf_counter()
+        if self._next is None:
+            self._next = now
+        delay = self._next - now
+        if delay > 0:
+            time.sleep(delay)
+        elif -delay > self.period:
+            # Fell behind by more than one period: resync instead of bursting.
+            self._next = now
+        self._next += self.period
+        index = self.count
+        self.count += 1
+        return index
+
+
+def synthetic_frames(
+    shape: tuple[int, ...],
+    dtype: np.dtype,
+    count: int = 10,
+    low: float = 0,
+    high: float = 255,
+) -> np.ndarray:
+    """Return ``count`` deterministic frames of a moving diagonal gradient.
+
+    ``shape`` is ``(height, width, *channels)``; the result has shape
+    ``(count, *shape)``, frame ``i`` is shifted by ``i / count`` of a period so
+    consecutive frames differ, and values span ``[low, high)``.
+    """
+    height, width, *channels = shape
+    rows = np.arange(height, dtype=np.float32)[:, None] / height
+    cols = np.arange(width, dtype=np.float32)[None, :] / width
+    grid = ((rows + cols) / 2.0).reshape(height, width, *([1] * len(channels)))
+    offsets = np.arange(int(np.prod(channels)), dtype=np.float32) / 3.0
+    offsets = offsets.reshape(1, 1, *channels) if channels else 0.0
+    frames = np.empty((count, *shape), dtype=dtype)
+    for index in range(count):
+        phase = (grid + offsets + index / count) % 1.0
+        frames[index] = low + phase * (high - low)
+    frames.flags.writeable = False
+    return frames
+
+
+class FrameSource:
+    """Hands out frames at ``fps`` from a synthetic ring or a replay file."""
+
+    def __init__(
+        self: Self,
+        shape: tuple[int, ...],
+        dtype: np.dtype,
+        fps: float,
+        replay_path: Optional[str] = None,
+        count: int = 10,
+        low: float = 0,
+        high: float = 255,
+    ) -> None:
+        replay_path = replay_path if replay_path is not None else os.getenv("SIM_REPLAY")
+        if replay_path:
+            self.frames = np.load(replay_path, mmap_mode="r")
+        else:
+            self.frames = synthetic_frames(shape, dtype, count, low, high)
+        self.pacer = Pacer(fps)
+        self.index = -1
+
+    @property
+    def shape(self: Self) -> tuple[int, ...]:
+        """Shape of one frame."""
+        return self.frames.shape[1:]
+
+    def read(self: Self) -> np.ndarray:
+        """Wait for the next frame period and return a read-only frame."""
+        self.index = self.pacer.wait()
+        return self.frames[self.index % len(self.frames)]
@@ -0,0 +1,83 @@
+"""Stand-in for ``dora.Node`` used by the tests and benchmarks.
+
+`FakeNode` replays a scripted event list, then either generates ``tick`` inputs
+at a fixed period followed by ``STOP`` (tick mode) or answers ``next(timeout)``
+polls with ``STOP`` once ``stop_after`` seconds have passed (event mode). Like
+dora, a ``next(timeout)`` poll with nothing pending returns None after the
+timeout, or at once when the stream is ``closed`` (the daemon went away without
+``STOP``). It records everything sent through ``send_output``, so a node's send
+loop can run outside a dora dataflow.
+"""
+
+import time
+from typing import Iterator, Optional
+
+from typing_extensions import Self
+
+from dora_pika_common.latest import LatestValue
+
+
+class FakeNode:
+    """Replays events and records outputs like ``dora.Node``."""
+
+    def __init__(
+        self: Self,
+        events: Optional[list[dict]] = None,
+        ticks: int = 0,
+        period: float = 1 / 30,
+        stop_after: Optional[float] = None,
+        closed: bool = False,
+    ) -> None:
+        self.events = list(events or [])
+        self.closed = closed
+        self._deadline = time.perf_counter() + stop_after if stop_after is not None else None
+        self.ticks = ticks
+        self.period = period
+        self.sent: list[tuple[str, object, dict]] = []
+        self._generated = self._generate()
+
+    def _generate(self: Self) -> Iterator[dict]:
+        yield from self._scripted()
+        for _ in range(self.ticks):
+            time.sleep(self.period)
+            yield {"type": "INPUT", "id": "tick", "value": None, "metadata": {}}
+        if self.ticks:
+            yield {"type": "STOP"}
+
+    def _scripted(self: Self) -> Iterator[dict]:
+        while self.events:
+            yield self.events.pop(0)
+
+    def __iter__(self: Self) -> Iterator[dict]:
+        yield from self._generated
+
+    def next(self: Self, timeout: Optional[float] = None) -> Optional[dict]:
+        if self.events:
+            return self.events.pop(0)
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            self._deadline = None
+            return {"type": "STOP"}
+        if timeout is not None:
+            if not self.closed:
+                time.sleep(timeout)
+            return None
+        return next(self._generated, None)
+
+    def send_output(
+        self: Self, output_id: str, data: object, metadata: Optional[dict] = None,
+    ) -> None:
+        self.sent.append((output_id, data, metadata or {}))
+
+    def outputs(self: Self, output_id: str) -> list[tuple[object, dict]]:
+        """Return ``(data, metadata)`` of everything sent on ``output_id``."""
+        return [(data, metadata) for sent_id, data, metadata in self.sent if sent_id == output_id]
+
+
+def wait_for_data(*stores: LatestValue, timeout: float = 5.0) -> bool:
+    """Wait until every store has a published value; False on timeout."""
+    deadline = time.perf_counter() + timeout
+    while not all(store.has_data for store in stores):
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
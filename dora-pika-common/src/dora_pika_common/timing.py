@@ -0,0 +1,263 @@
+"""Opt-in per-stage timing for the pika nodes.
+
+A node creates one `StageTimer` and wraps its processing steps::
+
+    stage_timer = StageTimer("pyrealsense")
+
+    with stage_timer.stage("align"):
+        aligned_frames = align.process(frames)
+    stage_timer.count("captured")
+
+Timing is off unless ``STAGE_TIMING=1``; disabled, `stage` returns a shared
+no-op context manager and `count` returns immediately, so the calls can stay in
+the hot loops. Enabled, every stage keeps a rolling window of the last
+``TIMING_WINDOW`` (1024) durations for percentiles plus cumulative Prometheus
+histogram buckets, and `report` (called by the `Publisher` send loop) emits a
+snapshot every ``TIMING_INTERVAL`` seconds (1.0):
+
+- on the dora output named by ``TIMING_OUTPUT``, one row per stage/counter
+  (`pa_timing_schema`); the output must be declared in the dataflow,
+- to the Prometheus textfile ``TIMING_PROMETHEUS`` (for node_exporter's
+  textfile collector), replaced atomically.
+
+``kill -USR1 <pid>`` logs the current snapshot once `install_signal_handler`
+has been called from the main thread.
+"""
+
+import bisect
+import contextlib
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+import pyarrow as pa
+from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds, 50 us to 1 s.
+BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+pa_timing_schema = pa.schema([
+    pa.field("node", pa.string()),
+    pa.field("name", pa.string()),
+    pa.field("kind", pa.string()),  # stage | counter
+    pa.field("count", pa.int64()),
+    pa.field("mean_ms", pa.float64()),
+    pa.field("p50_ms", pa.float64()),
+    pa.field("p90_ms", pa.float64()),
+    pa.field("p99_ms", pa.float64()),
+    pa.field("max_ms", pa.float64()),
+])
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def _env_enabled() -> bool:
+    return os.getenv("STAGE_TIMING", "").lower() in ("1", "true", "yes", "on")
+
+
+class StageStats:
+    """Rolling window and cumulative histogram of one stage's durations."""
+
+    def __init__(self: Self, window: int) -> None:
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def record(self: Self, seconds: float) -> None:
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def summary(self: Self) -> dict:
+        recent = self.samples[:min(self.count, len(self.samples))] * 1e3
+        if not len(recent):
+            return {"count": 0}
+        p50, p90, p99 = np.percentile(recent, (50, 90, 99))
+        return {
+            "count": self.count,
+            "mean_ms": float(recent.mean()),
+            "p50_ms": float(p50),
+            "p90_ms": float(p90),
+            "p99_ms": float(p99),
+            "max_ms": float(recent.max()),
+        }
+
+
+class _Stage:
+    """Context manager timing one pass through a stage."""
+
+    __slots__ = ("_name", "_start", "_timer")
+
+    def __init__(self: Self, timer: "StageTimer", name: str) -> None:
+        self._timer = timer
+        self._name = name
+        self._start = 0
+
+    def __enter__(self: Self) -> Self:
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self: Self, *exc_info: object) -> None:
+        self._timer.record(self._name, (time.perf_counter_ns() - self._start) / 1e9)
+
+
+class StageTimer:
+    """Per-stage durations and frame counters of one node."""
+
+    def __init__(
+        self: Self,
+        node_name: str,
+        enabled: Optional[bool] = None,
+        window: Optional[int] = None,
+        interval: Optional[float] = None,
+        output_id: Optional[str] = None,
+        prometheus_path: Optional[str] = None,
+    ) -> None:
+        self.node_name = node_name
+        self.enabled = _env_enabled() if enabled is None else enabled
+        self.window = window or int(os.getenv("TIMING_WINDOW", "1024"))
+        self.interval = interval if interval is not None else float(
+            os.getenv("TIMING_INTERVAL", "1.0"),
+        )
+        self.output_id = output_id if output_id is not None else os.getenv("TIMING_OUTPUT", "")
+        self.prometheus_path = (
+            prometheus_path if prometheus_path is not None else os.getenv("TIMING_PROMETHEUS", "")
+        )
+        self.stages: dict[str, StageStats] = {}
+        self.counters: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._next_report = time.perf_counter() + self.interval
+
+    def stage(self: Self, name: str) -> contextlib.AbstractContextManager:
+        """Time the ``with`` block as one pass through stage ``name``."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self: Self, name: str, seconds: float) -> None:
+        """Add one duration to stage ``name``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats(self.window)
+            stats.record(seconds)
+
+    def count(self: Self, name: str, n: int = 1) -> None:
+        """Increment frame counter ``name``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self: Self) -> dict:
+        """Return the stage summaries and counters."""
+        with self._lock:
+            return {
+                "node": self.node_name,
+                "stages": {name: stats.summary() for name, stats in self.stages.items()},
+                "counters": dict(self.counters),
+            }
+
+    def format_snapshot(self: Self) -> str:
+        """Human-readable snapshot, one line per stage and counter."""
+        snapshot = self.snapshot()
+        lines = [f"stage timing of {self.node_name}:"]
+        for name, stats in snapshot["stages"].items():
+            if stats["count"]:
+                lines.append(
+                    f"  {name:<24} n={stats['count']:<8} mean={stats['mean_ms']:.3f} ms "
+                    f"p50={stats['p50_ms']:.3f} ms p99={stats['p99_ms']:.3f} ms "
+                    f"max={stats['max_ms']:.3f} ms",
+                )
+        lines.extend(f"  {name:<24} {count}" for name, count in snapshot["counters"].items())
+        return "\n".join(lines)
+
+    def record_batch(self: Self) -> pa.RecordBatch:
+        """Snapshot as a `pa_timing_schema` batch, one row per stage and counter."""
+        snapshot = self.snapshot()
+        rows = [
+            {"node": self.node_name, "name": name, "kind": "stage", **stats}
+            for name, stats in snapshot["stages"].items()
+        ]
+        rows += [
+            {"node": self.node_name, "name": name, "kind": "counter", "count": count}
+            for name, count in snapshot["counters"].items()
+        ]
+        return pa.RecordBatch.from_pylist(rows, schema=pa_timing_schema)
+
+    def prometheus_text(self: Self) -> str:
+        """Snapshot in the Prometheus text exposition format."""
+        lines = [
+            "# HELP pika_stage_seconds Time spent in a node processing stage.",
+            "# TYPE pika_stage_seconds histogram",
+        ]
+        with self._lock:
+            stages = {name: (list(s.buckets), s.total, s.count) for name, s in self.stages.items()}
+            counters = dict(self.counters)
+        for name, (buckets, total, count) in stages.items():
+            labels = f'node="{self.node_name}",stage="{name}"'
+            cumulative = np.cumsum(buckets)
+            for bound, value in zip((*BUCKETS, "+Inf"), cumulative):
+                lines.append(f'pika_stage_seconds_bucket{{{labels},le="{bound}"}} {value}')
+            lines.append(f"pika_stage_seconds_sum{{{labels}}} {total}")
+            lines.append(f"pika_stage_seconds_count{{{labels}}} {count}")
+        lines += [
+            "# HELP pika_frames_total Frames counted by a node.",
+            "# TYPE pika_frames_total counter",
+        ]
+        lines.extend(
+            f'pika_frames_total{{node="{self.node_name}",counter="{name}"}} {count}'
+            for name, count in counters.items()
+        )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self: Self, path: str) -> None:
+        """Write `prometheus_text` to ``path`` atomically."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def report(self: Self, node) -> None:  # noqa: ANN001
+        """Emit a snapshot on the timing output / textfile once per interval.
+
+        Must be called from the thread that owns ``node``.
+        """
+        if not self.enabled or time.perf_counter() < self._next_report:
+            return
+        self._next_report = time.perf_counter() + self.interval
+        try:
+            if self.output_id:
+                node.send_output(self.output_id, self.record_batch())
+            if self.prometheus_path:
+                self.write_prometheus(self.prometheus_path)
+        except Exception as e:
+            logger.warning("Stage timing report failed: %s", e)
+
+    def install_signal_handler(self: Self) -> None:
+        """Log a snapshot on SIGUSR1; call from the main thread."""
+        if not hasattr(signal, "SIGUSR1"):
+            return
+        signal.signal(signal.SIGUSR1, self._on_signal)
+
+    def _on_signal(self: Self, _signum: int, _frame: object) -> None:
+        if self.enabled:
+            logger.info(self.format_snapshot())
+        else:
+            logger.info("stage timing of %s is disabled (STAGE_TIMING=1)", self.node_name)
+
+
+NULL_TIMER = StageTimer("", enabled=False)
@@ -0,0 +1,51 @@
+"""Test module for dora_pika_client.align."""
+
+import numpy as np
+
+from dora_pika_client.align import align_color_to_depth, align_depth_to_color, deproject
+
+INTRINSICS = [100.0, 100.0, 7.5, 5.5]  # fx, fy, ppx, ppy of a 16 x 12 frame
+IDENTITY = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0]
+# 1 cm along x at 1 m and fx = 100 moves every pixel one column right.
+SHIFT = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.01, 0.0, 0.0]
+
+
+def _depth() -> np.ndarray:
+    depth = np.full((12, 16), 1000, dtype=np.uint16)
+    depth[3, 4] = 0  # hole
+    return depth
+
+
+def test_deproject_center_ray() -> None:
+    points = deproject(_depth(), INTRINSICS, 0.001)
+    np.testing.assert_allclose(points[5, 7], [-0.005, -0.005, 1.0], atol=1e-6)
+    np.testing.assert_array_equal(points[3, 4], [0.0, 0.0, 0.0])
+
+
+def test_identity_alignment_is_a_copy() -> None:
+    depth = _depth()
+    aligned = align_depth_to_color(depth, INTRINSICS, INTRINSICS, IDENTITY, 0.001, (12, 16))
+    np.testing.assert_array_equal(aligned, depth)
+
+
+def test_translation_shifts_and_nearest_surface_wins() -> None:
+    depth = _depth()
+    depth[8, 10] = 500  # at 0.5 m the same baseline moves it two columns, onto (8, 12)
+    aligned = align_depth_to_color(depth, INTRINSICS, INTRINSICS, SHIFT, 0.001, (12, 16))
+    np.testing.assert_array_equal(aligned[:, 0], 0)
+    assert aligned[3, 5] == 0
+    assert aligned[8, 12] == 500  # occludes the 1 m pixel (8, 11)
+    assert aligned[8, 11] == 0  # (8, 10) moved away
+    expected = depth[:, :-1].copy()
+    expected[8, 10:12] = (0, 500)
+    np.testing.assert_array_equal(aligned[:, 1:], expected)
+
+
+def test_color_to_depth_gathers_shifted_pixels() -> None:
+    color = np.arange(12 * 16 * 3, dtype=np.uint8).reshape(12, 16, 3)
+    depth = _depth()
+    aligned = align_color_to_depth(color, depth, INTRINSICS, INTRINSICS, SHIFT, 0.001)
+    valid = depth[:, :-1] > 0
+    np.testing.assert_array_equal(aligned[:, :-1][valid], color[:, 1:][valid])
+    np.testing.assert_array_equal(aligned[3, 4], 0)
+    np.testing.assert_array_equal(aligned[:, -1], 0)  # projects outside the color frame
@@ -0,0 +1,55 @@
+"""Test module for dora_pika_common.arrow."""
+
+import numpy as np
+import pyarrow as pa
+
+from dora_pika_common.arrow import encoded_field, record_batch, reuse_buffer, tensor_field
+
+IMAGE_SCHEMA = pa.schema([
+  pa.field("camera_id", pa.string()),
+  pa.field("image", pa.list_(pa.uint8(), 4 * 5 * 3)),
+  pa.field("timestamp", pa.int64()),
+])
+
+
+def test_record_batch_does_not_copy_frames() -> None:
+    """The image column points at the numpy buffer."""
+    frame = np.arange(4 * 5 * 3, dtype=np.uint8).reshape(4, 5, 3)
+    batch = record_batch({"camera_id": "cam", "image": frame, "timestamp": 7}, IMAGE_SCHEMA)
+    assert batch.schema == IMAGE_SCHEMA
+    assert batch.column("image").values.buffers()[1].address == frame.ctypes.data
+    assert batch.to_pylist()[0]["image"] == frame.ravel().tolist()
+    assert batch.column("timestamp")[0].as_py() == 7
+
+
+def test_record_batch_matches_generic_path() -> None:
+    """Same result as building the batch from Python lists."""
+    frame = np.random.default_rng(0).integers(0, 255, (4, 5, 3), dtype=np.uint8)
+    expected = pa.record_batch(
+        {"camera_id": ["cam"], "image": [frame.ravel()], "timestamp": [1]},
+        schema=IMAGE_SCHEMA,
+    )
+    assert record_batch({"camera_id": "cam", "image": frame, "timestamp": 1}, IMAGE_SCHEMA).equals(
+        expected,
+    )
+
+
+def test_reuse_buffer() -> None:
+    """Matching buffers are reused, mismatching ones replaced."""
+    buffer = np.zeros((2, 3), dtype=np.float32)
+    assert reuse_buffer(buffer, (2, 3), np.float32) is buffer
+    assert reuse_buffer(buffer, (3, 2), np.float32).shape == (3, 2)
+    assert reuse_buffer(None, (1,), np.uint8).dtype == np.uint8
+
+
+def test_schema_fields_follow_the_shape() -> None:
+    """Fields are sized from the shape and wrap frames without copying."""
+    field = tensor_field("image", (720, 1280, 3), pa.uint8())
+    assert field.type == pa.list_(pa.uint8(), 720 * 1280 * 3)
+    assert field.metadata == {b"shape": b"720,1280,3"}
+
+    schema = pa.schema([encoded_field("image"), pa.field("timestamp", pa.int64())])
+    encoded = np.arange(37, dtype=np.uint8).reshape(37, 1)  # as returned by cv2.imencode
+    batch = record_batch({"image": encoded, "timestamp": 1}, schema)
+    assert batch.column("image").values.buffers()[1].address == encoded.ctypes.data
+    assert batch.to_pylist()[0]["image"] == list(range(37))
@@ -0,0 +1,103 @@
+"""Test module for dora_pika_client."""
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from dora_pika_client import decode, decode_image, tensor
+from dora_pika_common.arrow import encoded_field, record_batch, tensor_field
+
+SCHEMA = pa.schema([
+  pa.field("image", pa.list_(pa.uint8(), 4 * 5 * 3)),
+  pa.field("depth", pa.list_(pa.float32(), 4 * 5), metadata={"shape": "4,5"}),
+  pa.field("mask", pa.list_(pa.bool_(), 4 * 5), metadata={"shape": "4,5"}),
+  pa.field("timestamp", pa.int64()),
+  pa.field("width", pa.int16()),
+  pa.field("height", pa.int16()),
+])
+
+
+def _event() -> tuple[dict, dict]:
+    rng = np.random.default_rng(0)
+    columns = {
+        "image": rng.integers(0, 255, (4, 5, 3), dtype=np.uint8),
+        "depth": rng.random((4, 5), dtype=np.float32),
+        "mask": rng.random((4, 5)) > 0.5,
+        "timestamp": 42,
+        "width": 5,
+        "height": 4,
+    }
+    batch = record_batch(columns, SCHEMA)
+    # dora delivers the batch as a StructArray
+    return {"type": "INPUT", "id": "x", "value": pa.StructArray.from_arrays(
+        batch.columns, fields=list(SCHEMA),
+    )}, columns
+
+
+def test_decode_shapes_and_values() -> None:
+    """Shapes come from field metadata or the width/height columns."""
+    event, columns = _event()
+    data = decode(event)
+    assert data["timestamp"] == 42
+    for name in ("image", "depth", "mask"):
+        np.testing.assert_array_equal(data[name], columns[name])
+
+
+def test_views_are_zero_copy_and_read_only() -> None:
+    """Numeric tensors point at the Arrow buffer and cannot be written."""
+    event, _ = _event()
+    depth = tensor(event["value"], "depth")
+    buffer = event["value"].field("depth").flatten().buffers()[1]
+    assert depth.ctypes.data == buffer.address
+    with pytest.raises(ValueError):
+        depth[0, 0] = 1.0
+
+
+def test_audio_shape_from_channels() -> None:
+    """Audio chunks are shaped (samples, channels)."""
+    schema = pa.schema([
+      pa.field("audio_data", pa.list_(pa.int16(), 8)),
+      pa.field("channels", pa.int32()),
+    ])
+    batch = record_batch({"audio_data": np.arange(8, dtype=np.int16), "channels": 2}, schema)
+    assert tensor(batch, "audio_data").shape == (4, 2)
+
+
+def test_decode_image_raw_and_compressed() -> None:
+    """Raw frames stay views; jpeg frames are decoded, optionally reduced."""
+    import cv2
+
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    frame[:, 32:] = 200
+    raw = record_batch(
+        {"image": frame}, pa.schema([tensor_field("image", frame.shape, pa.uint8())]),
+    )
+    np.testing.assert_array_equal(decode_image(raw), frame)
+    assert decode_image(raw, reduce=2).shape == (24, 32, 3)
+
+    _, encoded = cv2.imencode(".jpg", frame)
+    jpeg = record_batch({"image": encoded}, pa.schema([encoded_field("image")]))
+    assert np.abs(decode_image(jpeg).astype(int) - frame).max() < 8
+    assert decode_image(jpeg, reduce=4).shape == (12, 16, 3)
+    with pytest.raises(ValueError):
+        decode_image(jpeg, reduce=3)
+
+
+def test_camera_info_cache_resolves_generations() -> None:
+    """Frames find the calibration of the generation they were captured with."""
+    from dora_pika_client.camera_info import CameraInfoCache
+
+    def info(generation: int, fx: float) -> pa.StructArray:
+        batch = pa.RecordBatch.from_pylist([
+            {"serial_number": "123", "generation": generation, "stream": "depth", "fx": fx},
+        ])
+        return pa.StructArray.from_arrays(batch.columns, names=batch.schema.names)
+
+    cache = CameraInfoCache()
+    frame = {"serial_number": "123", "camera_info": 2}
+    assert cache.get(frame, "depth") is None
+    cache.update({"value": info(1, 600.0)})
+    cache.update({"value": info(2, 300.0)})
+    assert cache.get(frame, "depth")["fx"] == 300.0
+    assert cache.get({**frame, "camera_info": 1}, "depth")["fx"] == 600.0
+    assert cache.get(frame, "color") is None
@@ -0,0 +1,46 @@
+"""Test module for dora_pika_common.depth_codec."""
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from dora_pika_client import decode
+from dora_pika_common.arrow import record_batch
+from dora_pika_common.depth_codec import DEPTH_CODECS, decode_depth, depth_field, encode_depth
+from dora_pika_common.sim import synthetic_frames
+
+
+def _depth() -> np.ndarray:
+    depth = synthetic_frames((48, 64), np.uint16, 1, low=300, high=6000)[0].copy()
+    depth += np.random.default_rng(0).integers(0, 16, depth.shape, dtype=np.uint16)
+    depth[10:20, 5:30] = 0  # holes
+    depth[0, :3] = (0, 65535, 0)  # steps that wrap around
+    return depth
+
+
+@pytest.mark.parametrize("codec", DEPTH_CODECS)
+def test_round_trip_is_lossless(codec: str) -> None:
+    depth = _depth()
+    encoded = encode_depth(depth, codec)
+    assert encoded.dtype == np.uint8 and encoded.nbytes < depth.nbytes
+    decoded = decode_depth(encoded, depth.shape, codec)
+    assert decoded.dtype == np.uint16
+    np.testing.assert_array_equal(decoded, depth)
+
+
+@pytest.mark.parametrize("codec", DEPTH_CODECS)
+def test_client_decodes_compressed_depth(codec: str) -> None:
+    """The consumer helpers decode a compressed depth column like a raw one."""
+    depth = _depth()
+    schema = pa.schema([
+      depth_field("depth", depth.shape, codec),
+      pa.field("timestamp", pa.int64()),
+    ])
+    batch = record_batch({"depth": encode_depth(depth, codec), "timestamp": 1}, schema)
+    value = pa.StructArray.from_arrays(batch.columns, fields=list(schema))
+    np.testing.assert_array_equal(decode({"value": value})["depth"], depth)
+
+
+def test_unknown_codec() -> None:
+    with pytest.raises(ValueError, match="Depth codec"):
+        depth_field("depth", (48, 64), "rvl")
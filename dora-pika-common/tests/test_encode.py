@@ -0,0 +1,91 @@
+"""Test module for dora_pika_common.encode."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from dora_pika_common.encode import EncodePool, encode_image, encode_params
+from dora_pika_common.sim import synthetic_frames
+
+cv2 = pytest.importorskip("cv2")
+
+
+@pytest.mark.parametrize("encoding", ["jpeg", "png", "webp"])
+def test_encode_image_round_trip(encoding: str) -> None:
+    frame = synthetic_frames((48, 64, 3), np.uint8, 1)[0]
+    encoded, elapsed = encode_image(frame, encoding, encode_params(encoding))
+    assert encoded.dtype == np.uint8 and encoded.ndim == 1 and elapsed > 0
+    decoded = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+    assert decoded.shape == frame.shape
+
+
+def test_quality_changes_size() -> None:
+    frame = synthetic_frames((120, 160, 3), np.uint8, 1)[0]
+    low, _ = encode_image(frame, "jpeg", encode_params("jpeg", 10))
+    high, _ = encode_image(frame, "jpeg", encode_params("jpeg", 100))
+    assert low.nbytes < high.nbytes
+
+
+def test_pool_delivers_in_order() -> None:
+    frames = synthetic_frames((240, 320, 3), np.uint8, 8)
+    delivered = []
+    done = threading.Event()
+
+    def callback(index: int, encoded: np.ndarray, encode_ns: int) -> None:
+        delivered.append((index, encoded.nbytes, encode_ns))
+        if index == len(frames) - 1:
+            done.set()
+
+    pool = EncodePool("png", workers=4, max_pending=len(frames))
+    pool.start()
+    for index, frame in enumerate(frames):
+        assert pool.submit(frame, lambda e, ns, i=index: callback(i, e, ns))
+    assert done.wait(5.0)
+    pool.close()
+    assert [index for index, _, _ in delivered] == list(range(len(frames)))
+    assert all(nbytes > 0 and encode_ns > 0 for _, nbytes, encode_ns in delivered)
+
+
+def test_pool_drops_when_full() -> None:
+    frame = synthetic_frames((480, 640, 3), np.uint8, 1)[0]
+    release = threading.Event()
+    delivered = []
+
+    def callback(encoded: np.ndarray, encode_ns: int) -> None:
+        release.wait(5.0)
+        delivered.append(encode_ns)
+
+    pool = EncodePool("jpeg", workers=1, max_pending=2)
+    pool.start()
+    accepted = [pool.submit(frame, callback) for _ in range(5)]
+    assert accepted[:2] == [True, True] and not any(accepted[2:])
+    assert pool.dropped == 3
+    release.set()
+    deadline = time.perf_counter() + 5.0
+    while len(delivered) < 2 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert pool.submit(frame, lambda e, ns: None)
+    pool.close()
+    assert len(delivered) == 2
+
+
+def test_pool_close_cancels_frames_not_started() -> None:
+    """Closing with the collector stuck cancels the queued encodes instead of running them."""
+    frames = synthetic_frames((480, 640, 3), np.uint8, 8)
+    release = threading.Event()
+    delivered = []
+
+    def callback(encoded: np.ndarray, encode_ns: int) -> None:
+        release.wait(5.0)
+        delivered.append(encode_ns)
+
+    pool = EncodePool("png", workers=1, max_pending=len(frames))
+    pool.start()
+    for frame in frames:
+        assert pool.submit(frame, callback)
+    pool.close(timeout=0.0)
+    release.set()
+    pool._collector.join(5.0)
+    assert 0 < len(delivered) < len(frames)
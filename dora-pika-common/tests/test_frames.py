@@ -0,0 +1,68 @@
+"""Test module for dora_pika_common.frames."""
+
+from typing import Callable
+
+import cv2
+import numpy as np
+import pytest
+
+from dora_pika_common.frames import FramePool, clamp_into, transform_into
+
+
+def _frame() -> np.ndarray:
+    frame = np.arange(6 * 8 * 3, dtype=np.uint8).reshape(6, 8, 3)
+    frame.flags.writeable = False  # stands in for the SDK buffer
+    return frame
+
+
+@pytest.mark.parametrize(
+    ("flip", "conversion", "expected"),
+    [
+        ("", None, lambda f: f),
+        ("VERTICAL", None, lambda f: f[::-1]),
+        ("HORIZONTAL", cv2.COLOR_RGB2BGR, lambda f: f[:, ::-1, ::-1]),
+        ("BOTH", None, lambda f: f[::-1, ::-1]),
+        ("", cv2.COLOR_RGB2BGR, lambda f: f[..., ::-1]),
+    ],
+)
+def test_transform_into_reuses_destination(
+    flip: str, conversion: int, expected: Callable,
+) -> None:
+    src = _frame()
+    dst = np.empty_like(src)
+    out = transform_into(src, dst, flip, conversion)
+    assert out is dst
+    np.testing.assert_array_equal(out, expected(src))
+
+
+def test_transform_into_replaces_mismatched_destination() -> None:
+    src = _frame()
+    out = transform_into(src, np.empty((2, 2, 3), np.uint8), "VERTICAL")
+    assert out.shape == src.shape
+    np.testing.assert_array_equal(out, src[::-1])
+
+
+def test_clamp_into_zeroes_far_depth() -> None:
+    depth = np.array([[0, 100, 5000], [5001, 65535, 4999]], dtype=np.uint16)
+    depth.flags.writeable = False
+    dst = np.empty_like(depth)
+    assert clamp_into(depth, dst, 5000) is dst
+    np.testing.assert_array_equal(dst, np.where(depth > 5000, 0, depth))
+    np.testing.assert_array_equal(clamp_into(depth, dst, 0), depth)
+
+
+def test_frame_pool_recycles_buffers() -> None:
+    pool = FramePool((4, 4), np.uint8, size=2)
+    first, second = pool.acquire(), pool.acquire()
+    assert pool.allocated == 0
+    third = pool.acquire()  # pool exhausted
+    assert pool.allocated == 1
+    pool.release(first)
+    pool.release(second)
+    pool.release(third)  # beyond size: dropped
+    assert {id(pool.acquire()), id(pool.acquire())} == {id(first), id(second)}
+    resized = pool.acquire((2, 2))
+    assert resized.shape == (2, 2) and pool.allocated == 2
+    pool.release(first)  # old size: dropped
+    pool.release(resized)
+    assert pool.acquire((2, 2)) is resized
@@ -0,0 +1,76 @@
+"""Test module for dora_pika_common.latest."""
+
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from dora_pika_common.latest import LatestValue
+
+
+@dataclass
+class Frame:
+    """Minimal slot used by the tests."""
+
+    data: np.ndarray = field(default_factory=lambda: np.zeros(1024, dtype=np.int64))
+
+
+def test_read_before_publish() -> None:
+    """Nothing is returned until the writer publishes."""
+    store = LatestValue(Frame)
+    assert not store.has_data
+    assert store.read() == (0, None)
+
+
+def test_publish_and_read_latest() -> None:
+    """The reader always sees the newest published slot, in place."""
+    store = LatestValue(Frame)
+    for value in (1, 2, 3):
+        slot = store.acquire()
+        slot.data[:] = value
+        seq = store.publish()
+    assert seq == 3
+    read_seq, slot = store.read()
+    assert read_seq == 3
+    assert (slot.data == 3).all()
+    assert store.read()[1] is slot
+
+
+def test_writer_never_touches_pinned_slot() -> None:
+    """The slot handed to the reader is not reused until the next read."""
+    store = LatestValue(Frame)
+    store.acquire()
+    store.publish()
+    _, pinned = store.read()
+    for _ in range(10):
+        assert store.acquire() is not pinned
+        store.publish()
+
+
+def test_concurrent_reads_are_consistent() -> None:
+    """A slot read while the writer runs is never torn."""
+    store = LatestValue(Frame)
+    stop = threading.Event()
+
+    def writer() -> None:
+        value = 0
+        while not stop.is_set():
+            value += 1
+            slot = store.acquire()
+            slot.data[:] = value
+            store.publish()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        last_seq = 0
+        for _ in range(2000):
+            seq, slot = store.read()
+            if slot is None:
+                continue
+            assert seq >= last_seq
+            last_seq = seq
+            assert (slot.data == slot.data[0]).all()
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,84 @@
+"""Test module for dora_pika_common.publish."""
+
+import pytest
+
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.testing import FakeNode
+
+
+def _publish(store: LatestValue, value: int) -> None:
+    store.acquire()["value"] = value
+    store.publish()
+
+
+def test_tick_mode_never_resends() -> None:
+    """Ticks without a new capture do not resend the previous value."""
+    store = LatestValue(dict)
+    tick = {"type": "INPUT", "id": "tick"}
+    node = FakeNode([tick, tick, tick])
+    publisher = Publisher(node, {"out": store}, mode="tick")
+    _publish(store, 1)
+    for _ in publisher:
+        seq, value = publisher.read("out")
+        if value is not None:
+            publisher.send("out", value["value"], seq)
+    assert node.sent == [("out", 1, {"seq": 1})]
+
+
+def test_overwritten_values_are_counted() -> None:
+    """Values replaced before a send are counted as overwritten."""
+    store = LatestValue(dict)
+    publisher = Publisher(FakeNode(), {"out": store}, mode="tick")
+    for batch in ([1], [2, 3, 4], [5]):
+        for value in batch:
+            _publish(store, value)
+        seq, value = publisher.read("out")
+        publisher.send("out", value["value"], seq)
+    assert publisher.overwritten == {"out": 2}
+
+
+def test_event_mode_wakes_on_publish() -> None:
+    """A capture wakes the sender without any tick input."""
+    store = LatestValue(dict)
+    node = FakeNode([])
+    publisher = Publisher(node, {"out": store}, mode="event", poll_interval=0.01)
+    events = iter(publisher)
+    _publish(store, 7)
+    assert next(events)["id"] == "tick"
+    seq, value = publisher.read("out")
+    publisher.send("out", value["value"], seq)
+    assert publisher.read("out") == (1, None)
+    node.events.append({"type": "STOP"})
+    assert next(events)["type"] == "STOP"
+    assert node.sent == [("out", 7, {"seq": 1})]
+
+
+def test_event_mode_ignores_tick_inputs() -> None:
+    """Leftover tick inputs in the dataflow are swallowed in event mode."""
+    node = FakeNode([{"type": "INPUT", "id": "tick"}, {"type": "STOP"}])
+    publisher = Publisher(node, {"out": LatestValue(dict)}, mode="event", poll_interval=0.0)
+    assert next(iter(publisher))["type"] == "STOP"
+
+
+def test_event_mode_ends_when_stream_closes() -> None:
+    """A stream closed without STOP ends the loop instead of polling forever."""
+    node = FakeNode([{"type": "INPUT", "id": "config"}], closed=True)
+    publisher = Publisher(node, {"out": LatestValue(dict)}, mode="event", poll_interval=0.01)
+    assert [event["id"] for event in publisher] == ["config"]
+
+
+def test_error_events_are_yielded_in_both_modes() -> None:
+    """ERROR events reach the caller in event mode as in tick mode."""
+    for mode in ("tick", "event"):
+        node = FakeNode([{"type": "ERROR", "error": "boom"}, {"type": "STOP"}])
+        publisher = Publisher(node, {"out": LatestValue(dict)}, mode=mode, poll_interval=0.0)
+        events = iter(publisher)
+        assert next(events) == {"type": "ERROR", "error": "boom"}
+        assert next(events)["type"] == "STOP"
+
+
+def test_unknown_mode() -> None:
+    """Invalid modes are rejected early."""
+    with pytest.raises(ValueError):
+        Publisher(FakeNode([]), {}, mode="poll")
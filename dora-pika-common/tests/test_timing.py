@@ -0,0 +1,65 @@
+"""Test module for dora_pika_common.timing."""
+
+import time
+
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.testing import FakeNode
+from dora_pika_common.timing import StageTimer
+
+
+def test_disabled_timer_records_nothing() -> None:
+    """A disabled timer hands out the shared no-op stage and keeps no state."""
+    timer = StageTimer("node", enabled=False)
+    with timer.stage("align"):
+        pass
+    timer.count("captured")
+    assert timer.stage("align") is timer.stage("flip")
+    assert timer.snapshot() == {"node": "node", "stages": {}, "counters": {}}
+
+
+def test_stage_percentiles_and_counters() -> None:
+    """Durations land in the rolling window, counters add up."""
+    timer = StageTimer("node", enabled=True, window=4)
+    for ms in (1, 2, 3, 4, 100):
+        timer.record("encode", ms / 1e3)
+    with timer.stage("flip"):
+        time.sleep(0.002)
+    timer.count("captured", 3)
+    snapshot = timer.snapshot()
+    encode = snapshot["stages"]["encode"]
+    assert encode["count"] == 5
+    assert encode["max_ms"] == 100.0  # window holds 2, 3, 4, 100
+    assert snapshot["stages"]["flip"]["p50_ms"] >= 2.0
+    assert snapshot["counters"] == {"captured": 3}
+
+    batch = timer.record_batch()
+    assert batch.column("kind").to_pylist() == ["stage", "stage", "counter"]
+
+    text = timer.prometheus_text()
+    assert 'pika_stage_seconds_bucket{node="node",stage="encode",le="+Inf"} 5' in text
+    assert 'pika_stage_seconds_bucket{node="node",stage="encode",le="0.001"} 1' in text
+    assert 'pika_frames_total{node="node",counter="captured"} 3' in text
+
+
+def test_publisher_times_sends_and_reports(tmp_path) -> None:  # noqa: ANN001
+    """The send loop times every send and emits the timing output."""
+    store = LatestValue(dict)
+    tick = {"type": "INPUT", "id": "tick"}
+    node = FakeNode([tick, tick])
+    prometheus = tmp_path / "node.prom"
+    timer = StageTimer(
+        "node", enabled=True, interval=0.0, output_id="timing", prometheus_path=str(prometheus),
+    )
+    publisher = Publisher(node, {"out": store}, mode="tick", timer=timer)
+    store.acquire()["value"] = 1
+    store.publish()
+    for _ in publisher:
+        seq, value = publisher.read("out")
+        if value is not None:
+            publisher.send("out", value["value"], seq)
+    assert timer.snapshot()["counters"] == {"send/out": 1}
+    timings = node.outputs("timing")
+    assert timings
+    assert "send/out" in timings[-1][0].column("name").to_pylist()
+    assert "pika_stage_seconds_count" in prometheus.read_text()
@@ -4,46 +4,37 @@ import logging
 import os
 import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 
 import numpy as np
 import pyarrow as pa
 from dora import Node
-from pika import sense
-from typing_extensions import Self
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.timing import StageTimer
 
 from dora_pika_gripper.pa_schema import pa_pika_gripper_schema as pika_gripper_schema
 
+# hardware (default) or sim: a simulated gripper replacing pika.sense
+BACKEND = os.getenv("BACKEND", "hardware")
+if BACKEND == "sim":
+    from dora_pika_gripper.sim import sense
+else:
+    from pika import sense
+
 logger = logging.getLogger(__name__)
 
+# Opt-in per-stage timing (STAGE_TIMING=1), see dora_pika_common.timing
+stage_timer = StageTimer("pika_gripper")
+
 
 @dataclass
 class PikaData:
-    """线程安全的 Pika 数据存储"""
-    _lock: threading.Lock = field(default_factory=threading.Lock)
+    """Pika 数据槽位，通过 LatestValue 交换"""
     angle: float = 0.0
     rad: float = 0.0
-    command_state: str = ""
-    has_data: bool = False
+    command_state: int = 0
     timestamp: int = 0
-    def update_data(self: Self, angle: float, rad: float, command_state: int, timestamp: int) -> None:
-        """更新数据"""
-        with self._lock:
-            self.angle = angle
-            self.rad = rad
-            self.command_state = command_state
-            self.has_data = True
-            self.timestamp = timestamp
-    def read_data(self: Self) -> tuple[bool, float, float, int, int]:
-        """获取数据"""
-        with self._lock:
-            return (
-                self.has_data,
-                self.angle,
-                self.rad,
-                self.command_state,
-                self.timestamp
-            )
 
 def config_pika(serial_path: str) -> sense:
     """读取 Pika 设备数据的线程"""
@@ -55,15 +46,23 @@ def config_pika(serial_path: str) -> sense:
         return None
     return pika
 
-def pika_reader(pika_data: PikaData, pika_stop_event: threading, serial_path: str) -> None:
+def pika_reader(
+    pika_store: LatestValue[PikaData], pika_stop_event: threading, serial_path: str,
+) -> None:
     pika = config_pika(serial_path)
     try:
         while not pika_stop_event.is_set():
             # 读取编码器和命令状态
-            encoder = pika.get_encoder_data()
-            state = pika.get_command_state()
-            timestamp = time.time_ns()
-            pika_data.update_data(encoder["angle"], encoder["rad"], state, timestamp)
+            with stage_timer.stage("read"):
+                encoder = pika.get_encoder_data()
+                command_state = pika.get_command_state()
+            data = pika_store.acquire()
+            data.angle = encoder["angle"]
+            data.rad = encoder["rad"]
+            data.command_state = command_state
+            data.timestamp = time.time_ns()
+            pika_store.publish()
+            stage_timer.count("captured")
             time.sleep(0.001)  # 10ms 间隔
     except Exception as e:
         logger.error(f"读取失败: {e}")
@@ -73,29 +72,30 @@ def pika_reader(pika_data: PikaData, pika_stop_event: threading, serial_path: st
         pika_stop_event.set()
 
 
-def dora_sender(pika_data: PikaData, pika_stop_event: threading, dora_stop_event: threading) -> None:
+def dora_sender(
+    pika_store: LatestValue[PikaData], pika_stop_event: threading, dora_stop_event: threading,
+) -> None:
     """通过 Dora 发送数据的线程"""
     node = Node()
+    publisher = Publisher(node, {"encoder_data": pika_store}, timer=stage_timer)
     try:
-        for event in node:
+        for event in publisher:
             if  pika_stop_event.is_set():
                 break
             if event["type"] == "INPUT" and event["id"] == "tick":
-                has_data, angle, rad, state, timestamp = pika_data.read_data()
-                print
-                if has_data:
+                seq, data = publisher.read("encoder_data")
+                if data is not None:
                     # 构建并发送数据
                     batch = pa.record_batch(
                         {
-                            "angle" : [np.float16(angle)],
-                            "rad" : [np.float16(rad)],
-                            "state": [state],
-                            "timestamp": [timestamp],
+                            "angle" : [np.float16(data.angle)],
+                            "rad" : [np.float16(data.rad)],
+                            "state": [data.command_state],
+                            "timestamp": [data.timestamp],
                         },
                         schema=pika_gripper_schema
                     )
-                    node.send_output("encoder_data", batch)
-                time.sleep(0.001)  # 避免CPU使用率过高
+                    publisher.send("encoder_data", batch, seq)
             elif event["type"] == "STOP":
                 dora_stop_event.set()
                 break
@@ -109,10 +109,11 @@ def dora_sender(pika_data: PikaData, pika_stop_event: threading, dora_stop_event
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    stage_timer.install_signal_handler()
     serial_path = os.getenv("SERIAL_PATH", "/dev/ttyUSB81")  # 设备串口
 
     # 初始化数据和事件
-    pika_data = PikaData()
+    pika_store = LatestValue(PikaData)
     dora_stop_event = threading.Event()
     pika_stop_event = threading.Event()
 
@@ -120,12 +121,12 @@ if __name__ == "__main__":
     # 启动线程
     reader_thread = threading.Thread(
         target=pika_reader,
-        args=(pika_data, pika_stop_event, serial_path),
+        args=(pika_store, pika_stop_event, serial_path),
         daemon=True
     )
     sender_thread = threading.Thread(
         target=dora_sender,
-        args=(pika_data, pika_stop_event, dora_stop_event),
+        args=(pika_store, pika_stop_event, dora_stop_event),
         daemon=True
     )
     reader_thread.start()
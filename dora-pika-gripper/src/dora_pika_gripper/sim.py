@@ -0,0 +1,39 @@
+"""Simulated Pika gripper backend (``BACKEND=sim``).
+
+`SimSense` implements the subset of ``pika.sense`` used by the node: the
+encoder opens and closes the gripper between 0 and 90 degrees at 0.25 Hz and
+the command state toggles every two seconds.
+"""
+
+import math
+import time
+
+from typing_extensions import Self
+
+
+class SimSense:
+    """Stand-in for ``pika.sense``."""
+
+    def __init__(self: Self, serial_path: str) -> None:
+        self.serial_path = serial_path
+        self._start = time.perf_counter()
+        self.connected = False
+
+    def connect(self: Self) -> bool:
+        self.connected = True
+        self._start = time.perf_counter()
+        return True
+
+    def get_encoder_data(self: Self) -> dict:
+        t = time.perf_counter() - self._start
+        angle = 45.0 * (1.0 - math.cos(2.0 * math.pi * 0.25 * t))
+        return {"angle": angle, "rad": math.radians(angle)}
+
+    def get_command_state(self: Self) -> int:
+        return int((time.perf_counter() - self._start) // 2.0) % 2
+
+    def disconnect(self: Self) -> None:
+        self.connected = False
+
+
+sense = SimSense
@@ -11,3 +11,34 @@ def test_import_main() -> None:
     # as we're not running in a Dora dataflow.
     with pytest.raises(RuntimeError):
         main()
+
+
+def test_sim_reader_to_publish(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Runs the reader and sender threads against the simulated gripper."""
+    import threading
+
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    import dora_pika_gripper.main as gripper
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(gripper, "Node", lambda: node)
+
+    pika_store = LatestValue(gripper.PikaData)
+    pika_stop_event = threading.Event()
+    dora_stop_event = threading.Event()
+    reader = threading.Thread(
+        target=gripper.pika_reader, args=(pika_store, pika_stop_event, "/dev/ttyUSB81"),
+    )
+    reader.start()
+    assert wait_for_data(pika_store)
+    gripper.dora_sender(pika_store, pika_stop_event, dora_stop_event)
+    pika_stop_event.set()
+    reader.join(timeout=2.0)
+
+    outputs = node.outputs("encoder_data")
+    assert outputs
+    seqs = [metadata["seq"] for _, metadata in outputs]
+    assert seqs == sorted(set(seqs))
+    assert 0.0 <= outputs[-1][0].column("angle")[0].as_py() <= 90.0
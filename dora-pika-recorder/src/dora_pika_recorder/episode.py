@@ -0,0 +1,361 @@
+"""Chunked Arrow IPC episode files.
+
+An episode is a directory with one subdirectory per recorded stream::
+
+    20250101-120000/
+      image/
+        image-00000.arrow
+        image-00001.arrow
+        index.arrow
+      encoder_data/
+        ...
+
+Every received value is appended as one record batch to the stream's current
+chunk, an Arrow IPC file (Feather v2: ``pa.ipc.open_file`` /
+``pyarrow.feather.read_table`` read it) with optional LZ4 or ZSTD buffer
+compression. A chunk is closed and the next one started once it holds
+``max_bytes`` or spans ``max_seconds``, and whenever the schema changes (e.g. a
+new resolution). ``index.arrow`` lists every batch as ``(timestamp,
+received_ns, seq, chunk, batch)`` and is rewritten at each rotation and on
+close.
+
+Each batch also carries its ``received_ns`` and ``seq`` as IPC custom metadata,
+and is written straight to the file without buffering. A chunk left open by a
+crash has no IPC footer and no index rows, but its complete batches are still
+readable as an IPC stream. `recover_episode` rewrites such chunks as proper IPC
+files, with the compression recorded in their batches' metadata, and rebuilds
+their index rows. A crash then loses at most the batch being written. Recovery
+is an explicit step (``dora-pika-recover <episode>``, or ``REPLAY_RECOVER=1`` of
+the replay node): it never touches data on its own.
+
+`Recorder` owns one `StreamWriter` per stream. `Recorder.record` is called from
+the dora thread and only enqueues; a background thread does all the writing.
+While it runs, the recorder holds a lock on the episode's ``recording.lock``;
+`recover_episode` skips an episode whose lock is held, since its open chunks
+are still being written. The lock goes away with the process, so it is free
+again after a crash.
+"""
+
+import argparse
+import contextlib
+import fcntl
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+from typing import IO, Optional
+
+import pyarrow as pa
+from dora_pika_common.timing import NULL_TIMER, StageTimer
+from typing_extensions import Self
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIONS = ("lz4", "zstd", "none")
+
+INDEX_FILE = "index.arrow"
+
+LOCK_FILE = "recording.lock"
+
+pa_index_schema = pa.schema([
+  pa.field("timestamp", pa.int64()),  # ``timestamp`` column of the batch, else received_ns
+  pa.field("received_ns", pa.int64()),
+  pa.field("seq", pa.int64()),  # ``seq`` metadata of the output, -1 without
+  pa.field("chunk", pa.int32()),
+  pa.field("batch", pa.int32()),  # record batch index within the chunk
+])
+
+
+def chunk_path(directory: str, stream: str, chunk: int) -> str:
+    """Path of chunk ``chunk`` of ``stream`` in episode ``directory``."""
+    return os.path.join(directory, stream, f"{stream}-{chunk:05d}.arrow")
+
+
+def as_batch(value: pa.Array) -> pa.RecordBatch:
+    """Record batch of a dora input value; non-struct values become column ``value``."""
+    if isinstance(value, pa.RecordBatch):
+        return value
+    if pa.types.is_struct(value.type):
+        return pa.RecordBatch.from_struct_array(value)
+    return pa.record_batch([value], names=["value"])
+
+
+def batch_timestamp(batch: pa.RecordBatch, default: int) -> int:
+    """First ``timestamp`` of ``batch``, or ``default``."""
+    index = batch.schema.get_field_index("timestamp")
+    if index < 0 or not batch.num_rows:
+        return default
+    timestamp = batch.column(index)[0].as_py()
+    return default if timestamp is None else timestamp
+
+
+def lock_episode(directory: str) -> IO:
+    """Take the recording lock of episode ``directory``; it is held until the file is closed."""
+    lock = open(os.path.join(directory, LOCK_FILE), "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        raise FileExistsError(f"Episode {directory} is being recorded by another recorder.") from None
+    return lock
+
+
+def is_recording(directory: str) -> bool:
+    """Whether a running recorder holds the lock of episode ``directory``."""
+    path = os.path.join(directory, LOCK_FILE)
+    if not os.path.isfile(path):
+        return False
+    with open(path) as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+    return False
+
+
+def _write_index(path: str, index: dict[str, list[int]]) -> None:
+    """Replace the index at ``path`` atomically."""
+    table = pa.table(index, schema=pa_index_schema)
+    with pa.OSFile(f"{path}.tmp", "wb") as sink, pa.ipc.new_file(sink, pa_index_schema) as w:
+        w.write_table(table)
+    os.replace(f"{path}.tmp", path)
+
+
+def _read_chunk(path: str) -> tuple[list[pa.RecordBatch], list[dict], bool]:
+    """Batches and custom metadata of a chunk; False if it had no footer (left open)."""
+    buffer = pa.memory_map(path).read_buffer()
+    try:
+        reader = pa.ipc.open_file(buffer)
+    except pa.ArrowInvalid:
+        pass
+    else:
+        pairs = [reader.get_batch_with_custom_metadata(i) for i in range(reader.num_record_batches)]
+        return [b for b, _ in pairs], [dict(m or {}) for _, m in pairs], True
+    # The file format is the stream format after the 8-byte magic, plus a footer.
+    batches: list[pa.RecordBatch] = []
+    metadata: list[dict] = []
+    with contextlib.suppress(pa.ArrowInvalid, OSError):
+        reader = pa.ipc.open_stream(buffer[8:])
+        for batch, custom in reader.iter_batches_with_custom_metadata():
+            batches.append(batch)
+            metadata.append(dict(custom or {}))
+    return batches, metadata, False
+
+
+def recover_stream(directory: str, stream: str) -> int:
+    """Index the chunks of ``stream`` missing from its index; return the batches recovered.
+
+    Chunks without a footer (open when the recorder died) are rewritten first,
+    with the compression they were recorded with; their last, partially written
+    batch is lost. Must not run while a recorder writes the stream.
+    """
+    path = os.path.join(directory, stream, INDEX_FILE)
+    index: dict[str, list[int]] = {name: [] for name in pa_index_schema.names}
+    if os.path.isfile(path):
+        with pa.memory_map(path) as source:
+            index.update(pa.ipc.open_file(source).read_all().to_pydict())
+    indexed = set(index["chunk"])
+    recovered = 0
+    for chunk_file in sorted(glob.glob(os.path.join(directory, stream, f"{stream}-*.arrow"))):
+        chunk = int(chunk_file[-len("00000.arrow"):-len(".arrow")])
+        if chunk in indexed:
+            continue
+        batches, metadata, complete = _read_chunk(chunk_file)
+        if not batches:
+            logger.warning("No complete batch in %s, skipped", chunk_file)
+            continue
+        if not complete:
+            compression = metadata[0].get(b"compression", b"none").decode()
+            options = pa.ipc.IpcWriteOptions(
+                compression=None if compression == "none" else compression,
+            )
+            with pa.OSFile(f"{chunk_file}.tmp", "wb") as sink:
+                with pa.ipc.new_file(sink, batches[0].schema, options=options) as writer:
+                    for batch, custom in zip(batches, metadata):
+                        writer.write_batch(batch, custom_metadata=custom)
+            os.replace(f"{chunk_file}.tmp", chunk_file)
+        for number, (batch, custom) in enumerate(zip(batches, metadata)):
+            received_ns = int(custom.get(b"received_ns", batch_timestamp(batch, 0)))
+            index["timestamp"].append(batch_timestamp(batch, received_ns))
+            index["received_ns"].append(received_ns)
+            index["seq"].append(int(custom.get(b"seq", -1)))
+            index["chunk"].append(chunk)
+            index["batch"].append(number)
+        recovered += len(batches)
+        logger.warning("Recovered %d batches of %s", len(batches), chunk_file)
+    if recovered:
+        _write_index(path, index)
+    return recovered
+
+
+def recover_episode(directory: str) -> dict[str, int]:
+    """`recover_stream` for every stream of episode ``directory``.
+
+    An episode still being recorded is skipped (empty result).
+    """
+    if is_recording(directory):
+        logger.warning("%s is still being recorded, not recovered", directory)
+        return {}
+    return {
+        stream: recover_stream(directory, stream)
+        for stream in sorted(os.listdir(directory))
+        if os.path.isdir(os.path.join(directory, stream))
+    }
+
+
+class StreamWriter:
+    """Appends one stream's batches to rotating chunk files."""
+
+    def __init__(
+        self: Self,
+        directory: str,
+        stream: str,
+        compression: str = "lz4",
+        max_bytes: int = 1 << 30,
+        max_seconds: float = 300.0,
+    ) -> None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Compression must be one of {COMPRESSIONS}, got {compression!r}.")
+        self.directory = directory
+        self.stream = stream
+        self.compression = compression
+        self.options = pa.ipc.IpcWriteOptions(
+            compression=None if compression == "none" else compression,
+        )
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.chunk = -1
+        self.index: dict[str, list[int]] = {name: [] for name in pa_index_schema.names}
+        self._sink: Optional[pa.OSFile] = None
+        self._writer: Optional[pa.ipc.RecordBatchFileWriter] = None
+        self._schema: Optional[pa.Schema] = None
+        self._batches = 0
+        self._opened = 0.0
+        os.makedirs(os.path.join(directory, stream), exist_ok=True)
+
+    def write(self: Self, batch: pa.RecordBatch, received_ns: int, seq: int = -1) -> None:
+        """Append ``batch``, rotating the chunk first if needed."""
+        if (
+            self._writer is None
+            or not batch.schema.equals(self._schema)
+            or self._sink.tell() >= self.max_bytes
+            or time.monotonic() - self._opened >= self.max_seconds
+        ):
+            self.rotate(batch.schema)
+        # Lets recover_stream rebuild a chunk left open by a crash, and its index.
+        self._writer.write_batch(batch, custom_metadata={
+            "received_ns": str(received_ns), "seq": str(seq), "compression": self.compression,
+        })
+        self.index["timestamp"].append(batch_timestamp(batch, received_ns))
+        self.index["received_ns"].append(received_ns)
+        self.index["seq"].append(seq)
+        self.index["chunk"].append(self.chunk)
+        self.index["batch"].append(self._batches)
+        self._batches += 1
+
+    def rotate(self: Self, schema: pa.Schema) -> None:
+        """Close the current chunk and start the next one with ``schema``."""
+        self._close_chunk()
+        self.chunk += 1
+        self._sink = pa.OSFile(chunk_path(self.directory, self.stream, self.chunk), "wb")
+        self._writer = pa.ipc.new_file(self._sink, schema, options=self.options)
+        self._schema = schema
+        self._batches = 0
+        self._opened = time.monotonic()
+
+    def write_index(self: Self) -> None:
+        """Replace ``index.arrow`` atomically."""
+        _write_index(os.path.join(self.directory, self.stream, INDEX_FILE), self.index)
+
+    def _close_chunk(self: Self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._sink.close()
+        self._writer = None
+        self.write_index()
+
+    def close(self: Self) -> None:
+        self._close_chunk()
+
+
+class Recorder:
+    """Bounded queue in front of a background thread writing every stream."""
+
+    def __init__(
+        self: Self,
+        directory: str,
+        compression: str = "lz4",
+        queue_size: int = 256,
+        max_bytes: int = 1 << 30,
+        max_seconds: float = 300.0,
+        timer: Optional[StageTimer] = None,
+    ) -> None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Compression must be one of {COMPRESSIONS}, got {compression!r}.")
+        self.directory = directory
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.timer = timer or NULL_TIMER
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.writers: dict[str, StreamWriter] = {}
+        self.recorded = 0
+        self.dropped = 0
+        os.makedirs(directory, exist_ok=True)
+        self._lock = lock_episode(directory)
+        self.thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self.thread.start()
+
+    def record(self: Self, stream: str, value: pa.Array, metadata: Optional[dict] = None) -> bool:
+        """Enqueue ``value`` of ``stream``; False if the queue is full and it was dropped."""
+        seq = (metadata or {}).get("seq", -1)
+        try:
+            self.queue.put_nowait((stream, value, time.time_ns(), seq))
+        except queue.Full:
+            self.dropped += 1
+            self.timer.count("dropped")
+            if self.dropped & (self.dropped - 1) == 0:
+                logger.warning("Recorder queue full, %d batches dropped so far", self.dropped)
+            return False
+        return True
+
+    def _run(self: Self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            stream, value, received_ns, seq = item
+            writer = self.writers.get(stream)
+            try:
+                if writer is None:
+                    writer = self.writers[stream] = StreamWriter(
+                        self.directory, stream, self.compression, self.max_bytes, self.max_seconds,
+                    )
+                with self.timer.stage(f"write/{stream}"):
+                    writer.write(as_batch(value), received_ns, seq)
+            except Exception:
+                logger.exception("Writing %s failed", stream)
+                continue
+            self.recorded += 1
+            self.timer.count("recorded")
+        for writer in self.writers.values():
+            writer.close()
+
+    def close(self: Self) -> None:
+        """Write everything still queued, then close all chunks and indexes."""
+        self.queue.put(None)
+        self.thread.join()
+        self._lock.close()
+
+
+def main() -> None:
+    """``dora-pika-recover``: recover episodes left open by a recorder crash."""
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("episodes", nargs="+", help="episode directories")
+    for directory in parser.parse_args().episodes:
+        recovered = recover_episode(directory)
+        logger.info("%s: %d batches recovered", directory, sum(recovered.values()))
@@ -0,0 +1,59 @@
+"""Episode recorder node for the pika sensor outputs.
+
+Records every input to a chunked Arrow IPC episode (see
+`dora_pika_recorder.episode`), one directory per run under ``RECORD_DIR``.
+"""
+
+import logging
+import os
+import time
+
+from dora import Node
+from dora_pika_common.timing import StageTimer
+
+from dora_pika_recorder.episode import Recorder
+
+logger = logging.getLogger(__name__)
+
+# Opt-in per-stage timing (STAGE_TIMING=1), see dora_pika_common.timing
+stage_timer = StageTimer("pika_recorder")
+
+
+def run(node: Node, recorder: Recorder) -> None:
+    """Enqueue every input until STOP."""
+    for event in node:
+        if event["type"] == "INPUT":
+            recorder.record(event["id"], event["value"], event.get("metadata"))
+            stage_timer.report(node)
+        elif event["type"] == "STOP":
+            break
+
+
+def main() -> None:
+    """Main entry point"""
+    logging.basicConfig(level=logging.INFO)
+    episode = os.getenv("RECORD_EPISODE") or time.strftime("%Y%m%d-%H%M%S")
+    directory = os.path.join(os.getenv("RECORD_DIR", "episodes"), episode)
+    node = Node()
+    recorder = Recorder(
+        directory,
+        compression=os.getenv("RECORD_COMPRESSION", "lz4").lower(),
+        queue_size=int(os.getenv("RECORD_QUEUE", "256")),
+        max_bytes=int(float(os.getenv("RECORD_CHUNK_MB", "1024")) * 1e6),
+        max_seconds=float(os.getenv("RECORD_CHUNK_SECONDS", "300")),
+        timer=stage_timer,
+    )
+    stage_timer.install_signal_handler()
+    logger.info("Recording to %s", directory)
+    try:
+        run(node, recorder)
+    finally:
+        recorder.close()
+        logger.info(
+            "Recorded %d batches of %s to %s (%d dropped)",
+            recorder.recorded, ", ".join(recorder.writers), directory, recorder.dropped,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Episode replay node.
+
+Republishes an episode written by the recorder (`dora_pika_recorder.episode`):
+every stream directory becomes the output of the same id, and the recorded
+record batches are sent unchanged, so a consumer cannot tell the replay from
+the live pika nodes. Chunks are memory-mapped; with ``RECORD_COMPRESSION=none``
+batches are sent zero-copy from the page cache, while compressed chunks (the
+``lz4`` default) are decompressed into new buffers as they are read.
+
+Streams are merged in recorded receive order (``received_ns``, the recorder's
+single clock) and paced with ``REPLAY_SPEED``: ``1`` for real time, ``N`` for N
+times faster, ``0`` (or ``max``) for as fast as the consumers take them.
+"""
+
+import itertools
+import logging
+import os
+import time
+from typing import Iterator, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+from dora import Node
+from typing_extensions import Self
+
+from dora_pika_recorder.episode import INDEX_FILE, chunk_path, recover_episode
+
+logger = logging.getLogger(__name__)
+
+
+class Episode:
+    """Memory-mapped read access to a recorded episode."""
+
+    def __init__(
+        self: Self, directory: str, streams: Optional[list[str]] = None, recover: bool = False,
+    ) -> None:
+        self.directory = directory
+        if recover:
+            # Chunks left open by a recorder crash become readable and indexed.
+            recover_episode(directory)
+        self.streams = streams or sorted(
+            name for name in os.listdir(directory)
+            if os.path.isfile(os.path.join(directory, name, INDEX_FILE))
+        )
+        if not self.streams:
+            raise FileNotFoundError(f"No recorded streams in {directory}.")
+        self.indexes = {
+            stream: feather.read_table(os.path.join(directory, stream, INDEX_FILE))
+            for stream in self.streams
+        }
+        self._readers: dict[tuple[str, int], pa.ipc.RecordBatchFileReader] = {}
+
+    def __len__(self: Self) -> int:
+        return sum(index.num_rows for index in self.indexes.values())
+
+    def batch(self: Self, stream: str, chunk: int, batch: int) -> pa.RecordBatch:
+        """Record batch ``batch`` of chunk ``chunk`` (backed by the memory map if uncompressed)."""
+        reader = self._readers.get((stream, chunk))
+        if reader is None:
+            source = pa.memory_map(chunk_path(self.directory, stream, chunk))
+            reader = self._readers[stream, chunk] = pa.ipc.open_file(source)
+        return reader.get_batch(batch)
+
+    def entries(self: Self) -> Iterator[tuple[int, str, pa.RecordBatch, int]]:
+        """Yield ``(received_ns, stream, batch, seq)`` of all streams in receive order."""
+        columns = {name: [] for name in ("received_ns", "stream", "chunk", "batch", "seq")}
+        for number, stream in enumerate(self.streams):
+            index = self.indexes[stream]
+            for name in ("received_ns", "chunk", "batch", "seq"):
+                columns[name].append(index.column(name).to_numpy())
+            columns["stream"].append(np.full(index.num_rows, number))
+        merged = {name: np.concatenate(arrays) for name, arrays in columns.items()}
+        for i in np.argsort(merged["received_ns"], kind="stable"):
+            stream = self.streams[merged["stream"][i]]
+            batch = self.batch(stream, int(merged["chunk"][i]), int(merged["batch"][i]))
+            yield int(merged["received_ns"][i]), stream, batch, int(merged["seq"][i])
+
+    def close(self: Self) -> None:
+        self._readers.clear()
+
+
+def parse_speed(speed: str) -> float:
+    """``REPLAY_SPEED`` as a factor; 0 means as fast as possible."""
+    speed = speed.strip().lower()
+    return 0.0 if speed in ("max", "inf", "") else float(speed)
+
+
+def replay(node: Node, episode: Episode, speed: float = 1.0) -> int:
+    """Send every recorded batch on its stream's output; return the number sent.
+
+    Returns early on STOP.
+    """
+    sent = 0
+    start = first = None
+    for received_ns, stream, batch, seq in episode.entries():
+        if speed > 0:
+            if start is None:
+                start, first = time.perf_counter(), received_ns
+            delay = start + (received_ns - first) / 1e9 / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        event = node.next(timeout=0.0)
+        if event is not None and event["type"] == "STOP":
+            return sent
+        node.send_output(stream, batch, {"seq": seq} if seq >= 0 else {})
+        sent += 1
+    return sent
+
+
+def main() -> None:
+    """Main entry point"""
+    logging.basicConfig(level=logging.INFO)
+    node = Node()
+    streams = [s.strip() for s in os.getenv("REPLAY_STREAMS", "").split(",") if s.strip()]
+    recover = os.getenv("REPLAY_RECOVER", "0") in ("1", "true")
+    episode = Episode(os.environ["REPLAY_EPISODE"], streams or None, recover=recover)
+    speed = parse_speed(os.getenv("REPLAY_SPEED", "1"))
+    loops = int(os.getenv("REPLAY_LOOPS", "1"))  # 0: forever
+    logger.info(
+        "Replaying %d batches of %s at %s", len(episode), ", ".join(episode.streams),
+        f"{speed}x" if speed else "max speed",
+    )
+    for _ in itertools.count() if loops == 0 else range(loops):
+        started = time.perf_counter()
+        sent = replay(node, episode, speed)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Sent %d batches in %.2f s (%.0f batches/s)",
+            sent, elapsed, sent / max(elapsed, 1e-9),
+        )
+        if sent < len(episode):
+            break
+    episode.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Test module for dora_pika_recorder package."""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+import pytest
+from dora_pika_common.arrow import record_batch, tensor_field
+from dora_pika_common.testing import FakeNode
+
+from dora_pika_recorder import episode
+from dora_pika_recorder.episode import (
+    INDEX_FILE,
+    Recorder,
+    StreamWriter,
+    as_batch,
+    chunk_path,
+    is_recording,
+    recover_episode,
+)
+from dora_pika_recorder.main import run
+
+
+def _image(height: int, width: int, timestamp: int) -> pa.StructArray:
+    schema = pa.schema([
+      tensor_field("image", (height, width, 3), pa.uint8()),
+      pa.field("timestamp", pa.int64()),
+    ])
+    image = np.full((height, width, 3), timestamp % 256, dtype=np.uint8)
+    batch = record_batch({"image": image, "timestamp": timestamp}, schema)
+    return pa.StructArray.from_arrays(batch.columns, fields=list(schema))
+
+
+def _read_index(directory: str, stream: str) -> pa.Table:
+    return feather.read_table(os.path.join(directory, stream, INDEX_FILE))
+
+
+def test_import_main() -> None:
+    """Test importing and running the main function."""
+    from dora_pika_recorder.main import main
+
+    # Check that everything is working, and catch Dora RuntimeError
+    # as we're not running in a Dora dataflow.
+    with pytest.raises(RuntimeError):
+        main()
+
+
+@pytest.mark.parametrize("compression", ["lz4", "zstd", "none"])
+def test_writer_rotates_by_size_and_schema(tmp_path: str, compression: str) -> None:
+    """Chunks rotate past max_bytes and on a resolution change; the index points at every batch."""
+    directory = str(tmp_path)
+    writer = StreamWriter(directory, "image", compression, max_bytes=40_000)
+    batches = [pa.RecordBatch.from_struct_array(_image(120, 160, ts)) for ts in range(3)]
+    batches.append(pa.RecordBatch.from_struct_array(_image(60, 80, 3)))
+    for received_ns, batch in enumerate(batches):
+        writer.write(batch, received_ns, seq=received_ns + 1)
+    writer.close()
+
+    index = _read_index(directory, "image")
+    assert index.column("timestamp").to_pylist() == [0, 1, 2, 3]
+    assert index.column("seq").to_pylist() == [1, 2, 3, 4]
+    chunks = index.column("chunk").to_pylist()
+    if compression == "none":
+        assert chunks == [0, 1, 2, 3]  # 57.6 kB per frame
+    else:
+        assert chunks == [0, 0, 0, 1]  # constant frames compress well; new shape rotates
+    for row in index.to_pylist():
+        with pa.memory_map(chunk_path(directory, "image", row["chunk"])) as source:
+            batch = pa.ipc.open_file(source).get_batch(row["batch"])
+            assert batch.column("timestamp")[0].as_py() == row["timestamp"]
+
+
+def test_recover_chunk_left_open(tmp_path: str) -> None:
+    """A chunk without footer (crash) is rewritten and indexed; its torn last batch is lost."""
+    directory = str(tmp_path)
+    writer = StreamWriter(directory, "image", "zstd")
+    writer.write(pa.RecordBatch.from_struct_array(_image(60, 80, 0)), 100, seq=1)
+    # A new resolution closes chunk 0, chunk 1 stays open as after a crash.
+    for ts in range(1, 4):
+        writer.write(pa.RecordBatch.from_struct_array(_image(120, 160, ts)), 100 + ts, seq=ts + 1)
+    path = chunk_path(directory, "image", 1)
+    os.truncate(path, os.path.getsize(path) - 16)
+    assert _read_index(directory, "image").column("chunk").to_pylist() == [0]
+
+    assert recover_episode(directory) == {"image": 2}
+    index = _read_index(directory, "image")
+    assert index.column("chunk").to_pylist() == [0, 1, 1]
+    assert index.column("batch").to_pylist() == [0, 0, 1]
+    assert index.column("received_ns").to_pylist() == [100, 101, 102]
+    assert index.column("seq").to_pylist() == [1, 2, 3]
+    with pa.memory_map(path) as source:
+        batch, custom = pa.ipc.open_file(source).get_batch_with_custom_metadata(1)
+        assert batch.column("timestamp")[0].as_py() == 2
+    # Rewritten with the recorded codec: two constant 57.6 kB frames stay compressed.
+    assert custom[b"compression"] == b"zstd"
+    assert os.path.getsize(path) < 10_000
+    assert recover_episode(directory) == {"image": 0}
+
+
+def test_recover_skips_episode_being_recorded(tmp_path: str) -> None:
+    """A running recorder holds the episode lock; its open chunks are left alone."""
+    directory = str(tmp_path)
+    recorder = Recorder(directory, compression="none")
+    assert recorder.record("image", _image(12, 16, 0))
+    while not recorder.recorded:
+        time.sleep(0.01)
+    assert is_recording(directory)
+    with pytest.raises(FileExistsError):
+        Recorder(directory)
+    assert recover_episode(directory) == {}
+    assert not os.path.exists(os.path.join(directory, "image", INDEX_FILE))
+
+    recorder.close()
+    assert not is_recording(directory)
+    assert recover_episode(directory) == {"image": 0}
+    assert _read_index(directory, "image").column("seq").to_pylist() == [-1]
+
+
+def test_writer_rotates_by_time(tmp_path: str) -> None:
+    """max_seconds=0 starts a new chunk for every batch."""
+    writer = StreamWriter(str(tmp_path), "encoder_data", "none", max_seconds=0.0)
+    for received_ns in range(3):
+        writer.write(pa.record_batch([pa.array([0.5])], names=["angle"]), received_ns)
+    writer.close()
+    index = _read_index(str(tmp_path), "encoder_data")
+    assert index.column("chunk").to_pylist() == [0, 1, 2]
+    # Without a timestamp column the receive time is indexed.
+    assert index.column("timestamp").to_pylist() == [0, 1, 2]
+
+
+def test_run_records_every_input(tmp_path: str) -> None:
+    """The node loop enqueues every input; close flushes the queue and the indexes."""
+    events = [
+        {"type": "INPUT", "id": "image", "value": _image(12, 16, ts), "metadata": {"seq": ts}}
+        for ts in range(1, 6)
+    ]
+    events.append({"type": "INPUT", "id": "audio", "value": pa.array([1, 2, 3], pa.int16()),
+                   "metadata": {}})
+    events.append({"type": "STOP"})
+    recorder = Recorder(str(tmp_path), queue_size=16)
+    run(FakeNode(events), recorder)
+    recorder.close()
+
+    assert recorder.recorded == 6
+    assert recorder.dropped == 0
+    table = feather.read_table(chunk_path(str(tmp_path), "image", 0))
+    assert table.column("timestamp").to_pylist() == [1, 2, 3, 4, 5]
+    assert _read_index(str(tmp_path), "image").column("seq").to_pylist() == [1, 2, 3, 4, 5]
+    audio = feather.read_table(chunk_path(str(tmp_path), "audio", 0))
+    assert audio.column("value").to_pylist() == [1, 2, 3]
+
+
+def test_full_queue_drops(tmp_path: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A full queue drops and counts instead of blocking the dora thread."""
+    taken = threading.Event()
+    disk = threading.Event()
+
+    def slow_as_batch(value: pa.Array) -> pa.RecordBatch:
+        taken.set()
+        disk.wait()
+        return as_batch(value)
+
+    monkeypatch.setattr(episode, "as_batch", slow_as_batch)
+    recorder = Recorder(str(tmp_path), queue_size=2)
+    results = [recorder.record("image", _image(2, 2, 0))]
+    # The writer holds the first batch, so two more fill the queue.
+    assert taken.wait(timeout=2.0)
+    results += [recorder.record("image", _image(2, 2, ts)) for ts in range(1, 6)]
+    disk.set()
+    recorder.close()
+    assert results == [True, True, True, False, False, False]
+    assert recorder.dropped == 3
+    assert recorder.recorded == 3
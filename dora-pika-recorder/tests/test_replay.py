@@ -0,0 +1,95 @@
+"""Test module for the dora_pika_recorder replay node."""
+
+import time
+
+import numpy as np
+import pyarrow as pa
+import pytest
+from dora_pika_common.arrow import record_batch, tensor_field
+from dora_pika_common.testing import FakeNode
+
+from dora_pika_recorder.episode import StreamWriter
+from dora_pika_recorder.replay import Episode, parse_speed, replay
+
+MS = 1_000_000
+IMAGE = pa.schema([
+  tensor_field("image", (4, 6, 3), pa.uint8()),
+  pa.field("timestamp", pa.int64()),
+])
+ENCODER = pa.schema([pa.field("angle", pa.float16()), pa.field("timestamp", pa.int64())])
+
+
+@pytest.fixture
+def episode_dir(tmp_path: str) -> str:
+    """Images at 0/20/40 ms and encoder values at 10/30 ms, image chunks rotated."""
+    images = StreamWriter(str(tmp_path), "image", max_bytes=1)
+    for i in range(3):
+        frame = np.full((4, 6, 3), i, dtype=np.uint8)
+        images.write(record_batch({"image": frame, "timestamp": i}, IMAGE), i * 20 * MS, seq=i)
+    encoder = StreamWriter(str(tmp_path), "encoder_data", "zstd")
+    for i in range(2):
+        batch = record_batch({"angle": np.float16(i), "timestamp": i}, ENCODER)
+        encoder.write(batch, (i * 20 + 10) * MS)
+    images.close()
+    encoder.close()
+    return str(tmp_path)
+
+
+def test_import_main() -> None:
+    """Test importing and running the main function."""
+    from dora_pika_recorder.replay import main
+
+    # Check that everything is working, and catch Dora RuntimeError
+    # as we're not running in a Dora dataflow.
+    with pytest.raises(RuntimeError):
+        main()
+
+
+def test_parse_speed() -> None:
+    assert parse_speed("1") == 1.0
+    assert parse_speed("4") == 4.0
+    assert parse_speed("max") == 0.0
+
+
+def test_replay_sends_recorded_batches_in_order(episode_dir: str) -> None:
+    """Outputs keep the recorded ids, schemas (with shape metadata), values and seq."""
+    node = FakeNode()
+    episode = Episode(episode_dir)
+    assert replay(node, episode, speed=0) == len(episode) == 5
+
+    assert [output_id for output_id, _, _ in node.sent] == [
+        "image", "encoder_data", "image", "encoder_data", "image",
+    ]
+    images = node.outputs("image")
+    for i, (batch, metadata) in enumerate(images):
+        assert batch.schema.equals(IMAGE, check_metadata=True)
+        assert batch.column("image").to_pylist()[0] == [i] * 72
+        assert metadata == {"seq": i}
+    assert node.outputs("encoder_data")[1][0].column("angle")[0].as_py() == 1.0
+    assert node.outputs("encoder_data")[1][1] == {}
+
+
+def test_replay_paces_at_speed(episode_dir: str) -> None:
+    """40 ms of recording take ~20 ms at 2x."""
+    started = time.perf_counter()
+    replay(FakeNode(), Episode(episode_dir, ["image"]), speed=2.0)
+    assert 0.018 <= time.perf_counter() - started < 0.2
+
+
+def test_replay_stops(episode_dir: str) -> None:
+    node = FakeNode([{"type": "STOP"}])
+    assert replay(node, Episode(episode_dir), speed=0) == 0
+
+
+def test_episode_recovers_only_on_request(tmp_path: str) -> None:
+    """Opening an episode never rewrites it; ``recover=True`` indexes a chunk left open."""
+    images = StreamWriter(str(tmp_path), "image")
+    for i in range(2):
+        frame = np.full((4, 6, 3), i, dtype=np.uint8)
+        images.write(record_batch({"image": frame, "timestamp": i}, IMAGE), i * MS, seq=i)
+    # No close: the only chunk has no footer and the stream no index.
+    with pytest.raises(FileNotFoundError):
+        Episode(str(tmp_path))
+    episode = Episode(str(tmp_path), recover=True)
+    assert len(episode) == 2
+    assert [seq for _, _, _, seq in episode.entries()] == [0, 1]
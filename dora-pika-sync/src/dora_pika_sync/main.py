@@ -0,0 +1,90 @@
+"""Time-synchronization node for the pika sensor outputs.
+
+Subscribes to any subset of the pika node outputs, buffers each stream and, on
+every ``tick``, emits one ``bundle`` with all streams sampled at a common
+reference time (see `dora_pika_sync.sync`). Skew statistics per stream are sent
+on ``sync_stats`` every ``SYNC_STATS_INTERVAL`` seconds.
+"""
+
+import logging
+import math
+import os
+import time
+
+from dora import Node
+from dora_pika_common.timing import StageTimer
+
+from dora_pika_sync.sync import RULES, Synchronizer, bundle_batch
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rules(rules: str) -> dict[str, str]:
+    """Parse ``"pose=slerp,encoder_data=linear"`` into a dict."""
+    parsed = {}
+    for item in filter(None, (part.strip() for part in rules.split(","))):
+        stream, _, rule = (part.strip() for part in item.partition("="))
+        if not stream or rule not in RULES:
+            raise ValueError(
+                f"SYNC_RULES entries must be <stream>=<rule> with a rule of {RULES}, got {item!r}.",
+            )
+        parsed[stream] = rule
+    return parsed
+
+
+def parse_tolerance(tolerance_ms: str) -> int:
+    """``SYNC_TOLERANCE_MS`` in ns."""
+    try:
+        tolerance = float(tolerance_ms)
+    except ValueError:
+        raise ValueError(f"SYNC_TOLERANCE_MS must be a number, got {tolerance_ms!r}.") from None
+    if not 0 <= tolerance < math.inf:
+        raise ValueError(f"SYNC_TOLERANCE_MS must be finite and not negative, got {tolerance_ms!r}.")
+    return int(tolerance * 1e6)
+
+
+def run(node: Node, synchronizer: Synchronizer, streams: list[str], stats: StageTimer) -> None:
+    """Buffer stream inputs and emit a bundle on every tick until STOP."""
+    for event in node:
+        if event["type"] == "INPUT" and event["id"] == "tick":
+            incomplete = synchronizer.incomplete
+            result = synchronizer.bundle(streams)
+            if result is not None:
+                t_ref, samples = result
+                node.send_output("bundle", bundle_batch(t_ref, samples), {"timestamp": t_ref})
+                for stream, sample in samples.items():
+                    stats.record(f"skew/{stream}", abs(sample.skew_ns) / 1e9)
+                stats.record("age", (time.time_ns() - t_ref) / 1e9)
+                stats.count("bundles")
+            elif synchronizer.incomplete > incomplete:
+                stats.count("incomplete")
+            stats.report(node)
+        elif event["type"] == "INPUT":
+            synchronizer.push(event["id"], event["value"], time.time_ns())
+        elif event["type"] == "STOP":
+            break
+
+
+def main() -> None:
+    """Main entry point"""
+    logging.basicConfig(level=logging.INFO)
+    streams = [s.strip() for s in os.getenv("SYNC_STREAMS", "").split(",") if s.strip()]
+    synchronizer = Synchronizer(
+        capacity=int(os.getenv("SYNC_BUFFER", "64")),
+        tolerance_ns=parse_tolerance(os.getenv("SYNC_TOLERANCE_MS", "100")),
+        rules=parse_rules(os.getenv("SYNC_RULES", "")),
+        reference=os.getenv("SYNC_REFERENCE", ""),
+    )
+    stats = StageTimer(
+        "pika_sync",
+        enabled=True,
+        interval=float(os.getenv("SYNC_STATS_INTERVAL", "1.0")),
+        output_id=os.getenv("SYNC_STATS_OUTPUT", "sync_stats"),
+    )
+    stats.install_signal_handler()
+    logger.info("Synchronizing %s", ", ".join(streams) or "every input")
+    run(Node(), synchronizer, streams, stats)
+
+
+if __name__ == "__main__":
+    main()
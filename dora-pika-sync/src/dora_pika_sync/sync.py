@@ -0,0 +1,218 @@
+"""Time alignment of pika sensor streams.
+
+Each input stream keeps a bounded ring buffer of ``(timestamp_ns, value)``
+where ``value`` is the one-row ``pa.StructArray`` delivered by dora and the
+timestamp comes from its ``timestamp`` column (receive time for outputs without
+one, e.g. the Vive). `Synchronizer.bundle` picks a reference time and samples
+every stream at it:
+
+- ``nearest``: the buffered value closest in time (default),
+- ``linear``: float columns interpolated between the two neighbours (gripper
+  encoder),
+- ``slerp``: like ``linear``, with the 4-element ``rotation`` quaternion
+  (w, x, y, z) spherically interpolated (Vive pose).
+
+An interpolated row carries the reference time in its ``timestamp`` column.
+Interpolation never extrapolates: past the newest value a stream falls back to
+``nearest``. A stream whose sample is further than ``tolerance_ns`` from the
+reference time makes the bundle incomplete, and it is not emitted.
+"""
+
+import collections
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pyarrow as pa
+from typing_extensions import Self
+
+RULES = ("nearest", "linear", "slerp")
+
+
+def slerp(q0: np.ndarray, q1: np.ndarray, t: float) -> np.ndarray:
+    """Spherical linear interpolation between unit quaternions ``q0`` and ``q1``."""
+    q0 = q0 / np.linalg.norm(q0)
+    q1 = q1 / np.linalg.norm(q1)
+    dot = float(np.dot(q0, q1))
+    if dot < 0.0:
+        # Take the shorter arc.
+        q1 = -q1
+        dot = -dot
+    if dot > 0.9995:
+        q = q0 + t * (q1 - q0)
+        return q / np.linalg.norm(q)
+    theta = np.arccos(dot)
+    return (np.sin((1.0 - t) * theta) * q0 + np.sin(t * theta) * q1) / np.sin(theta)
+
+
+def _is_float(arrow_type: pa.DataType) -> bool:
+    if pa.types.is_fixed_size_list(arrow_type) or pa.types.is_list(arrow_type):
+        arrow_type = arrow_type.value_type
+    return pa.types.is_floating(arrow_type)
+
+
+def _timestamp(value: pa.StructArray) -> Optional[int]:
+    if value.type.get_field_index("timestamp") < 0:
+        return None
+    return value.field("timestamp")[0].as_py()
+
+
+def interpolate(
+    before: pa.StructArray, after: pa.StructArray, t: float, rule: str, timestamp: int,
+) -> pa.StructArray:
+    """Row between ``before`` (t=0) and ``after`` (t=1) at ``timestamp``.
+
+    Columns that are not interpolated come from the nearer row.
+    """
+    nearer = before if t < 0.5 else after
+    arrays = []
+    for index, field in enumerate(before.type):
+        column = nearer.field(index)
+        if field.name == "timestamp":
+            column = pa.array([timestamp], type=pa.int64()).cast(field.type)
+        elif _is_float(field.type):
+            a = np.asarray(before.field(index).to_numpy(zero_copy_only=False)[0], dtype=np.float64)
+            b = np.asarray(after.field(index).to_numpy(zero_copy_only=False)[0], dtype=np.float64)
+            if rule == "slerp" and field.name == "rotation" and a.shape == (4,):
+                value = slerp(a, b, t)
+            else:
+                value = a + t * (b - a)
+            if value.ndim == 0:
+                # Scalars go through float64: pa.array rejects python floats for float16.
+                column = pa.array([float(value)], type=pa.float64()).cast(field.type)
+            else:
+                column = pa.array([value], type=field.type)
+        arrays.append(column)
+    return pa.StructArray.from_arrays(arrays, fields=list(before.type))
+
+
+@dataclass
+class Sample:
+    """One stream sampled at the reference time."""
+
+    value: pa.StructArray
+    timestamp: int
+    skew_ns: int
+
+
+class StreamBuffer:
+    """Bounded ring buffer of one stream's timestamped values."""
+
+    def __init__(self: Self, capacity: int, rule: str = "nearest") -> None:
+        if rule not in RULES:
+            raise ValueError(f"Sync rule must be one of {RULES}, got {rule!r}.")
+        self.rule = rule
+        self.entries: collections.deque[tuple[int, pa.StructArray]] = collections.deque(
+            maxlen=capacity,
+        )
+
+    def push(self: Self, value: pa.StructArray, received_ns: int) -> int:
+        """Buffer ``value``; return the timestamp it was filed under."""
+        timestamp = _timestamp(value) or received_ns
+        if self.entries and timestamp < self.entries[-1][0]:
+            # Out of order: keep the buffer sorted.
+            entries = sorted([*self.entries, (timestamp, value)], key=lambda entry: entry[0])
+            self.entries.clear()
+            self.entries.extend(entries)
+        else:
+            self.entries.append((timestamp, value))
+        return timestamp
+
+    @property
+    def newest(self: Self) -> Optional[int]:
+        return self.entries[-1][0] if self.entries else None
+
+    def sample(self: Self, t_ref: int) -> Optional[Sample]:
+        """Sample the stream at ``t_ref`` according to its rule."""
+        if not self.entries:
+            return None
+        after = next((i for i, (ts, _) in enumerate(self.entries) if ts >= t_ref), None)
+        if after is None:
+            ts, value = self.entries[-1]
+            return Sample(value, ts, ts - t_ref)
+        ts_after, value_after = self.entries[after]
+        if after == 0 or ts_after == t_ref:
+            return Sample(value_after, ts_after, ts_after - t_ref)
+        ts_before, value_before = self.entries[after - 1]
+        if self.rule == "nearest":
+            if t_ref - ts_before <= ts_after - t_ref:
+                return Sample(value_before, ts_before, ts_before - t_ref)
+            return Sample(value_after, ts_after, ts_after - t_ref)
+        t = (t_ref - ts_before) / (ts_after - ts_before)
+        return Sample(interpolate(value_before, value_after, t, self.rule, t_ref), t_ref, 0)
+
+
+class Synchronizer:
+    """Aligns several streams at a common reference time."""
+
+    def __init__(
+        self: Self,
+        capacity: int = 64,
+        tolerance_ns: int = 100_000_000,
+        rules: Optional[dict[str, str]] = None,
+        reference: str = "",
+    ) -> None:
+        if tolerance_ns < 0:
+            raise ValueError(f"Sync tolerance must not be negative, got {tolerance_ns} ns.")
+        for rule in (rules or {}).values():
+            if rule not in RULES:
+                raise ValueError(f"Sync rule must be one of {RULES}, got {rule!r}.")
+        self.capacity = capacity
+        self.tolerance_ns = tolerance_ns
+        self.rules = rules or {}
+        self.reference = reference
+        self.streams: dict[str, StreamBuffer] = {}
+        self.last_reference: Optional[int] = None
+        self.incomplete = 0
+
+    def push(self: Self, stream: str, value: pa.StructArray, received_ns: int) -> int:
+        buffer = self.streams.get(stream)
+        if buffer is None:
+            buffer = self.streams[stream] = StreamBuffer(
+                self.capacity, self.rules.get(stream, "nearest"),
+            )
+        return buffer.push(value, received_ns)
+
+    def reference_time(self: Self) -> Optional[int]:
+        """Newest reference-stream timestamp, else the oldest of the newest timestamps.
+
+        The latter is the latest instant every stream has already covered, so the
+        interpolated streams need no extrapolation.
+        """
+        if self.reference:
+            buffer = self.streams.get(self.reference)
+            return buffer.newest if buffer is not None else None
+        newest = [buffer.newest for buffer in self.streams.values()]
+        return min(newest) if newest else None
+
+    def bundle(self: Self, expected: Optional[list[str]] = None) -> Optional[tuple[int, dict]]:
+        """Return ``(t_ref, {stream: Sample})`` for a new reference time, or None.
+
+        ``expected`` lists the streams a bundle must contain (default: all seen).
+        """
+        expected = expected or list(self.streams)
+        if not expected or any(stream not in self.streams for stream in expected):
+            return None
+        t_ref = self.reference_time()
+        if t_ref is None or (self.last_reference is not None and t_ref <= self.last_reference):
+            return None
+        samples = {stream: self.streams[stream].sample(t_ref) for stream in expected}
+        if any(sample is None or abs(sample.skew_ns) > self.tolerance_ns
+               for sample in samples.values()):
+            self.incomplete += 1
+            return None
+        self.last_reference = t_ref
+        return t_ref, samples
+
+
+def bundle_batch(t_ref: int, samples: dict[str, Sample]) -> pa.RecordBatch:
+    """One-row batch: ``timestamp``, ``skew_ns`` per stream, then one struct per stream."""
+    names = list(samples)
+    skew = pa.StructArray.from_arrays(
+        [pa.array([samples[name].skew_ns], type=pa.int64()) for name in names], names=names,
+    )
+    arrays = [pa.array([t_ref], type=pa.int64()), skew]
+    arrays += [samples[name].value for name in names]
+    fields = [pa.field("timestamp", pa.int64()), pa.field("skew_ns", skew.type)]
+    fields += [pa.field(name, samples[name].value.type) for name in names]
+    return pa.RecordBatch.from_arrays(arrays, schema=pa.schema(fields))
@@ -0,0 +1,120 @@
+"""Test module for dora_pika_sync package."""
+
+import numpy as np
+import pyarrow as pa
+import pytest
+from dora_pika_client import tensor
+from dora_pika_common.arrow import record_batch, tensor_field
+from dora_pika_common.testing import FakeNode
+from dora_pika_common.timing import StageTimer
+
+from dora_pika_sync.main import parse_rules, parse_tolerance, run
+from dora_pika_sync.sync import Synchronizer, slerp
+
+MS = 1_000_000
+IMAGE = pa.schema([tensor_field("image", (2, 3, 3), pa.uint8()), pa.field("timestamp", pa.int64())])
+GRIPPER = pa.schema([pa.field("angle", pa.float16()), pa.field("timestamp", pa.int64())])
+POSE = pa.schema([
+  pa.field("position", pa.list_(pa.float64(), 3)),
+  pa.field("rotation", pa.list_(pa.float64(), 4)),
+])
+
+
+def _row(schema: pa.Schema, **columns: object) -> pa.StructArray:
+    batch = record_batch(columns, schema)
+    return pa.StructArray.from_arrays(batch.columns, fields=list(schema))
+
+
+def _yaw(angle: float) -> list[float]:
+    return [np.cos(angle / 2), 0.0, 0.0, np.sin(angle / 2)]
+
+
+def test_import_main() -> None:
+    """Test importing and running the main function."""
+    from dora_pika_sync.main import main
+
+    # Check that everything is working, and catch Dora RuntimeError
+    # as we're not running in a Dora dataflow.
+    with pytest.raises(RuntimeError):
+        main()
+
+
+def test_slerp_halfway() -> None:
+    """Halfway between 0 and 90 degrees of yaw is 45 degrees, also via the short arc."""
+    q = slerp(np.array(_yaw(0.0)), np.array(_yaw(np.pi / 2)), 0.5)
+    np.testing.assert_allclose(q, _yaw(np.pi / 4), atol=1e-9)
+    q = slerp(np.array(_yaw(0.0)), -np.array(_yaw(np.pi / 2)), 0.5)
+    np.testing.assert_allclose(q, _yaw(np.pi / 4), atol=1e-9)
+
+
+def test_bundle_interpolates_at_the_reference_frame() -> None:
+    """Gripper is linear, pose is SLERPed, the image is the reference."""
+    sync = Synchronizer(rules=parse_rules("pose=slerp, encoder_data=linear"), reference="image")
+    for ms, angle in ((0, 0.0), (10, 10.0), (20, 20.0)):
+        sync.push("encoder_data", _row(GRIPPER, angle=np.float16(angle), timestamp=ms * MS), 0)
+    # The Vive pose has no timestamp column: it is filed under its receive time.
+    sync.push("pose", _row(POSE, position=[0.0, 0.0, 0.0], rotation=_yaw(0.0)), 10 * MS)
+    sync.push("pose", _row(POSE, position=[1.0, 0.0, 0.0], rotation=_yaw(np.pi / 2)), 20 * MS)
+    image = np.arange(18, dtype=np.uint8).reshape(2, 3, 3)
+    sync.push("image", _row(IMAGE, image=image, timestamp=15 * MS), 16 * MS)
+
+    t_ref, samples = sync.bundle()
+    assert t_ref == 15 * MS
+    assert samples["encoder_data"].value.field("angle")[0].as_py() == 15.0
+    # Interpolated rows are stamped with the reference time, not a neighbour's.
+    assert samples["encoder_data"].value.field("timestamp")[0].as_py() == 15 * MS
+    pose = samples["pose"].value
+    assert pose.field("position")[0].as_py() == [0.5, 0.0, 0.0]
+    np.testing.assert_allclose(pose.field("rotation")[0].as_py(), _yaw(np.pi / 4), atol=1e-9)
+    assert sync.bundle() is None  # no new reference frame yet
+
+
+def test_invalid_rules_fail_at_startup() -> None:
+    """Unknown rules and bad tolerances are rejected before the first input."""
+    with pytest.raises(ValueError, match="cubic"):
+        parse_rules("pose=cubic")
+    with pytest.raises(ValueError, match="pose"):
+        parse_rules("pose")
+    assert parse_tolerance("2.5") == 2_500_000
+    for tolerance in ("-1", "ten", "nan", "inf"):
+        with pytest.raises(ValueError, match="SYNC_TOLERANCE_MS"):
+            parse_tolerance(tolerance)
+    with pytest.raises(ValueError, match="cubic"):
+        Synchronizer(rules={"pose": "cubic"})
+    with pytest.raises(ValueError, match="negative"):
+        Synchronizer(tolerance_ns=-1)
+
+
+def test_stale_stream_makes_bundle_incomplete() -> None:
+    """A stream further than the tolerance from the reference time blocks the bundle."""
+    sync = Synchronizer(tolerance_ns=50 * MS, reference="image")
+    sync.push("encoder_data", _row(GRIPPER, angle=np.float16(1.0), timestamp=0), 0)
+    sync.push("image", _row(IMAGE, image=np.zeros((2, 3, 3), np.uint8), timestamp=200 * MS), 0)
+    assert sync.bundle() is None
+    assert sync.incomplete == 1
+
+
+def test_run_emits_bundles_and_skew_stats() -> None:
+    """Every tick with a new reference time emits one bundle, decodable per stream."""
+    image = np.arange(18, dtype=np.uint8).reshape(2, 3, 3)
+    events = [
+        {"type": "INPUT", "id": "encoder_data", "metadata": {},
+         "value": _row(GRIPPER, angle=np.float16(3.0), timestamp=10 * MS)},
+        {"type": "INPUT", "id": "image", "metadata": {},
+         "value": _row(IMAGE, image=image, timestamp=12 * MS)},
+        {"type": "INPUT", "id": "tick"},
+        {"type": "INPUT", "id": "tick"},
+        {"type": "STOP"},
+    ]
+    node = FakeNode(events)
+    stats = StageTimer("pika_sync", enabled=True, interval=0.0, output_id="sync_stats")
+    run(node, Synchronizer(), ["image", "encoder_data"], stats)
+
+    bundles = node.outputs("bundle")
+    assert len(bundles) == 1
+    batch, metadata = bundles[0]
+    assert metadata == {"timestamp": 10 * MS}
+    assert batch.column("skew_ns")[0].as_py() == {"image": 2 * MS, "encoder_data": 0}
+    np.testing.assert_array_equal(tensor(batch.column("image"), "image"), image)
+    assert node.outputs("sync_stats")
+    assert stats.snapshot()["counters"] == {"bundles": 1}
@@ -2,18 +2,29 @@ import logging
 import os
 import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 
 import numpy as np
-import pyarrow as pa
-import pyaudio
 from dora import Node
-from typing_extensions import Self
+from dora_pika_common.arrow import record_batch
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.timing import StageTimer
 
-from dora_pyaudio.pa_schema import pa_audio_schema as audio_schema
+from dora_pyaudio.pa_schema import audio_schema
+
+# hardware (default) or sim: a simulated microphone replacing pyaudio
+BACKEND = os.getenv("BACKEND", "hardware")
+if BACKEND == "sim":
+    from dora_pyaudio import sim as pyaudio
+else:
+    import pyaudio
 
 logger = logging.getLogger(__name__)
 
+# Opt-in per-stage timing (STAGE_TIMING=1), see dora_pika_common.timing
+stage_timer = StageTimer("pyaudio")
+
 # 配置参数
 FORMAT = pyaudio.paInt16  # 16-bit PCM
 CHANNELS = int(os.getenv("CHANNELS", "1"))
@@ -23,38 +34,18 @@ CHUNK = int(os.getenv("CHUNK", "1024")) # 每次读取的帧数
 
 @dataclass
 class AudioData:
-    """Stores audio data with thread-safe access."""
+    """Audio chunk slot, exchanged through a LatestValue."""
 
-    _lock: threading.Lock = field(default_factory=threading.Lock)
-    _has_data: bool = False
     data: bytes = b''
     sample_rate: int = RATE
     channels: int = CHANNELS
     format: int = FORMAT
     chunk_size: int = CHUNK
     timestamp: int = 0
-    def update_data(self: Self, data: bytes, timestamp: int) -> None:
-        """Update audio data."""
-        with self._lock:
-            self.data = data
-            self._has_data = True
-            self.timestamp = timestamp
-    def read_data(self: Self) -> tuple[bool, bytes, int, int, int, int, int]:
-        """Read audio data."""
-        with self._lock:
-            return (
-                self._has_data,
-                self.data,
-                self.sample_rate,
-                self.channels,
-                self.format,
-                self.chunk_size,
-                self.timestamp
-            )
 
 
 def capture_audio_data(
-    audio_data: AudioData,
+    audio_store: LatestValue[AudioData],
     audio_close_event: threading.Event,
 ) -> None:
     """Records audio from microphone."""
@@ -74,11 +65,15 @@ def capture_audio_data(
         frames = []
         while not audio_close_event.is_set():
             # 读取音频数据
-            data = stream.read(CHUNK, exception_on_overflow=False)
+            with stage_timer.stage("read"):
+                data = stream.read(CHUNK, exception_on_overflow=False)
             frames.append(data)
-            timestamp = time.time_ns()
             # 更新音频数据
-            audio_data.update_data(data, timestamp)
+            audio = audio_store.acquire()
+            audio.data = data
+            audio.timestamp = time.time_ns()
+            audio_store.publish()
+            stage_timer.count("captured")
 
     except Exception as e:
         logger.exception("audio error: %s", e)
@@ -92,38 +87,37 @@ def capture_audio_data(
 
 
 def send_audio_through_dora(
-    audio_data: AudioData,
+    audio_store: LatestValue[AudioData],
     dora_stop_event: threading.Event,
     audio_close_event: threading.Event,
 ) -> None:
     """Sends audio data via Dora outputs."""
     node = Node()
+    publisher = Publisher(node, {"audio_data": audio_store}, timer=stage_timer)
     try:
-        for event in node:
+        for event in publisher:
             if  audio_close_event.is_set():
                 # 发送录制完成状态
                 break
 
             if event["type"] == "INPUT" and event["id"] == "tick":
-                has_data, data, sample_rate, channels, format, chunk_size, timestamp = audio_data.read_data()
-                if has_data:
+                seq, audio = publisher.read("audio_data")
+                if audio is not None:
                     # 将音频数据发送出去
-                    audio_array = np.frombuffer(data, dtype=np.int16)
-                    audio_batch = pa.record_batch(
+                    audio_array = np.frombuffer(audio.data, dtype=np.int16)
+                    audio_batch = record_batch(
                         {
-                            "audio_data": [audio_array],
-                            "timestamp": [timestamp],
-                            "sample_rate": [sample_rate],
-                            "channels": [channels],
-                            "format": [format],
-                            "chunk_size": [chunk_size],
+                            "audio_data": audio_array,
+                            "timestamp": audio.timestamp,
+                            "sample_rate": audio.sample_rate,
+                            "channels": audio.channels,
+                            "format": audio.format,
+                            "chunk_size": audio.chunk_size,
 
                         },
-                        schema = audio_schema,
+                        schema = audio_schema(audio.chunk_size, audio.channels),
                     )
-                    node.send_output("audio_data", audio_batch)
-
-                time.sleep(0.001)  # 避免CPU使用率过高
+                    publisher.send("audio_data", audio_batch, seq)
 
             elif event["type"] == "STOP":
                 dora_stop_event.set()
@@ -141,9 +135,10 @@ def send_audio_through_dora(
 if __name__ == "__main__":
     # 配置日志
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    stage_timer.install_signal_handler()
 
     # 创建事件和数据存储
-    audio_data = AudioData()
+    audio_store = LatestValue(AudioData)
     dora_stop_event = threading.Event()
     audio_close_event = threading.Event()
 
@@ -152,11 +147,11 @@ if __name__ == "__main__":
     # 启动线程
     audio_thread = threading.Thread(
         target=capture_audio_data,
-        args=(audio_data,  audio_close_event),
+        args=(audio_store,  audio_close_event),
     )
     dora_thread = threading.Thread(
         target=send_audio_through_dora,
-        args=(audio_data, dora_stop_event, audio_close_event),
+        args=(audio_store, dora_stop_event, audio_close_event),
     )
 
     audio_thread.start()
@@ -1,15 +1,22 @@
+from functools import lru_cache
+
 import pyarrow as pa
+from dora_pika_common.arrow import tensor_field
+
 
-pa_audio = pa.list_(pa.int16(), 1024)
+# 定义 audio_schema，按 CHUNK 和 CHANNELS 构建
+@lru_cache
+def audio_schema(chunk_size: int, channels: int = 1) -> pa.Schema:
+  """Audio schema for chunks of ``chunk_size`` frames of ``channels`` int16 samples."""
+  return pa.schema([
+    tensor_field("audio_data", (chunk_size, channels), pa.int16()),
+    pa.field("timestamp", pa.int64()),
+    pa.field("sample_rate", pa.int32()),
+    pa.field("channels", pa.int32()),
+    pa.field("format", pa.int32()),
+    pa.field("chunk_size", pa.int32()),
+  ])
 
-# 定义 image_schema
-pa_audio_fields = [
-  pa.field("audio_data", pa_audio),
-  pa.field("timestamp", pa.int64()),
-  pa.field("sample_rate", pa.int32()),
-  pa.field("channels", pa.int32()),
-  pa.field("format", pa.int32()),
-  pa.field("chunk_size", pa.int32()),
 
-]
-pa_audio_schema = pa.schema(pa_audio_fields)
+# 默认 1024 帧单声道的 schema
+pa_audio_schema = audio_schema(1024)
@@ -0,0 +1,58 @@
+"""Simulated microphone backend (``BACKEND=sim``).
+
+Implements the subset of the ``pyaudio`` API used by the node. `SimStream.read`
+returns 16-bit PCM of a phase-continuous 440 Hz tone (``SIM_TONE``), paced so
+that chunks arrive at ``rate / frames_per_buffer`` Hz like a real device.
+"""
+
+import os
+
+import numpy as np
+from dora_pika_common.sim import Pacer
+from typing_extensions import Self
+
+paInt16 = 8  # noqa: N816  (same value as pyaudio.paInt16)
+
+
+class SimStream:
+    """Stand-in for ``pyaudio.Stream`` (input only)."""
+
+    def __init__(self: Self, channels: int, rate: int, frames_per_buffer: int) -> None:
+        self.channels = channels
+        self.rate = rate
+        self.tone = float(os.getenv("SIM_TONE", "440"))
+        self._pacer = Pacer(rate / frames_per_buffer)
+        self._position = 0
+        self.active = True
+
+    def read(self: Self, num_frames: int, exception_on_overflow: bool = True) -> bytes:
+        self._pacer.wait()
+        t = (self._position + np.arange(num_frames)) / self.rate
+        self._position += num_frames
+        wave = (0.3 * 32767 * np.sin(2.0 * np.pi * self.tone * t)).astype(np.int16)
+        return np.repeat(wave, self.channels).tobytes()
+
+    def stop_stream(self: Self) -> None:
+        self.active = False
+
+    def close(self: Self) -> None:
+        self.active = False
+
+
+class PyAudio:
+    """Stand-in for ``pyaudio.PyAudio``."""
+
+    def open(  # noqa: A003
+        self: Self,
+        format: int = paInt16,  # noqa: A002
+        channels: int = 1,
+        rate: int = 44100,
+        input: bool = True,  # noqa: A002
+        frames_per_buffer: int = 1024,
+    ) -> SimStream:
+        if format != paInt16:
+            raise ValueError("the simulated microphone only produces paInt16")
+        return SimStream(channels, rate, frames_per_buffer)
+
+    def terminate(self: Self) -> None:
+        pass
@@ -0,0 +1,6 @@
+"""Runs the tests on the simulated backend, without the hardware SDK."""
+
+import os
+
+# The node module picks its backend from BACKEND when it is imported.
+os.environ["BACKEND"] = "sim"
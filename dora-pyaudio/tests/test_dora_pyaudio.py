@@ -11,3 +11,34 @@ def test_import_main() -> None:
     # as we're not running in a Dora dataflow.
     with pytest.raises(RuntimeError):
         main()
+
+
+def test_sim_capture_to_publish(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Runs the capture and send threads against the simulated microphone."""
+    import threading
+
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    import dora_pyaudio.main as audio
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(audio, "Node", lambda: node)
+
+    audio_store = LatestValue(audio.AudioData)
+    dora_stop_event = threading.Event()
+    audio_close_event = threading.Event()
+    capture = threading.Thread(
+        target=audio.capture_audio_data, args=(audio_store, audio_close_event),
+    )
+    capture.start()
+    assert wait_for_data(audio_store)
+    audio.send_audio_through_dora(audio_store, dora_stop_event, audio_close_event)
+    audio_close_event.set()
+    capture.join(timeout=2.0)
+
+    outputs = node.outputs("audio_data")
+    assert outputs
+    samples = outputs[-1][0].column("audio_data")[0].values.to_numpy()
+    assert samples.size == audio.CHUNK * audio.CHANNELS
+    assert samples.any()
@@ -0,0 +1,96 @@
+"""Calibration side channel of the RealSense node.
+
+Intrinsics, distortion, depth scale and extrinsics only change when the
+stream configuration does, so they are not repeated on every frame. A
+`CameraInfo` holds one `StreamInfo` per published stream (``color`` and
+``depth``) and a ``generation`` that increments whenever one of them changes.
+Image and depth batches carry only that generation (column ``camera_info``).
+The full calibration goes out on the ``camera_info`` output
+(`pa_camera_info_schema`, one row per stream) when the generation changes, and
+is re-sent every ``resend_interval`` seconds for subscribers that start late.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import pyarrow as pa
+from typing_extensions import Self
+
+from dora_pyrealsense.pa_schema import pa_camera_info_schema
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    """Calibration of one published stream.
+
+    ``intrinsics`` are ``(fx, fy, ppx, ppy)``; ``extrinsics`` map this stream's
+    camera coordinates to the color camera as a row-major rotation followed by
+    the translation in metres (identity once the streams are aligned).
+    """
+    stream: str  # color | depth
+    width: int
+    height: int
+    intrinsics: tuple[float, ...]
+    model: str  # librealsense distortion model, e.g. brown_conrady
+    coeffs: tuple[float, ...]
+    extrinsics: tuple[float, ...]
+    depth_scale: float  # metres per depth unit of the device
+
+
+class CameraInfo:
+    """Latest calibration of one camera, updated by the capture threads."""
+
+    def __init__(self: Self, serial_number: str = "") -> None:
+        self.serial_number = serial_number
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._streams: dict[str, StreamInfo] = {}
+        self._sent_generation = 0
+        self._next_resend = 0.0
+
+    def update(self: Self, *infos: StreamInfo) -> int:
+        """Store ``infos``; bump and return the generation if any of them changed."""
+        with self._lock:
+            changed = [info for info in infos if self._streams.get(info.stream) != info]
+            if changed:
+                self._streams.update((info.stream, info) for info in changed)
+                self.generation += 1
+            return self.generation
+
+    def record_batch(self: Self) -> pa.RecordBatch:
+        """Current calibration, one row per stream."""
+        with self._lock:
+            generation = self.generation
+            infos = list(self._streams.values())
+        return pa.RecordBatch.from_pylist(
+            [
+                {
+                    "serial_number": self.serial_number,
+                    "generation": generation,
+                    "stream": info.stream,
+                    "width": info.width,
+                    "height": info.height,
+                    "intrinsics": list(info.intrinsics),
+                    "model": info.model,
+                    "coeffs": list(info.coeffs),
+                    "extrinsics": list(info.extrinsics),
+                    "depth_scale": info.depth_scale,
+                }
+                for info in infos
+            ],
+            schema=pa_camera_info_schema,
+        )
+
+    def due(self: Self, resend_interval: float) -> Optional[pa.RecordBatch]:
+        """The batch to send now: on a new generation or once ``resend_interval`` elapsed."""
+        now = time.perf_counter()
+        if not self.generation:
+            return None
+        if self.generation == self._sent_generation and now < self._next_resend:
+            return None
+        batch = self.record_batch()
+        self._sent_generation = batch.column("generation")[0].as_py()
+        self._next_resend = now + resend_interval
+        return batch
@@ -0,0 +1,84 @@
+"""Batched accelerometer and gyro samples of a RealSense D4x5i.
+
+The motion streams run at 63-400 Hz, far above the frame rate. librealsense
+delivers every sample to a callback, which appends it to an `ImuBuffer`: one
+preallocated column per value, so a sample costs a few array stores and no
+Python object survives it. The sender drains the buffer on every send and
+publishes all samples since the previous send as one multi-row batch
+(`pa_imu_schema`), sorted by stream then timestamp.
+"""
+
+import threading
+from typing import Optional
+
+import numpy as np
+import pyarrow as pa
+from typing_extensions import Self
+
+from dora_pyrealsense.pa_schema import pa_imu_schema
+
+IMU_STREAMS = ("accel", "gyro")
+
+
+class ImuBuffer:
+    """Columnar sample buffer filled by the SDK callback, drained by the sender.
+
+    When ``capacity`` samples of a stream are waiting (the sender stalled), new
+    samples of that stream are dropped and counted in `dropped`.
+    """
+
+    def __init__(self: Self, serial_number: str = "", capacity: int = 4096) -> None:
+        self.serial_number = serial_number
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._timestamps = {s: np.zeros(capacity, dtype=np.int64) for s in IMU_STREAMS}
+        self._numbers = {s: np.zeros(capacity, dtype=np.int64) for s in IMU_STREAMS}
+        self._values = {s: np.zeros((capacity, 3), dtype=np.float32) for s in IMU_STREAMS}
+        self._counts = dict.fromkeys(IMU_STREAMS, 0)
+        self.dropped = dict.fromkeys(IMU_STREAMS, 0)
+        self.seq = 0
+
+    def add(
+        self: Self, stream: str, timestamp: int, frame_number: int, x: float, y: float, z: float,
+    ) -> None:
+        """Append one sample of ``stream`` (SDK callback thread)."""
+        with self._lock:
+            index = self._counts[stream]
+            if index == self.capacity:
+                self.dropped[stream] += 1
+                return
+            self._timestamps[stream][index] = timestamp
+            self._numbers[stream][index] = frame_number
+            self._values[stream][index] = (x, y, z)
+            self._counts[stream] = index + 1
+
+    def drain(self: Self) -> Optional[pa.RecordBatch]:
+        """All samples since the last drain as one batch; None if there are none."""
+        with self._lock:
+            counts = {stream: count for stream, count in self._counts.items() if count}
+            if not counts:
+                return None
+            timestamps = np.concatenate([self._timestamps[s][:n] for s, n in counts.items()])
+            numbers = np.concatenate([self._numbers[s][:n] for s, n in counts.items()])
+            values = np.concatenate([self._values[s][:n] for s, n in counts.items()])
+            self._counts = dict.fromkeys(IMU_STREAMS, 0)
+        self.seq += 1
+        stream_index = np.array([IMU_STREAMS.index(s) for s in counts], dtype=np.int8)
+        streams = pa.DictionaryArray.from_arrays(
+            np.repeat(stream_index, list(counts.values())), pa.array(IMU_STREAMS),
+        )
+        serials = pa.DictionaryArray.from_arrays(
+            np.zeros(len(timestamps), dtype=np.int8), pa.array([self.serial_number]),
+        )
+        return pa.RecordBatch.from_arrays(
+            [
+                serials,
+                streams,
+                pa.array(timestamps),
+                pa.array(numbers),
+                pa.array(values[:, 0]),
+                pa.array(values[:, 1]),
+                pa.array(values[:, 2]),
+            ],
+            schema=pa_imu_schema,
+        )
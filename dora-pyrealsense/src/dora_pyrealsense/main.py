@@ -2,126 +2,289 @@
 
 This module provides a Dora node that sends pyrealsense data, include image, depth.
 """
+import contextlib
 import logging
 import os
+import queue
 import threading
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
+from functools import partial
+from typing import Callable, Optional, Sequence
 
 import cv2
 import numpy as np
 import pyarrow as pa
-import pyrealsense2 as rs
 from dora import Node
-from pa_schema import pa_depth_schema as depth_schema
-from pa_schema import pa_image_schema as image_schema
+from dora_pika_common.arrow import COMPRESSED_ENCODINGS, record_batch
+from dora_pika_common.depth_codec import DEPTH_CODECS, encode_depth
+from dora_pika_common.encode import DEFAULT_QUALITY, EncodePool, encode_image, encode_params
+from dora_pika_common.frames import FLIP_CODES, FramePool, clamp_into, transform_into
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.timing import StageTimer
 from typing_extensions import Self
 
+from dora_pyrealsense.camera_info import CameraInfo, StreamInfo
+from dora_pyrealsense.imu import ImuBuffer
+from dora_pyrealsense.pa_schema import (
+    depth_schema,
+    image_schema,
+    pa_stats_schema,
+    pointcloud_schema,
+)
+from dora_pyrealsense.pointcloud import PointCloudConfig, deproject_points
+
+# hardware (default) or sim: a deterministic stand-in for pyrealsense2
+BACKEND = os.getenv("BACKEND", "hardware")
+if BACKEND == "sim":
+    from dora_pyrealsense import sim as rs
+else:
+    import pyrealsense2 as rs
+
 logger = logging.getLogger(__name__)
 
+# ALIGN: depth_to_color (rs.align to color, default), color_to_depth, or none
+# (raw streams; align on the consumer side with dora_pika_client.align).
+ALIGN_MODES = ("depth_to_color", "color_to_depth", "none")
+# inter_cam_sync_mode values of the D400 series
+SYNC_MODES = {"default": 0, "master": 1, "slave": 2, "full_slave": 3}
+IDENTITY = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0]
+
+# Opt-in per-stage timing (STAGE_TIMING=1), see dora_pika_common.timing
+stage_timer = StageTimer("pyrealsense")
+
 @dataclass
 class ImageData:
-    """Stores Image data from Realsense with thread-safe access."""
-    _lock: threading.Lock = field(default_factory=threading.Lock)
-    _has_data: bool = False
+    """Image slot from Realsense, exchanged through a LatestValue."""
     frame: np.ndarray = field(default_factory=lambda: np.zeros((480, 640, 3), dtype=np.uint8))
     width: int = 640
     height: int = 480
     encoding: str = "rgb8"
     timestamp: int = 0
+    host_timestamp: int = 0
+    frame_number: int = 0
     serial_number: str = ""
-    resolution: list[int] = field(default_factory=lambda: [0, 0])
-    focal_length: list[int] = field(default_factory=lambda: [0, 0])
+    camera_info: int = 0  # CameraInfo generation
+    quality: int = 0  # of compressed encodings
+    encode_ns: int = 0
 
-    def update_data(
-        self: Self,
-        serial_number: str,
-        frame: np.ndarray,
-        width: int,
-        height: int,
-        encoding: str,
-        timestamp: int,
-        resolution: list[int],
-        focal_length: list[int],
-    ) -> None:
-        """更新数据"""
-        with self._lock:
-            self.serial_number = serial_number
-            self.frame = frame
-            self.width = width
-            self.height = height
-            self.encoding = encoding
-            self.timestamp = timestamp
-            self.resolution = resolution
-            self.focal_length = focal_length
-            self._has_data = True
-
-
-    def read_data(self: Self) -> tuple[bool, str, np.ndarray, int, int, str, int, int, list[int], list[int]]:
-        """读取Image数据"""
-        with self._lock:
-            return (
-                self._has_data,
-                self.serial_number,
-                self.frame.copy(),
-                self.width,
-                self.height,
-                self.encoding,
-                self.timestamp,
-                self.resolution,
-                self.focal_length,
-            )
 
 @dataclass
 class DepthData:
-    """Stores Depth data from Realsense with thread-safe access."""
-    _lock: threading.Lock = field(default_factory=threading.Lock)
-    _has_data: bool = False
+    """Depth slot from Realsense, exchanged through a LatestValue."""
     frame: np.ndarray = field(default_factory=lambda: np.zeros((480, 640), dtype=np.uint16))
     width: int = 640
     height: int = 480
     encoding: str = "mono16"
     timestamp: int = 0
+    host_timestamp: int = 0
+    frame_number: int = 0
     serial_number: str = ""
+    camera_info: int = 0  # CameraInfo generation
+    intrinsics: tuple[float, ...] = (0.0, 0.0, 0.0, 0.0)  # of this frame, for the point cloud
+    depth_scale: float = 0.001
+    codec: str = ""
+    encoded: Optional[np.ndarray] = None  # frame compressed with ``codec``
+
+
+@dataclass
+class PointCloudData:
+    """Point cloud slot deprojected from a depth frame, exchanged through a LatestValue."""
+    points: np.ndarray = field(default_factory=lambda: np.zeros((0, 3), dtype=np.float32))
+    layout: str = "xyz"
+    timestamp: int = 0
+    host_timestamp: int = 0
+    frame_number: int = 0
+    serial_number: str = ""
+
+
+@dataclass
+class StreamGeometry:
+    """Calibration of the published frames, before any depth filter."""
+    image: StreamInfo
+    depth: StreamInfo
+
+
+class FrameCounter:
+    """Detects dropped and duplicate frames from a stream's frame numbers."""
+
+    def __init__(self: Self, stream: str) -> None:
+        self.stream = stream
+        self.last = -1
+        self.captured = 0
+        self.dropped = 0
+        self.duplicate = 0
+
+    def update(self: Self, number: int) -> int:
+        """Record frame ``number``; return how many frames were skipped before it."""
+        self.captured += 1
+        if number == self.last:
+            self.duplicate += 1
+            stage_timer.count(f"duplicate/{self.stream}")
+            return 0
+        gap = number - self.last - 1 if 0 <= self.last < number else 0
+        self.last = number
+        if gap:
+            self.dropped += gap
+            stage_timer.count(f"dropped/{self.stream}", gap)
+            logger.warning(
+                "%s: %d frame(s) dropped before frame %d (%d total)",
+                self.stream, gap, number, self.dropped,
+            )
+        return gap
+
+
+class FrameStats:
+    """Frame accounting of one camera, filled by its capture thread.
 
-    def update_data(
+    Sent as the ``stats`` output (`pa_stats_schema`), one row per output, with
+    the publisher's ``overwritten`` counts.
+    """
+
+    def __init__(
         self: Self,
-        serial_number: str,
-        frame: np.ndarray,
-        width: int,
-        height: int,
-        timestamp: int,
+        serial_number: str = "",
+        queue_size: int = 0,
+        image_output: str = "image",
+        depth_output: str = "depth",
     ) -> None:
-        """Update depth data."""
-        with self._lock:
-            self.serial_number = serial_number
-            self.frame = frame
-            self.width = width
-            self.height = height
-            self.timestamp = timestamp
-            self._has_data = True
-
-    def read_data(self: Self) -> tuple[bool, str, np.ndarray, int, int, str, int]:
-        """Read depth data."""
-        with self._lock:
-            return (
-                self._has_data,
-                self.serial_number,
-                self.frame.copy(),
-                self.width,
-                self.height,
-                self.encoding,
-                self.timestamp,
-            )
+        self.serial_number = serial_number
+        self.queue_size = queue_size
+        self.color = FrameCounter("color")
+        self.depth = FrameCounter("depth")
+        self.outputs = {image_output: self.color, depth_output: self.depth}
+
+    def rows(self: Self, overwritten: dict[str, int]) -> list[dict]:
+        return [
+            {
+                "serial_number": self.serial_number,
+                "output": output_id,
+                "captured": counter.captured,
+                "dropped": counter.dropped,
+                "duplicate": counter.duplicate,
+                "overwritten": overwritten.get(output_id, 0),
+                "queue_size": self.queue_size,
+            }
+            for output_id, counter in self.outputs.items()
+        ]
+
+
+def stats_record_batch(
+    frame_stats: list[FrameStats], overwritten: dict[str, int],
+) -> pa.RecordBatch:
+    """``stats`` output batch of one or more cameras."""
+    rows = [row for stats in frame_stats for row in stats.rows(overwritten)]
+    return pa.RecordBatch.from_pylist(rows, schema=pa_stats_schema)
+
+
+def frame_timestamp(frame: rs.frame, received_ns: int) -> int:
+    """Device timestamp of ``frame`` in ns on the host clock.
+
+    Global (and system) time domain timestamps are host-clock milliseconds; a raw
+    ``hardware_clock`` timestamp is not, so ``received_ns`` is used instead.
+    """
+    if frame.get_frame_timestamp_domain() == rs.timestamp_domain.hardware_clock:
+        return received_ns
+    return int(frame.get_timestamp() * 1e6)
+
+
+def enable_global_time(device: rs.device) -> None:
+    """Have every sensor of ``device`` stamp frames in the global time domain."""
+    for sensor in device.query_sensors():
+        if sensor.supports(rs.option.global_time_enabled):
+            sensor.set_option(rs.option.global_time_enabled, 1)
+
+
+def set_sync_mode(device: rs.device, sync_mode: int) -> None:
+    """Set the hardware ``inter_cam_sync_mode`` of ``device``'s depth sensor."""
+    sensor = device.first_depth_sensor()
+    if not sensor.supports(rs.option.inter_cam_sync_mode):
+        logger.warning("%s does not support hardware sync", device.get_info(rs.camera_info.name))
+        return
+    sensor.set_option(rs.option.inter_cam_sync_mode, sync_mode)
+
+
+def start_imu_pipeline(
+    ctx: rs.context, device_serial: str, imu_buffer: ImuBuffer, accel_fps: int, gyro_fps: int,
+) -> rs.pipeline:
+    """Stream accel and gyro of ``device_serial`` into ``imu_buffer`` at their native rates.
+
+    The motion streams get their own pipeline: synchronized into the video
+    framesets they would be thinned out to the frame rate.
+    """
+    streams = {rs.stream.accel: "accel", rs.stream.gyro: "gyro"}
+
+    def on_motion(frame: rs.frame) -> None:
+        stream = streams.get(frame.get_profile().stream_type())
+        if stream is None:
+            return
+        data = frame.as_motion_frame().get_motion_data()
+        imu_buffer.add(
+            stream, frame_timestamp(frame, time.time_ns()), frame.get_frame_number(),
+            data.x, data.y, data.z,
+        )
+
+    pipeline = rs.pipeline(ctx)
+    config = rs.config()
+    if device_serial:
+        config.enable_device(device_serial)
+    config.enable_stream(rs.stream.accel, rs.format.motion_xyz32f, accel_fps)
+    config.enable_stream(rs.stream.gyro, rs.format.motion_xyz32f, gyro_fps)
+    pipeline.start(config, on_motion)
+    return pipeline
+
+
+@dataclass
+class BagConfig:
+    """``.bag`` playback instead of a camera, or recording of the camera to one."""
+    playback: str = ""  # bag to read the streams from
+    realtime: bool = True  # pace playback at the recorded rate; False: as fast as consumed
+    loop: bool = False  # restart playback at the end instead of stopping the node
+    record: str = ""  # bag written by the SDK while streaming
+
+    @classmethod
+    def from_env(cls: type["BagConfig"]) -> "BagConfig":
+        config = cls(
+            playback=os.getenv("PLAYBACK", ""),
+            realtime=os.getenv("PLAYBACK_REALTIME", "1") in ("1", "true"),
+            loop=os.getenv("PLAYBACK_LOOP", "0") in ("1", "true"),
+            record=os.getenv("RECORD", ""),
+        )
+        if config.playback and config.record:
+            raise ValueError("PLAYBACK and RECORD are exclusive.")
+        return config
 
 
 def configure_realsense(
     device_serial: str,
     image_width: int,
     image_height: int,
-) -> tuple[rs.pipeline, rs.align, rs.config, rs.context]:
-    """Configure and initialize RealSense camera."""
-    ctx = rs.context()
+    align_mode: str = "depth_to_color",
+    ctx: Optional[rs.context] = None,
+    sync_mode: Optional[int] = None,
+    bag_config: Optional[BagConfig] = None,
+) -> tuple[rs.pipeline, Optional[rs.align], rs.config, rs.context]:
+    """Configure and initialize RealSense camera.
+
+    ``ctx`` lets several cameras of one process share a context; ``sync_mode``
+    sets the device's ``inter_cam_sync_mode`` (see `SYNC_MODES`). A
+    ``bag_config`` with ``playback`` reads the streams from that bag instead
+    of a device; one with ``record`` has the pipeline record to that bag.
+    """
+    if align_mode not in ALIGN_MODES:
+        raise ValueError(f"ALIGN must be one of {ALIGN_MODES}, got {align_mode!r}.")
+    bag_config = bag_config or BagConfig()
+    ctx = ctx or rs.context()
+    if bag_config.playback:
+        if not os.path.exists(bag_config.playback):
+            raise FileNotFoundError(f"Playback file {bag_config.playback} not found.")
+        pipeline = rs.pipeline(ctx)
+        config = rs.config()
+        config.enable_device_from_file(bag_config.playback, repeat_playback=bag_config.loop)
+        logger.info(f"Playing back {bag_config.playback}")
+        return _enable_streams(pipeline, config, ctx, image_width, image_height, align_mode)
+
     devices = ctx.query_devices()
 
     if devices.size() == 0:
@@ -134,161 +297,761 @@ def configure_realsense(
         )
     logger.info(f"Connected RealSense devices: {serials}")
 
-    pipeline = rs.pipeline()
+    if sync_mode is not None:
+        device = devices[serials.index(device_serial)] if device_serial else devices[0]
+        set_sync_mode(device, sync_mode)
+
+    pipeline = rs.pipeline(ctx)
     config = rs.config()
 
     if device_serial:
         config.enable_device(device_serial)
+    if bag_config.record:
+        # rs.recorder writes the frames from the SDK's own thread.
+        config.enable_record_to_file(bag_config.record)
+        logger.info(f"Recording to {bag_config.record}")
+    return _enable_streams(pipeline, config, ctx, image_width, image_height, align_mode)
+
 
+def _enable_streams(
+    pipeline: rs.pipeline,
+    config: rs.config,
+    ctx: rs.context,
+    image_width: int,
+    image_height: int,
+    align_mode: str,
+) -> tuple[rs.pipeline, Optional[rs.align], rs.config, rs.context]:
+    # For playback the bag must hold streams of this size.
     config.enable_stream(rs.stream.color, image_width, image_height, rs.format.rgb8, 30)
     config.enable_stream(rs.stream.depth, image_width, image_height, rs.format.z16, 30)
 
-    align_to = rs.stream.color
-    align = rs.align(align_to)
+    align = None
+    if align_mode == "depth_to_color":
+        align = rs.align(rs.stream.color)
+    elif align_mode == "color_to_depth":
+        align = rs.align(rs.stream.depth)
 
     return pipeline, align, config, ctx
 
 
-def capture_realsense_data(
-    image_data: ImageData,
-    depth_data: DepthData,
-    dora_stop_event: threading.Event,
-    realsense_close_event: threading.Event,
-    device_serial: str,
-    image_width: int,
-    image_height: int,
-    flip: str,
+def _stream_info(
+    stream: str,
+    profile: rs.video_stream_profile,
+    extrinsics: list[float],
+    depth_scale: float,
+) -> StreamInfo:
+    """``profile``'s calibration published as ``stream``."""
+    intr = profile.get_intrinsics()
+    return StreamInfo(
+        stream,
+        int(intr.width),
+        int(intr.height),
+        (float(intr.fx), float(intr.fy), float(intr.ppx), float(intr.ppy)),
+        # rs.distortion.brown_conrady -> brown_conrady
+        str(intr.model).rsplit(".", 1)[-1],
+        tuple(float(c) for c in intr.coeffs),
+        tuple(extrinsics),
+        depth_scale,
+    )
+
+
+def stream_geometry(profile: rs.pipeline_profile, align_mode: str) -> StreamGeometry:
+    """Calibration of the frames published in ``align_mode``."""
+    color = profile.get_stream(rs.stream.color).as_video_stream_profile()
+    depth = profile.get_stream(rs.stream.depth).as_video_stream_profile()
+    depth_scale = float(profile.get_device().first_depth_sensor().get_depth_scale())
+    if align_mode != "none":
+        # Both streams are registered to the same camera.
+        target = color if align_mode == "depth_to_color" else depth
+        return StreamGeometry(
+            _stream_info("color", target, IDENTITY, depth_scale),
+            _stream_info("depth", target, IDENTITY, depth_scale),
+        )
+    extrinsics = depth.get_extrinsics_to(color)
+    # librealsense stores the rotation column-major.
+    rotation = np.asarray(extrinsics.rotation, dtype=np.float64).reshape(3, 3).T
+    return StreamGeometry(
+        _stream_info("color", color, IDENTITY, depth_scale),
+        _stream_info(
+            "depth",
+            depth,
+            [*rotation.ravel().tolist(), *(float(t) for t in extrinsics.translation)],
+            depth_scale,
+        ),
+    )
+
+
+# DEPTH_FILTERS: librealsense post-processing filters, applied in the given order.
+DEPTH_FILTERS = ("decimation", "spatial", "temporal", "hole_filling")
+
+
+@dataclass
+class DepthConfig:
+    """Depth post-processing, run by the `DepthWorker`."""
+    filters: tuple[str, ...] = ()
+    decimation: int = 2  # filter_magnitude of the decimation filter
+    max_depth: int = 5000  # clamp in depth units (mm); 0 keeps every value
+    codec: str = ""
+
+    @classmethod
+    def from_env(cls: type["DepthConfig"]) -> "DepthConfig":
+        filters = tuple(
+            f.strip().lower() for f in os.getenv("DEPTH_FILTERS", "").split(",") if f.strip()
+        )
+        for name in filters:
+            if name not in DEPTH_FILTERS:
+                raise ValueError(f"DEPTH_FILTERS must be among {DEPTH_FILTERS}, got {name!r}.")
+        codec = os.getenv("DEPTH_CODEC", "").lower()
+        if codec and codec not in DEPTH_CODECS:
+            raise ValueError(f"DEPTH_CODEC must be one of {DEPTH_CODECS}, got {codec!r}.")
+        return cls(
+            filters=filters,
+            decimation=int(os.getenv("DECIMATION", "2")),
+            max_depth=int(os.getenv("MAX_DEPTH", "5000")),
+            codec=codec,
+        )
+
+
+def build_filters(config: DepthConfig) -> list[tuple[str, rs.filter]]:
+    """Instantiate the configured librealsense filters."""
+    filters = []
+    for name in config.filters:
+        if name == "decimation":
+            depth_filter = rs.decimation_filter()
+            depth_filter.set_option(rs.option.filter_magnitude, config.decimation)
+        elif name == "spatial":
+            depth_filter = rs.spatial_filter()
+        elif name == "temporal":
+            depth_filter = rs.temporal_filter()
+        else:
+            depth_filter = rs.hole_filling_filter()
+        filters.append((name, depth_filter))
+    return filters
+
+
+def scale_intrinsics(intrinsics: Sequence[float], sx: float, sy: float) -> tuple[float, ...]:
+    """Intrinsics ``[fx, fy, ppx, ppy]`` of the frame resized by ``(sx, sy)``."""
+    fx, fy, ppx, ppy = intrinsics
+    return (fx * sx, fy * sy, (ppx + 0.5) * sx - 0.5, (ppy + 0.5) * sy - 0.5)
+
+
+class DepthWorker:
+    """Filters, clamps and compresses depth frames off the capture thread.
+
+    The capture thread hands over each depth frame with `submit` and goes back
+    to ``wait_for_frames``. The queue holds two frames; when the worker falls
+    behind the oldest frame is dropped (counted as ``dropped/depth_worker``).
+    """
+
+    def __init__(
+        self: Self,
+        depth_store: LatestValue[DepthData],
+        config: DepthConfig,
+        device_serial: str,
+        geometry: StreamGeometry,
+        pointcloud_store: Optional[LatestValue[PointCloudData]] = None,
+        pointcloud_config: Optional[PointCloudConfig] = None,
+        camera_info: Optional[CameraInfo] = None,
+    ) -> None:
+        self.depth_store = depth_store
+        self.pointcloud_store = pointcloud_store
+        self.pointcloud_config = pointcloud_config or PointCloudConfig()
+        self.config = config
+        self.device_serial = device_serial
+        self.geometry = geometry
+        self.camera_info = camera_info or CameraInfo(device_serial)
+        self.info: Optional[StreamInfo] = None  # of the filtered frames
+        self.filters = build_filters(config)
+        self.filter_stages = [(f"filter/{name}", f) for name, f in self.filters]
+        self.queue: queue.Queue = queue.Queue(maxsize=2)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="realsense-depth", daemon=True)
+
+    def start(self: Self) -> None:
+        self.thread.start()
+
+    def stop(self: Self) -> None:
+        self.submit(None)
+        self.thread.join(timeout=2.0)
+
+    def submit(self: Self, item: Optional[tuple]) -> None:
+        """Queue ``(frame, timestamp, host_timestamp, frame_number, color_frame)``.
+
+        ``color_frame`` is the registered color frame for ``xyzrgb`` point clouds,
+        else None. The oldest item is dropped when the queue is full.
+        """
+        # Only the capture thread puts, so once an item is taken the put cannot fail.
+        if self.queue.full():
+            with contextlib.suppress(queue.Empty):
+                self.queue.get_nowait()
+                self.dropped += 1
+                stage_timer.count("dropped/depth_worker")
+        self.queue.put_nowait(item)
+
+    def _run(self: Self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                self.process(*item)
+            except Exception as e:
+                logger.exception("Depth processing error: %s", e)
+
+    def process(
+        self: Self,
+        frame: rs.frame,
+        timestamp: int,
+        host_timestamp: int,
+        frame_number: int,
+        color_frame: Optional[rs.frame] = None,
+    ) -> None:
+        """Filter one depth frame and publish it into the depth store."""
+        height, width = np.asanyarray(frame.get_data()).shape
+        for stage, depth_filter in self.filter_stages:
+            with stage_timer.stage(stage):
+                frame = depth_filter.process(frame)
+        depth_image = np.asanyarray(frame.get_data())
+
+        depth = self.depth_store.acquire()
+        depth.serial_number = self.device_serial
+        with stage_timer.stage("clamp"):
+            # Into the slot buffer: the SDK buffer is never modified.
+            depth.frame = clamp_into(depth_image, depth.frame, self.config.max_depth)
+        if self.config.codec:
+            with stage_timer.stage("depth_codec"):
+                depth.encoded = encode_depth(depth.frame, self.config.codec)
+        depth.codec = self.config.codec
+        depth.height, depth.width = depth_image.shape
+        depth.timestamp = timestamp
+        depth.host_timestamp = host_timestamp
+        depth.frame_number = frame_number
+        if self.info is None or (self.info.height, self.info.width) != depth_image.shape:
+            # First frame or a new filtered resolution: a new camera_info generation.
+            self.info = self.filtered_info(depth.height, depth.width, height, width)
+            self.camera_info.update(self.info)
+        depth.camera_info = self.camera_info.generation
+        depth.intrinsics = self.info.intrinsics
+        depth.depth_scale = self.info.depth_scale
+        if self.pointcloud_store is not None:
+            with stage_timer.stage("pointcloud"):
+                self.publish_pointcloud(depth, color_frame)
+        self.depth_store.publish()
+
+    def filtered_info(
+        self: Self, height: int, width: int, raw_height: int, raw_width: int,
+    ) -> StreamInfo:
+        """Depth calibration of the raw frames resized to ``height`` x ``width`` by the filters."""
+        info = self.geometry.depth
+        if (height, width) == (raw_height, raw_width):
+            return info
+        intrinsics = scale_intrinsics(info.intrinsics, width / raw_width, height / raw_height)
+        return replace(info, width=width, height=height, intrinsics=intrinsics)
+
+    def publish_pointcloud(self: Self, depth: DepthData, color_frame: Optional[rs.frame]) -> None:
+        """Deproject the clamped depth of ``depth`` into the pointcloud store."""
+        config = self.pointcloud_config
+        color = None
+        if config.colored:
+            if color_frame is None:
+                # The color of this frameset is not registered to depth (ALIGN_EVERY).
+                return
+            color = np.asanyarray(color_frame.get_data())
+            if color.shape[:2] != depth.frame.shape:
+                color = cv2.resize(
+                    color, (depth.width, depth.height), interpolation=cv2.INTER_NEAREST,
+                )
+        cloud = self.pointcloud_store.acquire()
+        cloud.serial_number = self.device_serial
+        cloud.points = deproject_points(
+            depth.frame, depth.intrinsics, depth.depth_scale, config, color,
+        )
+        cloud.layout = config.layout
+        cloud.timestamp = depth.timestamp
+        cloud.host_timestamp = depth.host_timestamp
+        cloud.frame_number = depth.frame_number
+        self.pointcloud_store.publish()
+
+
+def store_image(
+    image_store: LatestValue[ImageData],
+    frame: np.ndarray,
+    encode_ns: int,
+    *,
+    serial_number: str,
     encoding: str,
+    width: int,
+    height: int,
+    timestamp: int,
+    host_timestamp: int,
+    frame_number: int,
+    camera_info: int,
+    quality: int = 0,
+    flip: str = "",
+    conversion: Optional[int] = None,
+    release: Optional[Callable[[], None]] = None,
 ) -> None:
-    """Capture and process RealSense data in a separate thread."""
-    try:
-        pipeline, align, config, ctx = configure_realsense(device_serial, image_width, image_height)
-        profile = pipeline.start(config)
-        rgb_profile = profile.get_stream(rs.stream.color)
-        # depth_profile = profile.get_stream(rs.stream.depth)
-        rgb_intr = rgb_profile.as_video_stream_profile().get_intrinsics()
-        while not dora_stop_event.is_set():
-            frames = pipeline.wait_for_frames()
-            aligned_frames = align.process(frames)
-
-            aligned_depth_frame = aligned_frames.get_depth_frame()
-            color_frame = aligned_frames.get_color_frame()
-
-            if not aligned_depth_frame or not color_frame:
-                continue
-
-            depth_image = np.asanyarray(aligned_depth_frame.get_data())
-            scaled_depth_image = depth_image
-            color_frame = np.asanyarray(color_frame.get_data())
-            # Apply flip if needed
-            if flip == "VERTICAL":
-                color_frame = cv2.flip(color_frame, 0)
-            elif flip == "HORIZONTAL":
-                color_frame = cv2.flip(color_frame, 1)
-            elif flip == "BOTH":
-                color_frame = cv2.flip(color_frame, -1)
-
-            # Apply encoding if needed
-            if encoding == "bgr8":
-                color_frame = cv2.cvtColor(color_frame, cv2.COLOR_RGB2BGR)
-            elif encoding in ["jpeg", "jpg", "jpe", "bmp", "webp", "png"]:
-                ret, color_frame = cv2.imencode("." + encoding, color_frame)
-                if not ret:
-                    logger.error("Error encoding image...")
-                    continue
-
-
-            # Update image data
-            resolution = [int(rgb_intr.ppx), int(rgb_intr.ppy)]
-            focal_length = [int(rgb_intr.fx), int(rgb_intr.fy)]
-            timestamp = int(time.time_ns())
-            image_data.update_data(
-                device_serial,
+    """Fill an image slot with ``frame`` (raw or encoded) and publish it.
+
+    Raw frames are flipped and converted (a ``cv2.COLOR_*`` ``conversion``)
+    straight into the slot buffer; ``frame``, usually the SDK buffer, is only
+    read. ``release`` is called once ``frame`` is no longer needed.
+    """
+    image = image_store.acquire()
+    image.serial_number = serial_number
+    with stage_timer.stage("store_image"):
+        # Encoded frames are fresh arrays of varying size: no copy needed.
+        if encoding in COMPRESSED_ENCODINGS:
+            image.frame = frame
+        else:
+            image.frame = transform_into(frame, image.frame, flip, conversion)
+    if release is not None:
+        release()
+    image.width = width
+    image.height = height
+    image.encoding = encoding
+    image.timestamp = timestamp
+    image.host_timestamp = host_timestamp
+    image.frame_number = frame_number
+    image.camera_info = camera_info
+    image.quality = quality
+    image.encode_ns = encode_ns
+    image_store.publish()
+
+
+@dataclass
+class CaptureConfig:
+    """Streams and processing of one camera, built once from the environment."""
+    device_serial: str = ""
+    width: int = 640
+    height: int = 480
+    flip: str = ""
+    encoding: str = "rgb8"
+    align_mode: str = "depth_to_color"
+    align_every: int = 1  # align every n-th frameset; the others publish one stream
+    sync_mode: Optional[int] = None  # inter_cam_sync_mode, see SYNC_MODES
+    queue_size: int = 0  # rs.frame_queue capacity; 0 uses wait_for_frames
+    imu: bool = False  # IMU=1: accel/gyro of a D4x5i on the imu output
+    imu_fps: tuple[int, int] = (250, 200)  # accel, gyro
+    depth: DepthConfig = field(default_factory=DepthConfig)
+    pointcloud: PointCloudConfig = field(default_factory=PointCloudConfig)
+    bag: BagConfig = field(default_factory=BagConfig)  # PLAYBACK or RECORD a bag
+
+    @classmethod
+    def from_env(cls: type["CaptureConfig"]) -> "CaptureConfig":
+        align_mode = os.getenv("ALIGN", "depth_to_color").lower()
+        if align_mode not in ALIGN_MODES:
+            raise ValueError(f"ALIGN must be one of {ALIGN_MODES}, got {align_mode!r}.")
+        pointcloud = PointCloudConfig.from_env()
+        if pointcloud.colored and align_mode == "none":
+            raise ValueError("POINTCLOUD=xyzrgb needs registered color, set ALIGN.")
+        return cls(
+            device_serial=os.getenv("DEVICE_SERIAL", ""),
+            width=int(os.getenv("IMAGE_WIDTH", "640")),
+            height=int(os.getenv("IMAGE_HEIGHT", "480")),
+            flip=os.getenv("FLIP", ""),
+            encoding=os.getenv("ENCODING", "rgb8"),
+            align_mode=align_mode,
+            align_every=max(1, int(os.getenv("ALIGN_EVERY", "1"))),
+            queue_size=int(os.getenv("FRAME_QUEUE", "0")),
+            imu=os.getenv("IMU", "") in ("1", "true"),
+            imu_fps=(int(os.getenv("ACCEL_FPS", "250")), int(os.getenv("GYRO_FPS", "200"))),
+            depth=DepthConfig.from_env(),
+            pointcloud=pointcloud,
+            bag=BagConfig.from_env(),
+        )
+
+
+@dataclass
+class CameraOutputs:
+    """What one camera's capture thread fills and its sender publishes."""
+    image_store: LatestValue[ImageData]
+    depth_store: LatestValue[DepthData]
+    frame_stats: FrameStats
+    camera_info: CameraInfo
+    pointcloud_store: Optional[LatestValue[PointCloudData]] = None
+    imu_buffer: Optional[ImuBuffer] = None
+
+    @classmethod
+    def create(
+        cls: type["CameraOutputs"],
+        config: CaptureConfig,
+        image_output: str = "image",
+        depth_output: str = "depth",
+    ) -> "CameraOutputs":
+        serial = config.device_serial
+        return cls(
+            LatestValue(ImageData),
+            LatestValue(DepthData),
+            FrameStats(serial, config.queue_size, image_output, depth_output),
+            CameraInfo(serial),
+            LatestValue(PointCloudData) if config.pointcloud.enabled else None,
+            ImuBuffer(serial) if config.imu else None,
+        )
+
+
+class RealsenseCapture:
+    """One camera's pipeline and the per-frameset stages of its capture thread.
+
+    `start` opens the pipeline (or the bag), the IMU pipeline and the
+    `DepthWorker`; `process` aligns a frameset, publishes its color image and
+    hands its depth to the worker; `stop` closes them again.
+    """
+
+    def __init__(
+        self: Self,
+        config: CaptureConfig,
+        outputs: CameraOutputs,
+        ctx: Optional[rs.context] = None,
+        encode_pool: Optional[EncodePool] = None,
+    ) -> None:
+        self.config = config
+        self.outputs = outputs
+        self.ctx = ctx
+        self.encode_pool = encode_pool
+        self.pipeline: Optional[rs.pipeline] = None
+        self.align: Optional[rs.align] = None
+        self.frame_queue: Optional[rs.frame_queue] = None
+        self.playback: Optional[rs.playback] = None
+        self.imu_pipeline: Optional[rs.pipeline] = None
+        self.depth_worker: Optional[DepthWorker] = None
+        self.framesets = 0
+        self.colored = outputs.pointcloud_store is not None and config.pointcloud.colored
+        self.conversion = cv2.COLOR_RGB2BGR if config.encoding == "bgr8" else None
+        self.flipped = config.flip in FLIP_CODES
+        # Flipped frames waiting for the encoder; the SDK buffers are never flipped in place.
+        self.frame_pool = FramePool(
+            (config.height, config.width, 3), np.uint8,
+            (encode_pool.max_pending if encode_pool is not None else 0) + 1,
+        )
+
+    def start(self: Self) -> None:
+        config = self.config
+        pipeline, self.align, rs_config, self.ctx = configure_realsense(
+            config.device_serial, config.width, config.height, config.align_mode, self.ctx,
+            config.sync_mode, config.bag,
+        )
+        if config.queue_size:
+            self.frame_queue = rs.frame_queue(config.queue_size, keep_frames=True)
+            profile = pipeline.start(rs_config, self.frame_queue)
+        else:
+            profile = pipeline.start(rs_config)
+        self.pipeline = pipeline
+        if config.bag.playback:
+            self.playback = profile.get_device().as_playback()
+            # Not real time: every frame is delivered, as fast as it is consumed.
+            self.playback.set_real_time(config.bag.realtime)
+        else:
+            enable_global_time(profile.get_device())
+        imu_buffer = self.outputs.imu_buffer
+        if imu_buffer is not None and self.playback is not None:
+            logger.warning("IMU is not streamed during playback.")
+        elif imu_buffer is not None:
+            self.imu_pipeline = start_imu_pipeline(
+                self.ctx, config.device_serial, imu_buffer, *config.imu_fps,
+            )
+        geometry = stream_geometry(profile, config.align_mode)
+        # With decimation the depth worker replaces the depth row on its first frame.
+        self.outputs.camera_info.update(geometry.image, geometry.depth)
+        self.depth_worker = DepthWorker(
+            self.outputs.depth_store, config.depth, config.device_serial, geometry,
+            self.outputs.pointcloud_store, config.pointcloud, self.outputs.camera_info,
+        )
+        self.depth_worker.start()
+
+    def stop(self: Self) -> None:
+        if self.depth_worker is not None:
+            self.depth_worker.stop()
+        if self.imu_pipeline is not None:
+            self.imu_pipeline.stop()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+
+    def wait_for_frameset(self: Self) -> Optional[rs.composite_frame]:
+        """The next frameset; None once a playback that is not looped has finished."""
+        with stage_timer.stage("wait_for_frames"):
+            try:
+                if self.frame_queue is not None:
+                    return self.frame_queue.wait_for_frame().as_frameset()
+                return self.pipeline.wait_for_frames()
+            except RuntimeError:
+                playback = self.playback
+                if playback is None or playback.current_status() != rs.playback_status.stopped:
+                    raise
+                logger.info("Playback of %s finished.", playback.file_name())
+                return None
+
+    def align_frameset(
+        self: Self, frames: rs.composite_frame,
+    ) -> tuple[rs.composite_frame, bool, bool]:
+        """Align every ``align_every``-th frameset; return it with which streams to publish."""
+        publish_image = publish_depth = True
+        if self.align is not None:
+            if self.framesets % self.config.align_every == 0:
+                with stage_timer.stage("align"):
+                    frames = self.align.process(frames)
+            else:
+                # Between aligned framesets only the stream aligned to is published.
+                publish_image = self.config.align_mode == "depth_to_color"
+                publish_depth = not publish_image
+        self.framesets += 1
+        return frames, publish_image, publish_depth
+
+    def process(self: Self, frames: rs.composite_frame, received_ns: int) -> None:
+        """Publish the color image of ``frames`` and hand its depth to the depth worker."""
+        frames, publish_image, publish_depth = self.align_frameset(frames)
+        depth_frame = frames.get_depth_frame()
+        color_frame = frames.get_color_frame()
+        if not depth_frame or not color_frame:
+            return
+
+        # Device timestamps and frame numbers, taken before any processing.
+        frame_stats = self.outputs.frame_stats
+        color_timestamp = frame_timestamp(color_frame, received_ns)
+        depth_timestamp = frame_timestamp(depth_frame, received_ns)
+        color_number = color_frame.get_frame_number()
+        depth_number = depth_frame.get_frame_number()
+        frame_stats.color.update(color_number)
+        frame_stats.depth.update(depth_number)
+
+        registered_color = None
+        if publish_image:
+            if self.colored:
+                color_frame.keep()
+                registered_color = color_frame
+            self.publish_image(
                 color_frame,
-                image_width,
-                image_height,
-                encoding,
-                timestamp,
-                resolution,
-                focal_length,
+                serial_number=self.config.device_serial,
+                encoding=self.config.encoding,
+                width=self.config.width,
+                height=self.config.height,
+                timestamp=color_timestamp,
+                host_timestamp=received_ns,
+                frame_number=color_number,
+                camera_info=self.outputs.camera_info.generation,
+            )
+        if publish_depth:
+            # Keep the frame alive beyond this frameset for the depth worker.
+            depth_frame.keep()
+            self.depth_worker.submit(
+                (depth_frame, depth_timestamp, received_ns, depth_number, registered_color),
             )
+        stage_timer.count("captured")
 
-            # Update depth data
-            scaled_depth_image[scaled_depth_image > 5000] = 0
-            depth_data.update_data(
-                device_serial,
-                scaled_depth_image,
-                image_width,
-                image_height,
-                timestamp,
+    def publish_image(self: Self, color_frame: rs.frame, **image_fields: object) -> None:
+        """Store ``color_frame`` raw, or encode it here or on the encode pool."""
+        image_store = self.outputs.image_store
+        encoding = self.config.encoding
+        # A view of the SDK buffer, only ever read.
+        color = np.asanyarray(color_frame.get_data())
+        if encoding not in COMPRESSED_ENCODINGS:
+            # Flip and convert straight into the image slot.
+            store_image(
+                image_store, color, 0, flip=self.config.flip, conversion=self.conversion,
+                **image_fields,
             )
-            time.sleep(0.001)
+            return
+        release = None
+        if self.flipped:
+            with stage_timer.stage("flip"):
+                color = transform_into(
+                    color, self.frame_pool.acquire(color.shape), self.config.flip,
+                )
+            release = partial(self.frame_pool.release, color)
+        if self.encode_pool is not None:
+            if not self.flipped:
+                # The frame is the SDK buffer: keep it until encoded.
+                color_frame.keep()
+            submitted = self.encode_pool.submit(
+                color,
+                partial(store_image, image_store, quality=self.encode_pool.quality,
+                    release=release, **image_fields),
+            )
+            if not submitted and release is not None:
+                release()
+            return
+        with stage_timer.stage("encode"):
+            try:
+                encoded, encode_ns = encode_image(color, encoding, encode_params(encoding))
+            except ValueError as e:
+                logger.error("%s", e)
+                encoded = None
+        if encoded is not None:
+            store_image(
+                image_store, encoded, encode_ns, release=release,
+                quality=DEFAULT_QUALITY.get(encoding, 0), **image_fields,
+            )
+        elif release is not None:
+            release()
+
+
+def capture_realsense_data(
+    config: CaptureConfig,
+    outputs: CameraOutputs,
+    dora_stop_event: threading.Event,
+    realsense_close_event: threading.Event,
+    ctx: Optional[rs.context] = None,
+    encode_pool: Optional[EncodePool] = None,
+) -> None:
+    """Capture and process RealSense data in a separate thread.
+
+    ``ctx`` lets several cameras share a context. With ``encode_pool``
+    compressed encodings are encoded and published by the pool instead of
+    this thread. A playback that is not looped sets ``realsense_close_event``
+    at its end.
+    """
+    capture = RealsenseCapture(config, outputs, ctx, encode_pool)
+    try:
+        capture.start()
+        while not dora_stop_event.is_set():
+            frames = capture.wait_for_frameset()
+            if frames is None:
+                realsense_close_event.set()
+                break
+            capture.process(frames, time.time_ns())
+            if capture.frame_queue is None:
+                time.sleep(0.001)
 
     except Exception as e:
         logger.exception("RealSense error: %s", e)
         realsense_close_event.set()
     finally:
-        pipeline.stop()
-        # realsense_close_event.set()
+        capture.stop()
+
+
+def image_record_batch(image: ImageData) -> pa.RecordBatch:
+    """One-row ``image`` output batch of an image slot."""
+    return record_batch(
+        {
+            "serial_number": image.serial_number,
+            "image": image.frame,
+            "timestamp": image.timestamp,
+            "host_timestamp": image.host_timestamp,
+            "frame_number": image.frame_number,
+            "camera_info": image.camera_info,
+            "width": image.width,
+            "height": image.height,
+            "encoding": image.encoding,
+            "quality": image.quality,
+            "encode_ns": image.encode_ns,
+        },
+        schema = image_schema(image.height, image.width, image.encoding),
+    )
+
+
+def depth_record_batch(depth: DepthData) -> pa.RecordBatch:
+    """One-row ``depth`` output batch of a depth slot."""
+    return record_batch(
+        {
+            "serial_number": depth.serial_number,
+            "depth": depth.encoded if depth.codec else depth.frame,
+            "timestamp": depth.timestamp,
+            "host_timestamp": depth.host_timestamp,
+            "frame_number": depth.frame_number,
+            "camera_info": depth.camera_info,
+            "width": depth.width,
+            "height": depth.height,
+        },
+        schema = depth_schema(depth.height, depth.width, depth.codec),
+    )
+
+
+def pointcloud_record_batch(cloud: PointCloudData) -> pa.RecordBatch:
+    """One-row ``pointcloud`` output batch of a point cloud slot."""
+    count, channels = cloud.points.shape
+    return record_batch(
+        {
+            "serial_number": cloud.serial_number,
+            "points": cloud.points,
+            "timestamp": cloud.timestamp,
+            "host_timestamp": cloud.host_timestamp,
+            "frame_number": cloud.frame_number,
+            "count": count,
+            "channels": channels,
+        },
+        schema = pointcloud_schema(cloud.layout),
+    )
+
+
+def send_imu(node: Node, output_id: str, imu_buffer: ImuBuffer) -> None:
+    """Send the motion samples buffered since the last call, if any."""
+    with stage_timer.stage(f"batch/{output_id}"):
+        batch = imu_buffer.drain()
+    if batch is None:
+        return
+    with stage_timer.stage(f"send/{output_id}"):
+        node.send_output(output_id, batch, {"seq": imu_buffer.seq})
+    stage_timer.count(f"samples/{output_id}", batch.num_rows)
+
+
+def send_camera_info(
+    node: Node, output_id: str, camera_info: CameraInfo, resend_interval: float,
+) -> None:
+    """Send the calibration when it changed or ``resend_interval`` seconds passed."""
+    batch = camera_info.due(resend_interval)
+    if batch is not None:
+        node.send_output(output_id, batch, {"generation": camera_info.generation})
 
 
 def send_data_through_dora(
-    image_data: ImageData,
-    depth_data: DepthData,
+    outputs: CameraOutputs,
     dora_stop_event: threading.Event,
     realsense_close_event: threading.Event,
-    ) -> None:
-    """Sends image and depth data."""
-    node = Node()
+    stats_output: str = "",
+    stats_interval: float = 1.0,
+    camera_info_interval: float = 1.0,
+    node: Optional[Node] = None,
+) -> None:
+    """Sends image and depth data, and the point cloud when enabled.
+
+    With ``stats_output`` the frame stats are sent every ``stats_interval`` seconds.
+    With an IMU buffer every send also flushes the buffered motion samples on ``imu``.
+    The calibration goes out on ``camera_info`` before the first frame of each
+    generation and again every ``camera_info_interval`` seconds.
+    """
+    if node is None:
+        node = Node()
+    stores = {"image": outputs.image_store, "depth": outputs.depth_store}
+    if outputs.pointcloud_store is not None:
+        stores["pointcloud"] = outputs.pointcloud_store
+    publisher = Publisher(node, stores, timer=stage_timer)
+    next_stats = time.perf_counter() + stats_interval
     try:
-        for event in node:
+        for event in publisher:
             if realsense_close_event.is_set():
                 dora_stop_event.set()
                 break
 
+            if stats_output and time.perf_counter() >= next_stats:
+                next_stats = time.perf_counter() + stats_interval
+                stats_batch = stats_record_batch([outputs.frame_stats], publisher.overwritten)
+                node.send_output(stats_output, stats_batch)
+
             if event["type"] == "INPUT" and event["id"] == "tick":
                 # Read image data
-
-                has_image, sn, frame, width, height, encoding, timestamp, resolution, focal_length  = image_data.read_data()
-                # print(f"发送的序列号为:{sn}")
+                image_seq, image = publisher.read("image")
                 # Read depth data
-                has_depth, d_sn, depth_frame, d_width, d_height, d_encoding, d_timestamp = depth_data.read_data()
-                if has_image:
+                depth_seq, depth = publisher.read("depth")
+                # After the reads: covers the generation of the frames just read.
+                send_camera_info(node, "camera_info", outputs.camera_info, camera_info_interval)
+                if image is not None:
                     # Create image batch
-
-                    image_batch = pa.record_batch(
-                        {
-                            "serial_number": [sn],
-                            "image": [frame.ravel()],
-                            "timestamp": [timestamp],
-                            "width": [width],
-                            "height": [height],
-                            "encoding": [encoding],
-                        },
-                        schema = image_schema,
-                    )
-                    # cv2.imshow("rgb", frame)
-                    # cv2.waitKey(1)  # 刷新显示
-                    # image_batch = pa.array(frame.ravel())
-                    node.send_output("image", image_batch)
-                if has_depth:
+                    with stage_timer.stage("batch/image"):
+                        image_batch = image_record_batch(image)
+                    publisher.send("image", image_batch, image_seq)
+                if depth is not None:
                     # Create depth batch
-                    depth_batch = pa.record_batch(
-                        {
-                            "serial_number": [d_sn],
-                            "depth": [depth_frame.ravel()],
-                            "timestamp": [d_timestamp],
-                            "width": [width],
-                            "height": [height],
-                        },
-                        schema = depth_schema,
-                    )
-
-                    # cv2.imshow("depth", depth_frame)
-                    # cv2.waitKey(1)  # 刷新显示
-                    node.send_output("depth", depth_batch)
-
-                time.sleep(0.001)
+                    with stage_timer.stage("batch/depth"):
+                        depth_batch = depth_record_batch(depth)
+                    publisher.send("depth", depth_batch, depth_seq)
+                if outputs.imu_buffer is not None:
+                    send_imu(node, "imu", outputs.imu_buffer)
+                if outputs.pointcloud_store is not None:
+                    cloud_seq, cloud = publisher.read("pointcloud")
+                    if cloud is not None:
+                        with stage_timer.stage("batch/pointcloud"):
+                            cloud_batch = pointcloud_record_batch(cloud)
+                        publisher.send("pointcloud", cloud_batch, cloud_seq)
 
             elif event["type"] == "STOP":
                 dora_stop_event.set()
@@ -297,33 +1060,48 @@ def send_data_through_dora(
         logger.exception("Dora error: %s", e)
 
 
+def env_quality() -> Optional[int]:
+    """``ENCODE_QUALITY``: jpeg/webp quality (0-100) or png level (0-9); None for the default."""
+    quality = os.getenv("ENCODE_QUALITY", "")
+    return int(quality) if quality else None
+
+
 def main() -> None:
     """Main entry point for the RealSense node."""
     logging.basicConfig(level=logging.INFO)
+    stage_timer.install_signal_handler()
 
     # Get environment variables
-    flip = os.getenv("FLIP", "")
-    device_serial = os.getenv("DEVICE_SERIAL", "")
-    image_height = int(os.getenv("IMAGE_HEIGHT", "480"))
-    image_width = int(os.getenv("IMAGE_WIDTH", "640"))
-    encoding = os.getenv("ENCODING", "rgb8")
-
-    # Initialize data classes
-    image_data = ImageData()
-    depth_data = DepthData()
+    config = CaptureConfig.from_env()
+    stats_output = os.getenv("STATS_OUTPUT", "")
+    stats_interval = float(os.getenv("STATS_INTERVAL", "1.0"))
+    camera_info_interval = float(os.getenv("CAMERA_INFO_INTERVAL", "1.0"))
+
+    # Created here so that main() fails right away outside a dataflow.
+    node = Node()
+
+    # Initialize latest-value stores
+    outputs = CameraOutputs.create(config)
+    encode_pool = None
+    if config.encoding in COMPRESSED_ENCODINGS:
+        encode_pool = EncodePool(
+            config.encoding, env_quality(), int(os.getenv("ENCODE_WORKERS", "2")),
+            timer=stage_timer,
+        )
+        encode_pool.start()
     dora_stop_event = threading.Event()
     realsense_close_event = threading.Event()
     # Start threads
     realsense_thread = threading.Thread(
         target=capture_realsense_data,
-        args=(image_data, depth_data, dora_stop_event, realsense_close_event,
-            device_serial, image_width, image_height, flip, encoding),
-            daemon=True,
-
+        args=(config, outputs, dora_stop_event, realsense_close_event),
+        kwargs={"encode_pool": encode_pool},
+        daemon=True,
     )
     dora_thread = threading.Thread(
         target=send_data_through_dora,
-        args=(image_data, depth_data, dora_stop_event, realsense_close_event),
+        args=(outputs, dora_stop_event, realsense_close_event, stats_output, stats_interval,
+            camera_info_interval, node),
         daemon=True,
     )
 
@@ -342,6 +1120,8 @@ def main() -> None:
     logger.info("Waiting for threads to finish...")
     realsense_thread.join(timeout=2.0)  # 设置超时时间
     dora_thread.join(timeout=2.0)
+    if encode_pool is not None:
+        encode_pool.close()
 
     # 确认所有资源已释放
     if realsense_thread.is_alive():
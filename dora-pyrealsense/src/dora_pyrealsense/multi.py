@@ -0,0 +1,196 @@
+"""Multi-camera RealSense node for Dora.
+
+One process, one ``rs.context`` and one capture thread per camera listed in
+``DEVICE_SERIALS``. Camera ``name`` (from ``CAMERA_NAMES``, default ``cam0``,
+``cam1``, ...) publishes ``image_<name>`` and ``depth_<name>`` (and
+``pointcloud_<name>`` with ``POINTCLOUD``, ``imu_<name>`` with ``IMU``) with the
+schemas of the single-camera node, and its calibration on ``camera_info_<name>``.
+``SYNC_MODES`` sets each camera's hardware ``inter_cam_sync_mode``
+(``master``/``slave``) for synchronized stereo RGB-D.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import replace
+from typing import Optional
+
+from dora import Node
+from dora_pika_common.arrow import COMPRESSED_ENCODINGS
+from dora_pika_common.encode import EncodePool
+from dora_pika_common.publish import Publisher
+
+from dora_pyrealsense.main import (
+    SYNC_MODES,
+    BagConfig,
+    CameraOutputs,
+    CaptureConfig,
+    capture_realsense_data,
+    depth_record_batch,
+    env_quality,
+    image_record_batch,
+    pointcloud_record_batch,
+    rs,
+    send_camera_info,
+    send_imu,
+    stage_timer,
+    stats_record_batch,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_sync_modes(modes: str, count: int) -> list[Optional[int]]:
+    """``"master,slave"`` (or raw values) per camera; unset cameras keep their mode."""
+    parsed: list[Optional[int]] = [None] * count
+    for index, mode in enumerate(m.strip().lower() for m in modes.split(",") if m.strip()):
+        parsed[index] = SYNC_MODES[mode] if mode in SYNC_MODES else int(mode)
+    return parsed
+
+
+def send_cameras_through_dora(
+    cameras: dict[str, CameraOutputs],
+    dora_stop_event: threading.Event,
+    realsense_close_event: threading.Event,
+    stats_output: str = "",
+    stats_interval: float = 1.0,
+    camera_info_interval: float = 1.0,
+) -> None:
+    """Sends ``image_<name>``, ``depth_<name>`` (and ``pointcloud_<name>``) of every camera.
+
+    With ``stats_output`` the frame stats of all cameras are sent together
+    every ``stats_interval`` seconds. IMU buffers are flushed on ``imu_<name>``,
+    the calibration is sent on ``camera_info_<name>`` as in the single-camera node.
+    """
+    node = Node()
+    outputs = {}
+    builders = {}
+    for name, camera in cameras.items():
+        outputs[f"image_{name}"] = camera.image_store
+        outputs[f"depth_{name}"] = camera.depth_store
+        builders[f"image_{name}"] = image_record_batch
+        builders[f"depth_{name}"] = depth_record_batch
+        if camera.pointcloud_store is not None:
+            outputs[f"pointcloud_{name}"] = camera.pointcloud_store
+            builders[f"pointcloud_{name}"] = pointcloud_record_batch
+    frame_stats = [camera.frame_stats for camera in cameras.values()]
+    batch_stages = {output_id: f"batch/{output_id}" for output_id in outputs}
+    publisher = Publisher(node, outputs, timer=stage_timer)
+    next_stats = time.perf_counter() + stats_interval
+    try:
+        for event in publisher:
+            if realsense_close_event.is_set():
+                dora_stop_event.set()
+                break
+
+            if stats_output and time.perf_counter() >= next_stats:
+                next_stats = time.perf_counter() + stats_interval
+                stats_batch = stats_record_batch(frame_stats, publisher.overwritten)
+                node.send_output(stats_output, stats_batch)
+
+            if event["type"] == "INPUT" and event["id"] == "tick":
+                values = {output_id: publisher.read(output_id) for output_id in builders}
+                # After the reads: covers the generation of the frames just read.
+                for name, camera in cameras.items():
+                    send_camera_info(
+                        node, f"camera_info_{name}", camera.camera_info, camera_info_interval,
+                    )
+                for output_id, build in builders.items():
+                    seq, value = values[output_id]
+                    if value is None:
+                        continue
+                    with stage_timer.stage(batch_stages[output_id]):
+                        batch = build(value)
+                    publisher.send(output_id, batch, seq)
+                for name, camera in cameras.items():
+                    if camera.imu_buffer is not None:
+                        send_imu(node, f"imu_{name}", camera.imu_buffer)
+
+            elif event["type"] == "STOP":
+                dora_stop_event.set()
+                break
+    except Exception as e:
+        logger.exception("Dora error: %s", e)
+
+
+def main() -> None:
+    """Main entry point for the multi-camera RealSense node."""
+    logging.basicConfig(level=logging.INFO)
+    stage_timer.install_signal_handler()
+
+    # Get environment variables
+    serials = [s.strip() for s in os.getenv("DEVICE_SERIALS", "").split(",") if s.strip()]
+    if not serials:
+        raise ValueError("DEVICE_SERIALS must list the camera serial numbers.")
+    names = [n.strip() for n in os.getenv("CAMERA_NAMES", "").split(",") if n.strip()]
+    names = names or [f"cam{index}" for index in range(len(serials))]
+    if len(names) != len(serials):
+        raise ValueError(f"CAMERA_NAMES {names} does not match DEVICE_SERIALS {serials}.")
+    sync_modes = parse_sync_modes(os.getenv("SYNC_MODES", ""), len(serials))
+    config = CaptureConfig.from_env()
+    # One config per camera; bags are a single-camera feature.
+    configs = {
+        name: replace(config, device_serial=serial, sync_mode=sync_mode, bag=BagConfig())
+        for name, serial, sync_mode in zip(names, serials, sync_modes)
+    }
+    cameras = {
+        name: CameraOutputs.create(configs[name], f"image_{name}", f"depth_{name}")
+        for name in names
+    }
+
+    ctx = rs.context()
+    # One encoding pool for all cameras; its collector publishes every camera's images.
+    encode_pool = None
+    if config.encoding in COMPRESSED_ENCODINGS:
+        encode_pool = EncodePool(
+            config.encoding, env_quality(), int(os.getenv("ENCODE_WORKERS", "2")) * len(serials),
+            timer=stage_timer,
+        )
+        encode_pool.start()
+    dora_stop_event = threading.Event()
+    realsense_close_event = threading.Event()
+    # Start threads: masters first, so slaves lock on to a running trigger.
+    order = sorted(names, key=lambda name: configs[name].sync_mode != SYNC_MODES["master"])
+    capture_threads = [
+        threading.Thread(
+            target=capture_realsense_data,
+            args=(configs[name], cameras[name], dora_stop_event, realsense_close_event, ctx,
+                encode_pool),
+            name=f"realsense-{name}",
+            daemon=True,
+        )
+        for name in order
+    ]
+    dora_thread = threading.Thread(
+        target=send_cameras_through_dora,
+        args=(cameras, dora_stop_event, realsense_close_event, os.getenv("STATS_OUTPUT", ""),
+            float(os.getenv("STATS_INTERVAL", "1.0")),
+            float(os.getenv("CAMERA_INFO_INTERVAL", "1.0"))),
+        daemon=True,
+    )
+
+    for thread in capture_threads:
+        thread.start()
+    dora_thread.start()
+
+    try:
+        while not dora_stop_event.is_set():
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        logger.info("KeyboardInterrupt received. Exiting...")
+        dora_stop_event.set()
+    logger.info("Waiting for threads to finish...")
+    for thread in capture_threads:
+        thread.join(timeout=2.0)
+        if thread.is_alive():
+            logger.warning("%s thread is still running after timeout.", thread.name)
+    dora_thread.join(timeout=2.0)
+    if encode_pool is not None:
+        encode_pool.close()
+    if dora_thread.is_alive():
+        logger.warning("Dora thread is still running after timeout.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,115 @@
+from functools import lru_cache
+
 import pyarrow as pa
+from dora_pika_common.arrow import COMPRESSED_ENCODINGS, encoded_field, tensor_field
+from dora_pika_common.depth_codec import depth_field
 
 pa_vec3 = pa.list_(pa.float64(), 3)
-pa_image = pa.list_(pa.uint8(), 480*640*3)
-pa_depth = pa.list_(pa.uint16(), 480*640)
+pa_intrinsics = pa.list_(pa.float64(), 4)  # fx, fy, ppx, ppy
+pa_extrinsics = pa.list_(pa.float64(), 12)  # row-major rotation, translation (m)
+pa_coeffs = pa.list_(pa.float64(), 5)  # distortion coefficients
+
+
+# 定义 image_schema，按配置的分辨率和编码在启动时构建
+@lru_cache
+def image_schema(height: int, width: int, encoding: str = "rgb8") -> pa.Schema:
+  """Image schema for a ``height`` x ``width`` stream sent as ``encoding``."""
+  fields = []
+  if encoding in COMPRESSED_ENCODINGS:
+    image = encoded_field("image")
+    fields = [
+      pa.field("quality", pa.int16()),  # jpeg/webp quality or png compression level
+      pa.field("encode_ns", pa.int64()),  # time spent encoding this frame
+    ]
+  else:
+    image = tensor_field("image", (height, width, 3), pa.uint8())
+  return pa.schema([
+    pa.field("serial_number", pa.string()),
+    image,
+    pa.field("timestamp", pa.int64()),  # device (global time) timestamp, ns
+    pa.field("host_timestamp", pa.int64()),  # host receive time, ns
+    pa.field("frame_number", pa.int64()),
+    pa.field("width", pa.int16()),
+    pa.field("height", pa.int16()),
+    pa.field("encoding", pa.string()),
+    pa.field("camera_info", pa.int32()),  # generation of the camera_info output
+    *fields,
+  ])
 
-# 定义 image_schema
-pa_image_fields = [
-  pa.field("serial_number", pa.string()),
-  pa.field("image", pa_image),
-  pa.field("timestamp", pa.int64()),
-  pa.field("width", pa.int16()),
-  pa.field("height", pa.int16()),
-  pa.field("encoding", pa.string()),
-]
-pa_image_schema = pa.schema(pa_image_fields)
 
 # 定义depth_schema
-pa_depth_fileds = [
+@lru_cache
+def depth_schema(height: int, width: int, codec: str = "") -> pa.Schema:
+  """Depth schema for a ``height`` x ``width`` z16 stream, raw or ``codec``-compressed."""
+  if codec:
+    depth = depth_field("depth", (height, width), codec)
+  else:
+    depth = tensor_field("depth", (height, width), pa.uint16())
+  return pa.schema([
+    pa.field("serial_number", pa.string()),
+    depth,
+    pa.field("timestamp", pa.int64()),  # device (global time) timestamp, ns
+    pa.field("host_timestamp", pa.int64()),  # host receive time, ns
+    pa.field("frame_number", pa.int64()),
+    pa.field("width", pa.int16()),
+    pa.field("height", pa.int16()),
+    pa.field("camera_info", pa.int32()),  # generation of the camera_info output
+  ])
+
+
+@lru_cache
+def pointcloud_schema(layout: str = "xyz") -> pa.Schema:
+  """Point cloud schema: ``count`` x ``channels`` float32 points of ``layout``."""
+  return pa.schema([
+    pa.field("serial_number", pa.string()),
+    pa.field("points", pa.list_(pa.float32()), metadata={"layout": layout}),
+    pa.field("timestamp", pa.int64()),  # device timestamp of the depth frame, ns
+    pa.field("host_timestamp", pa.int64()),  # host receive time, ns
+    pa.field("frame_number", pa.int64()),
+    pa.field("count", pa.int32()),
+    pa.field("channels", pa.int8()),  # 3 (xyz) or 6 (xyzrgb)
+  ])
+
+
+# Calibration of the published streams, one row per stream (see camera_info.CameraInfo)
+pa_camera_info_schema = pa.schema([
   pa.field("serial_number", pa.string()),
-  pa.field("depth", pa_depth),
-  pa.field("timestamp", pa.int64()),
+  pa.field("generation", pa.int32()),  # matches the camera_info column of the frames
+  pa.field("stream", pa.string()),  # color | depth
   pa.field("width", pa.int16()),
   pa.field("height", pa.int16()),
-]
+  pa.field("intrinsics", pa_intrinsics),
+  pa.field("model", pa.string()),  # distortion model
+  pa.field("coeffs", pa_coeffs),
+  pa.field("extrinsics", pa_extrinsics),  # stream camera -> color camera
+  pa.field("depth_scale", pa.float32()),  # metres per depth unit
+])
+
+
+# Motion samples since the previous send, one row per sample (see imu.ImuBuffer)
+pa_imu_schema = pa.schema([
+  pa.field("serial_number", pa.dictionary(pa.int8(), pa.string())),
+  pa.field("stream", pa.dictionary(pa.int8(), pa.string())),  # accel | gyro
+  pa.field("timestamp", pa.int64()),  # device (global time) timestamp, ns
+  pa.field("frame_number", pa.int64()),
+  pa.field("x", pa.float32()),  # m/s^2 (accel) or rad/s (gyro)
+  pa.field("y", pa.float32()),
+  pa.field("z", pa.float32()),
+])
+
+
+# Frame accounting, one row per output (see FrameStats)
+pa_stats_schema = pa.schema([
+  pa.field("serial_number", pa.string()),
+  pa.field("output", pa.string()),
+  pa.field("captured", pa.int64()),  # frames received from the device
+  pa.field("dropped", pa.int64()),  # frame number gaps: device, USB or a full frame queue
+  pa.field("duplicate", pa.int64()),  # frame numbers received twice
+  pa.field("overwritten", pa.int64()),  # published but replaced before a send
+  pa.field("queue_size", pa.int32()),  # FRAME_QUEUE capacity, 0 with wait_for_frames
+])
+
 
-pa_depth_schema = pa.schema(pa_depth_fileds)
+# 默认 640x480 的 schema
+pa_image_schema = image_schema(480, 640)
+pa_depth_schema = depth_schema(480, 640)
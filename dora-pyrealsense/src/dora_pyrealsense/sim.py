@@ -0,0 +1,551 @@
+"""Simulated RealSense backend (``BACKEND=sim``).
+
+Implements the subset of the ``pyrealsense2`` API used by the node with
+deterministic synthetic (or ``SIM_REPLAY``) color and depth frames, delivered at
+the configured stream rate. Devices are listed from ``SIM_SERIALS`` (comma
+separated), defaulting to ``DEVICE_SERIALS`` or ``DEVICE_SERIAL``.
+
+Recording (``enable_record_to_file``) and playback (``enable_device_from_file``)
+use a simulated bag: an ``.npz`` archive of the color and depth frames with
+their frame numbers and timestamps, written when the pipeline stops.
+"""
+
+import collections
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+from dora_pika_common.sim import FrameSource, Pacer
+from typing_extensions import Self
+
+
+class Stream:
+    """Stand-in for ``rs.stream``."""
+
+    color = "color"
+    depth = "depth"
+    accel = "accel"
+    gyro = "gyro"
+
+
+MOTION_STREAMS = (Stream.accel, Stream.gyro)
+
+
+class Format:
+    """Stand-in for ``rs.format``."""
+
+    rgb8 = "rgb8"
+    bgr8 = "bgr8"
+    z16 = "z16"
+    motion_xyz32f = "motion_xyz32f"
+
+
+class CameraInfo:
+    """Stand-in for ``rs.camera_info``."""
+
+    serial_number = "serial_number"
+    name = "name"
+
+
+class Option:
+    """Stand-in for ``rs.option``."""
+
+    global_time_enabled = "global_time_enabled"
+    inter_cam_sync_mode = "inter_cam_sync_mode"
+    filter_magnitude = "filter_magnitude"
+
+
+class TimestampDomain:
+    """Stand-in for ``rs.timestamp_domain``."""
+
+    hardware_clock = "hardware_clock"
+    system_time = "system_time"
+    global_time = "global_time"
+
+
+class PlaybackStatus:
+    """Stand-in for ``rs.playback_status``."""
+
+    playing = "playing"
+    paused = "paused"
+    stopped = "stopped"
+
+
+class SimSensor:
+    """Stand-in for ``rs.sensor``; options are stored and otherwise ignored."""
+
+    def __init__(self: Self) -> None:
+        self.options: dict[str, float] = {}
+
+    def supports(self: Self, option: str) -> bool:
+        return option in (Option.global_time_enabled, Option.inter_cam_sync_mode)
+
+    def set_option(self: Self, option: str, value: float) -> None:
+        self.options[option] = value
+
+    def get_option(self: Self, option: str) -> float:
+        return self.options.get(option, 0.0)
+
+
+class SimDepthSensor(SimSensor):
+    """Stand-in for ``rs.depth_sensor``; simulated depth is in millimetres."""
+
+    def get_depth_scale(self: Self) -> float:
+        return 0.001
+
+
+class SimDevice:
+    """One simulated camera."""
+
+    def __init__(self: Self, serial: str) -> None:
+        self.serial = serial
+        self._sensors = [SimDepthSensor(), SimSensor()]
+
+    def get_info(self: Self, info: str) -> str:
+        return self.serial if info == CameraInfo.serial_number else "Intel RealSense D435I (sim)"
+
+    def query_sensors(self: Self) -> list[SimSensor]:
+        return self._sensors
+
+    def first_depth_sensor(self: Self) -> SimDepthSensor:
+        return self._sensors[0]
+
+    def as_playback(self: Self) -> "SimPlayback":
+        if not isinstance(self, SimPlayback):
+            raise RuntimeError("Device is not a playback device.")
+        return self
+
+
+class SimPlayback(SimDevice):
+    """Stand-in for ``rs.playback``, the device of a pipeline reading a bag."""
+
+    def __init__(self: Self, serial: str, path: str, repeat: bool) -> None:
+        super().__init__(serial)
+        self.path = path
+        self.repeat = repeat
+        self.real_time = True
+        self.status = PlaybackStatus.playing
+
+    def file_name(self: Self) -> str:
+        return self.path
+
+    def set_real_time(self: Self, real_time: bool) -> None:
+        self.real_time = real_time
+
+    def is_real_time(self: Self) -> bool:
+        return self.real_time
+
+    def current_status(self: Self) -> str:
+        return self.status
+
+
+class SimDeviceList(list):
+    """List of devices with the ``size()`` accessor of ``rs.device_list``."""
+
+    def size(self: Self) -> int:
+        return len(self)
+
+
+class SimContext:
+    """Stand-in for ``rs.context``."""
+
+    def query_devices(self: Self) -> SimDeviceList:
+        serials = (
+            os.getenv("SIM_SERIALS")
+            or os.getenv("DEVICE_SERIALS")
+            or os.getenv("DEVICE_SERIAL")
+            or "sim000000000"
+        )
+        return SimDeviceList(SimDevice(serial) for serial in serials.split(","))
+
+
+class SimConfig:
+    """Stand-in for ``rs.config``."""
+
+    def __init__(self: Self) -> None:
+        self.serial = ""
+        self.streams: dict[str, tuple[int, int, str, int]] = {}
+        self.playback_path = ""
+        self.repeat_playback = True
+        self.record_path = ""
+
+    def enable_device(self: Self, serial: str) -> None:
+        self.serial = serial
+
+    def enable_device_from_file(self: Self, path: str, repeat_playback: bool = True) -> None:
+        self.playback_path = path
+        self.repeat_playback = repeat_playback
+
+    def enable_record_to_file(self: Self, path: str) -> None:
+        self.record_path = path
+
+    def enable_stream(
+        self: Self, stream: str, width: int = 0, height: int = 0, fmt: str = "", fps: int = 30,
+    ) -> None:
+        if isinstance(width, str):
+            # Motion overload: enable_stream(stream, format, framerate).
+            width, height, fmt, fps = 0, 0, width, height
+        self.streams[stream] = (width, height, fmt, fps)
+
+
+class SimIntrinsics:
+    """Pinhole intrinsics of a D435 color stream scaled to the resolution."""
+
+    def __init__(self: Self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.ppx = width / 2.0 - 0.5
+        self.ppy = height / 2.0 - 0.5
+        self.fx = 605.0 * width / 640.0
+        self.fy = 605.0 * width / 640.0
+        self.model = "brown_conrady"
+        self.coeffs = [0.0, 0.0, 0.0, 0.0, 0.0]
+
+
+class SimExtrinsics:
+    """Depth to color extrinsics of a D435: 15 mm baseline along x."""
+
+    def __init__(self: Self, translation_x: float) -> None:
+        # Column-major, as in librealsense.
+        self.rotation = [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0]
+        self.translation = [translation_x, 0.0, 0.0]
+
+
+class SimStreamProfile:
+    """Stand-in for ``rs.video_stream_profile``."""
+
+    def __init__(self: Self, stream: str, width: int, height: int, fps: int) -> None:
+        self._stream = stream
+        self._width = width
+        self._height = height
+        self._fps = fps
+
+    def as_video_stream_profile(self: Self) -> "SimStreamProfile":
+        return self
+
+    def get_intrinsics(self: Self) -> SimIntrinsics:
+        return SimIntrinsics(self._width, self._height)
+
+    def get_extrinsics_to(self: Self, other: "SimStreamProfile") -> SimExtrinsics:
+        if self._stream == other._stream:
+            return SimExtrinsics(0.0)
+        return SimExtrinsics(0.015 if self._stream == Stream.depth else -0.015)
+
+    def stream_type(self: Self) -> str:
+        return self._stream
+
+    def fps(self: Self) -> int:
+        return self._fps
+
+
+class SimPipelineProfile:
+    """Stand-in for ``rs.pipeline_profile``."""
+
+    def __init__(self: Self, config: SimConfig, device: Optional[SimDevice] = None) -> None:
+        self._profiles = {
+            stream: SimStreamProfile(stream, width, height, fps)
+            for stream, (width, height, _, fps) in config.streams.items()
+        }
+        self._device = device or SimDevice(config.serial or "sim000000000")
+
+    def get_stream(self: Self, stream: str) -> SimStreamProfile:
+        return self._profiles[stream]
+
+    def get_device(self: Self) -> SimDevice:
+        return self._device
+
+
+class SimFrame:
+    """Stand-in for ``rs.frame`` wrapping one numpy buffer."""
+
+    def __init__(self: Self, data: np.ndarray, number: int, timestamp_ms: float) -> None:
+        self._data = data
+        self._number = number
+        self._timestamp = timestamp_ms
+
+    def __bool__(self: Self) -> bool:
+        return self._data is not None
+
+    def get_data(self: Self) -> np.ndarray:
+        return self._data
+
+    def keep(self: Self) -> None:
+        pass
+
+    def get_frame_number(self: Self) -> int:
+        return self._number
+
+    def get_timestamp(self: Self) -> float:
+        return self._timestamp
+
+    def get_frame_timestamp_domain(self: Self) -> str:
+        return TimestampDomain.global_time
+
+
+class SimMotionData:
+    """Stand-in for ``rs.vector``."""
+
+    def __init__(self: Self, x: float, y: float, z: float) -> None:
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class SimMotionFrame(SimFrame):
+    """Stand-in for ``rs.motion_frame``: a D435i at rest, slowly rocking."""
+
+    def __init__(self: Self, stream: str, number: int, timestamp_ms: float) -> None:
+        super().__init__(None, number, timestamp_ms)
+        self._profile = SimStreamProfile(stream, 0, 0, 0)
+
+    def __bool__(self: Self) -> bool:
+        return True
+
+    def get_profile(self: Self) -> "SimStreamProfile":
+        return self._profile
+
+    def as_motion_frame(self: Self) -> "SimMotionFrame":
+        return self
+
+    def get_motion_data(self: Self) -> SimMotionData:
+        phase = np.sin(self._timestamp / 1000.0)
+        if self._profile.stream_type() == Stream.accel:
+            return SimMotionData(0.1 * phase, -9.81, 0.0)
+        return SimMotionData(0.0, 0.0, 0.05 * phase)
+
+
+class SimFrameset:
+    """Stand-in for ``rs.composite_frame``."""
+
+    def __init__(self: Self, color: SimFrame, depth: SimFrame) -> None:
+        self._color = color
+        self._depth = depth
+
+    def get_color_frame(self: Self) -> SimFrame:
+        return self._color
+
+    def get_depth_frame(self: Self) -> SimFrame:
+        return self._depth
+
+    def as_frameset(self: Self) -> "SimFrameset":
+        return self
+
+
+class SimFrameQueue:
+    """Stand-in for ``rs.frame_queue``; when full, the oldest frame is dropped."""
+
+    def __init__(self: Self, capacity: int = 1, keep_frames: bool = False) -> None:
+        self._frames: collections.deque = collections.deque(maxlen=capacity)
+        self._ready = threading.Condition()
+
+    def __call__(self: Self, frame: SimFrameset) -> None:
+        self.enqueue(frame)
+
+    def enqueue(self: Self, frame: SimFrameset) -> None:
+        with self._ready:
+            self._frames.append(frame)
+            self._ready.notify()
+
+    def wait_for_frame(self: Self, timeout_ms: int = 5000) -> SimFrameset:
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._frames, timeout_ms / 1000):
+                raise RuntimeError(f"Frame didn't arrive within {timeout_ms}")
+            return self._frames.popleft()
+
+
+class SimPipeline:
+    """Stand-in for ``rs.pipeline`` producing color + depth framesets at the stream fps.
+
+    Started with a callback (e.g. a `SimFrameQueue`), a producer thread delivers
+    the framesets to it instead of `wait_for_frames`. A config with
+    ``enable_device_from_file`` plays a simulated bag back instead, one with
+    ``enable_record_to_file`` records every frameset into one.
+    """
+
+    def __init__(self: Self, ctx: Optional[SimContext] = None) -> None:
+        self._color: Optional[FrameSource] = None
+        self._depth: Optional[FrameSource] = None
+        self._producer: Optional[threading.Thread] = None
+        self._motion_producers: list[threading.Thread] = []
+        self._running = False
+        self._playback: Optional[SimPlayback] = None
+        self._bag: dict[str, np.ndarray] = {}
+        self._pacer: Optional[Pacer] = None
+        self._played = 0
+        self._record_path = ""
+        self._record_serial = ""
+        self._recorded: dict[str, list] = {}
+
+    def start(
+        self: Self, config: SimConfig, callback: Optional[Callable[[SimFrameset], None]] = None,
+    ) -> SimPipelineProfile:
+        motion = {s: fps for s, (_, _, _, fps) in config.streams.items() if s in MOTION_STREAMS}
+        if motion and callback is not None:
+            self._running = True
+            self._motion_producers = [
+                threading.Thread(target=self._produce_motion, args=(s, fps, callback), daemon=True)
+                for s, fps in motion.items()
+            ]
+            for producer in self._motion_producers:
+                producer.start()
+            return SimPipelineProfile(config)
+        width, height, _, fps = config.streams.get(Stream.color, (640, 480, Format.rgb8, 30))
+        if config.playback_path:
+            profile = self._start_playback(config, (height, width), fps)
+        else:
+            profile = SimPipelineProfile(config)
+            self._color = FrameSource((height, width, 3), np.uint8, fps)
+            depth_width, depth_height, _, _ = config.streams.get(
+                Stream.depth, (width, height, "", fps),
+            )
+            # Depth in millimetres with a slice beyond the 5 m clamp.
+            self._depth = FrameSource(
+                (depth_height, depth_width), np.uint16, 0, replay_path="", low=300, high=6000,
+            )
+        if config.record_path:
+            self._record_path = config.record_path
+            self._record_serial = profile.get_device().serial
+            self._recorded = {"color": [], "depth": [], "numbers": [], "timestamps": []}
+        if callback is not None:
+            self._running = True
+            self._producer = threading.Thread(target=self._produce, args=(callback,), daemon=True)
+            self._producer.start()
+        return profile
+
+    def _start_playback(
+        self: Self, config: SimConfig, shape: tuple[int, int], fps: int,
+    ) -> SimPipelineProfile:
+        if not os.path.exists(config.playback_path):
+            raise RuntimeError(f"Failed to open file {config.playback_path}")
+        with np.load(config.playback_path) as bag:
+            self._bag = {name: bag[name] for name in bag.files}
+        if self._bag["color"].shape[1:3] != shape:
+            raise RuntimeError("Couldn't resolve requests")
+        self._playback = SimPlayback(
+            str(self._bag["serial"]), config.playback_path, config.repeat_playback,
+        )
+        self._pacer = Pacer(fps)
+        self._played = 0
+        return SimPipelineProfile(config, self._playback)
+
+    def _play(self: Self) -> SimFrameset:
+        """Next frameset of the bag, paced at the stream rate in real time mode."""
+        count = len(self._bag["color"])
+        if self._played >= count and not self._playback.repeat:
+            self._playback.status = PlaybackStatus.stopped
+            raise RuntimeError("Frame didn't arrive within 5000")
+        if self._playback.real_time:
+            self._pacer.wait()
+        index = self._played % count
+        self._played += 1
+        number = int(self._bag["numbers"][index])
+        timestamp_ms = float(self._bag["timestamps"][index])
+        return SimFrameset(
+            SimFrame(self._bag["color"][index], number, timestamp_ms),
+            SimFrame(self._bag["depth"][index], number, timestamp_ms),
+        )
+
+    def _produce_motion(self: Self, stream: str, fps: int, callback: Callable) -> None:
+        pacer = Pacer(fps)
+        while self._running:
+            number = pacer.wait()
+            callback(SimMotionFrame(stream, number, time.time() * 1000.0))
+
+    def _produce(self: Self, callback: Callable[[SimFrameset], None]) -> None:
+        while self._running:
+            try:
+                frames = self.wait_for_frames()
+            except RuntimeError:
+                return  # end of a non-repeating playback: the queue runs dry
+            callback(frames)
+
+    def wait_for_frames(self: Self, timeout_ms: int = 5000) -> SimFrameset:
+        if self._playback is not None:
+            return self._play()
+        color = self._color.read()
+        number = self._color.index
+        depth = self._depth.read()
+        timestamp_ms = time.time() * 1000.0
+        if self._record_path:
+            for name, value in zip(self._recorded, (color, depth, number, timestamp_ms)):
+                self._recorded[name].append(value)
+        return SimFrameset(
+            SimFrame(color, number, timestamp_ms),
+            SimFrame(depth, number, timestamp_ms),
+        )
+
+    def stop(self: Self) -> None:
+        self._running = False
+        for producer in [self._producer, *self._motion_producers]:
+            if producer is not None:
+                producer.join(timeout=1.0)
+        self._producer = None
+        self._motion_producers = []
+        self._color = None
+        self._depth = None
+        self._playback = None
+        if self._record_path:
+            # Written on stop, like the bag of rs.recorder.
+            with open(self._record_path, "wb") as bag:
+                np.savez(bag, serial=self._record_serial, **{
+                    name: np.asarray(values) for name, values in self._recorded.items()
+                })
+            self._record_path = ""
+
+
+class SimAlign:
+    """Stand-in for ``rs.align``; simulated streams are already registered."""
+
+    def __init__(self: Self, align_to: str) -> None:
+        self.align_to = align_to
+
+    def process(self: Self, frames: SimFrameset) -> SimFrameset:
+        return frames
+
+
+class SimFilter:
+    """Stand-in for ``rs.filter``; passes frames through unchanged."""
+
+    def __init__(self: Self) -> None:
+        self.options: dict[str, float] = {}
+
+    def set_option(self: Self, option: str, value: float) -> None:
+        self.options[option] = value
+
+    def process(self: Self, frame: SimFrame) -> SimFrame:
+        return frame
+
+
+class SimDecimationFilter(SimFilter):
+    """Stand-in for ``rs.decimation_filter``: keeps every ``filter_magnitude``-th pixel."""
+
+    def process(self: Self, frame: SimFrame) -> SimFrame:
+        magnitude = int(self.options.get(Option.filter_magnitude, 2))
+        return SimFrame(frame.get_data()[::magnitude, ::magnitude], frame._number, frame._timestamp)
+
+
+# pyrealsense2-compatible names, so the node can use this module as ``rs``.
+stream = Stream
+format = Format  # noqa: A001
+camera_info = CameraInfo
+option = Option
+timestamp_domain = TimestampDomain
+playback_status = PlaybackStatus
+context = SimContext
+device = SimDevice
+playback = SimPlayback
+frame = SimFrame
+composite_frame = SimFrameset
+video_stream_profile = SimStreamProfile
+pipeline_profile = SimPipelineProfile
+config = SimConfig
+pipeline = SimPipeline
+frame_queue = SimFrameQueue
+align = SimAlign
+filter = SimFilter  # noqa: A001
+decimation_filter = SimDecimationFilter
+spatial_filter = SimFilter
+temporal_filter = SimFilter
+hole_filling_filter = SimFilter
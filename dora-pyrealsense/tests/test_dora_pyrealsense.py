@@ -1,6 +1,9 @@
 """TODO: Add docstring."""
 
+from pathlib import Path
+
 import pytest
+from dora_pika_common.testing import FakeNode
 
 
 def test_import_main() -> None:
@@ -8,5 +11,443 @@ def test_import_main() -> None:
     from dora_pyrealsense.main import main
 
     # Check that everything is working, and catch dora Runtime Exception as we're not running in a dora dataflow.
-    with pytest.raises(ConnectionError):
+    with pytest.raises(RuntimeError):
         main()
+
+
+def _run_sim(
+    monkeypatch: pytest.MonkeyPatch,
+    width: int,
+    height: int,
+    flip: str,
+    encoding: str,
+    *,
+    align_mode: str = "depth_to_color",
+    align_every: int = 1,
+    depth_config: object = None,
+    ticks: int = 10,
+    pointcloud_config: object = None,
+    encode_pool: object = None,
+    queue_size: int = 0,
+    imu: bool = False,
+    bag_config: object = None,
+) -> FakeNode:
+    """Runs the capture and send threads against the simulated backend."""
+    import threading
+
+    from dora_pika_common.testing import wait_for_data
+
+    import dora_pyrealsense.main as realsense
+
+    node = FakeNode(ticks=ticks)
+    monkeypatch.setattr(realsense, "Node", lambda: node)
+    # One simulated camera, with the serial number the outputs are checked for.
+    monkeypatch.setenv("SIM_SERIALS", "sim")
+
+    config = realsense.CaptureConfig(
+        "sim", width, height, flip, encoding, align_mode, align_every,
+        queue_size=queue_size,
+        imu=imu,
+        depth=depth_config or realsense.DepthConfig(),
+        pointcloud=pointcloud_config or realsense.PointCloudConfig(),
+        bag=bag_config or realsense.BagConfig(),
+    )
+    outputs = realsense.CameraOutputs.create(config)
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    capture = threading.Thread(
+        target=realsense.capture_realsense_data,
+        args=(config, outputs, stop_event, close_event),
+        kwargs={"encode_pool": encode_pool},
+    )
+    capture.start()
+    assert wait_for_data(outputs.image_store, outputs.depth_store)
+    realsense.send_data_through_dora(outputs, stop_event, close_event, "stats", 0.1, 0.1)
+    capture.join(timeout=2.0)
+    # Only a playback that is not looped ends by itself.
+    ended = bag_config is not None and bag_config.playback and not bag_config.loop
+    assert close_event.is_set() == bool(ended)
+    return node
+
+
+@pytest.mark.parametrize(
+    ("width", "height", "encoding"), [(640, 480, "rgb8"), (848, 480, "bgr8"), (1280, 720, "jpeg")],
+)
+def test_sim_capture_to_publish(
+    monkeypatch: pytest.MonkeyPatch, width: int, height: int, encoding: str,
+) -> None:
+    """Runs the capture and send threads against the simulated backend."""
+    import numpy as np
+
+    node = _run_sim(monkeypatch, width, height, "", encoding)
+    images = node.outputs("image")
+    depths = node.outputs("depth")
+    assert images and depths
+    seqs = [metadata["seq"] for _, metadata in images]
+    assert seqs == sorted(set(seqs))
+    image = images[-1][0].column("image").flatten().to_numpy()
+    if encoding == "jpeg":
+        import cv2
+
+        assert cv2.imdecode(image, cv2.IMREAD_COLOR).shape == (height, width, 3)
+    else:
+        assert image.dtype == np.uint8 and image.size == height * width * 3
+    depth = depths[-1][0].column("depth").flatten().to_numpy()
+    assert depth.size == height * width and depth.max() <= 5000
+    # Device timestamps precede the host receive time; frame numbers count up.
+    for batch, _ in images + depths:
+        timestamp = batch.column("timestamp")[0].as_py()
+        assert 0 < timestamp <= batch.column("host_timestamp")[0].as_py()
+    numbers = [batch.column("frame_number")[0].as_py() for batch, _ in images]
+    assert numbers == sorted(set(numbers))
+
+
+@pytest.mark.parametrize("encoding", ["bgr8", "jpeg"])
+def test_sim_flip_into_buffers(monkeypatch: pytest.MonkeyPatch, encoding: str) -> None:
+    """Flip and color conversion write into recycled buffers, never into the SDK frame."""
+    import cv2
+    from dora_pika_common.encode import EncodePool
+
+    pool = EncodePool(encoding) if encoding == "jpeg" else None
+    if pool is not None:
+        pool.start()
+    try:
+        node = _run_sim(monkeypatch, 64, 48, "BOTH", encoding, encode_pool=pool)
+    finally:
+        if pool is not None:
+            pool.close()
+    # The sim frames are read-only: a write into them would have stopped the capture.
+    images = [batch for batch, _ in node.outputs("image")]
+    assert len(images) > 1
+    image = images[-1].column("image").flatten().to_numpy()
+    if encoding == "jpeg":
+        assert cv2.imdecode(image, cv2.IMREAD_COLOR).shape == (48, 64, 3)
+    else:
+        assert image.size == 48 * 64 * 3
+
+
+@pytest.mark.parametrize(("encoding", "quality"), [("jpeg", 80), ("png", 3), ("webp", 90)])
+def test_sim_encode_pool(monkeypatch: pytest.MonkeyPatch, encoding: str, quality: int) -> None:
+    """Pool-encoded frames arrive in capture order with their quality and encode time."""
+    import cv2
+    from dora_pika_common.encode import EncodePool
+
+    pool = EncodePool(encoding, quality, workers=3)
+    pool.start()
+    try:
+        node = _run_sim(monkeypatch, 640, 480, "", encoding, ticks=20, encode_pool=pool)
+    finally:
+        pool.close()
+    images = [batch for batch, _ in node.outputs("image")]
+    assert len(images) > 1
+    numbers = [batch.column("frame_number")[0].as_py() for batch in images]
+    assert numbers == sorted(set(numbers))
+    for batch in images:
+        assert batch.column("quality")[0].as_py() == quality
+        assert batch.column("encode_ns")[0].as_py() > 0
+    image = images[-1].column("image").flatten().to_numpy()
+    assert cv2.imdecode(image, cv2.IMREAD_COLOR).shape == (480, 640, 3)
+
+
+def test_frame_counter_counts_gaps() -> None:
+    """Frame number gaps are dropped frames; a restart of the numbering is not."""
+    from dora_pyrealsense.main import FrameCounter
+
+    counter = FrameCounter("color")
+    assert [counter.update(n) for n in (10, 11, 14, 15, 2, 3)] == [0, 0, 2, 0, 0, 0]
+    assert counter.dropped == 2
+
+
+def test_frame_counter_counts_duplicates() -> None:
+    from dora_pyrealsense.main import FrameCounter
+
+    counter = FrameCounter("depth")
+    for number in (1, 2, 2, 3):
+        counter.update(number)
+    assert (counter.captured, counter.dropped, counter.duplicate) == (4, 0, 1)
+
+
+@pytest.mark.parametrize("queue_size", [0, 2])
+def test_sim_frame_stats(monkeypatch: pytest.MonkeyPatch, queue_size: int) -> None:
+    """The stats output accounts for every captured frame, with or without a frame queue."""
+    node = _run_sim(monkeypatch, 64, 48, "", "rgb8", ticks=20, queue_size=queue_size)
+    stats = node.outputs("stats")
+    assert stats
+    rows = {row["output"]: row for row in stats[-1][0].to_pylist()}
+    assert set(rows) == {"image", "depth"}
+    for row in rows.values():
+        assert row["serial_number"] == "sim" and row["queue_size"] == queue_size
+        assert row["captured"] > 0 and row["duplicate"] == 0
+        assert row["overwritten"] >= 0 and row["dropped"] >= 0
+    last_stats = max(i for i, (output_id, _, _) in enumerate(node.sent) if output_id == "stats")
+    sent = sum(output_id == "image" for output_id, _, _ in node.sent[:last_stats])
+    image = rows["image"]
+    # Every capture is either sent, overwritten before a send, or still pending.
+    assert 0 < sent and sent + image["overwritten"] <= image["captured"]
+
+
+@pytest.mark.parametrize("align_mode", ["depth_to_color", "color_to_depth", "none"])
+def test_sim_align_modes(monkeypatch: pytest.MonkeyPatch, align_mode: str) -> None:
+    """Calibration follows the align mode; ALIGN_EVERY thins out the aligned stream."""
+    node = _run_sim(
+        monkeypatch, 64, 48, "", "rgb8", align_mode=align_mode, align_every=3, ticks=20,
+    )
+    info = {row["stream"]: row for row in node.outputs("camera_info")[-1][0].to_pylist()}
+    extrinsics = info["depth"]["extrinsics"]
+    if align_mode == "none":
+        assert extrinsics[9] == 0.015  # depth -> color baseline
+        assert len(node.outputs("image")) > 10 and len(node.outputs("depth")) > 10
+    else:
+        assert extrinsics == [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0]
+        assert info["color"]["intrinsics"] == info["depth"]["intrinsics"]
+        # Only every third frameset is aligned, the other stream goes out every frame.
+        sent = {output: len(node.outputs(output)) for output in ("image", "depth")}
+        thinned = "depth" if align_mode == "depth_to_color" else "image"
+        assert sent[thinned] < sent["depth" if thinned == "image" else "image"]
+    assert info["depth"]["depth_scale"] == pytest.approx(0.001)
+    assert info["color"]["model"] == "brown_conrady" and len(info["color"]["coeffs"]) == 5
+
+
+def test_sim_camera_info(monkeypatch: pytest.MonkeyPatch) -> None:
+    """camera_info goes out once per generation, before its frames, and is re-sent."""
+    node = _run_sim(monkeypatch, 64, 48, "", "rgb8", ticks=30)
+    infos = [batch for batch, _ in node.outputs("camera_info")]
+    generations = {batch.column("generation")[0].as_py() for batch in infos}
+    assert generations == {1}
+    # Latched: re-sent every 0.1 s for late subscribers.
+    assert len(infos) > 1
+    assert {row["stream"] for row in infos[0].to_pylist()} == {"color", "depth"}
+    for output in ("image", "depth"):
+        assert {batch.column("camera_info")[0].as_py() for batch, _ in node.outputs(output)} == {1}
+        assert "intrinsics" not in node.outputs(output)[0][0].schema.names
+
+
+def test_camera_info_generations() -> None:
+    """The generation only moves when a stream's calibration changes."""
+    from dataclasses import replace
+
+    from dora_pyrealsense.camera_info import CameraInfo, StreamInfo
+
+    color = StreamInfo("color", 4, 3, (2.0, 2.0, 1.5, 1.0), "none", (0.0,) * 5, (0.0,) * 12, 0.001)
+    depth = StreamInfo("depth", 4, 3, (2.0, 2.0, 1.5, 1.0), "none", (0.0,) * 5, (0.0,) * 12, 0.001)
+    camera_info = CameraInfo("sim")
+    assert camera_info.due(60.0) is None
+    assert camera_info.update(color, depth) == 1
+    assert camera_info.update(depth) == 1
+    assert camera_info.due(60.0).num_rows == 2
+    assert camera_info.due(60.0) is None
+    decimated = replace(depth, width=2, height=2, intrinsics=(1.0, 1.0, 0.5, 0.5))
+    assert camera_info.update(decimated) == 2
+    assert camera_info.due(60.0).column("width").to_pylist() == [4, 2]
+
+
+@pytest.mark.parametrize("realtime", [True, False])
+def test_sim_record_and_playback(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, realtime: bool,
+) -> None:
+    """A recorded session plays back through the capture path and then stops the node."""
+    import time
+
+    import numpy as np
+
+    import dora_pyrealsense.main as realsense
+
+    bag = tmp_path / "session.bag"
+    recorded = _run_sim(
+        monkeypatch, 64, 48, "", "rgb8", bag_config=realsense.BagConfig(record=str(bag)),
+    )
+    assert recorded.outputs("image")
+    with np.load(bag) as session:
+        numbers = session["numbers"].tolist()
+        timestamps = session["timestamps"]
+        assert session["color"].shape == (len(numbers), 48, 64, 3)
+    assert len(numbers) >= len(recorded.outputs("image"))
+
+    start = time.perf_counter()
+    node = _run_sim(
+        monkeypatch, 64, 48, "", "rgb8", ticks=300,
+        bag_config=realsense.BagConfig(playback=str(bag), realtime=realtime),
+    )
+    # Stopped at the end of the recording, long before the 10 s of ticks.
+    assert time.perf_counter() - start < 5.0
+    if realtime:
+        images = [batch for batch, _ in node.outputs("image")]
+        assert images
+        for batch in images:
+            number = batch.column("frame_number")[0].as_py()
+            assert number in numbers
+            recorded_ms = timestamps[numbers.index(number)]
+            assert batch.column("timestamp")[0].as_py() == int(recorded_ms * 1e6)
+
+
+def test_bag_config_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    """PLAYBACK and RECORD cannot be combined."""
+    import dora_pyrealsense.main as realsense
+
+    monkeypatch.setenv("PLAYBACK", "in.bag")
+    monkeypatch.setenv("PLAYBACK_REALTIME", "0")
+    config = realsense.BagConfig.from_env()
+    assert (config.playback, config.realtime, config.loop) == ("in.bag", False, False)
+    monkeypatch.setenv("RECORD", "out.bag")
+    with pytest.raises(ValueError, match="exclusive"):
+        realsense.BagConfig.from_env()
+
+
+def test_parse_sync_modes() -> None:
+    from dora_pyrealsense.multi import parse_sync_modes
+
+    assert parse_sync_modes("master, slave", 3) == [1, 2, None]
+    assert parse_sync_modes("", 2) == [None, None]
+    assert parse_sync_modes("0,3", 2) == [0, 3]
+
+
+def test_sim_multi_camera(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Two cameras share one context and publish per-camera outputs from one process."""
+    import threading
+
+    from dora_pika_common.testing import wait_for_data
+
+    monkeypatch.setenv("SIM_SERIALS", "111,222")
+    import dora_pyrealsense.main as realsense
+    import dora_pyrealsense.multi as multi
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(multi, "Node", lambda: node)
+
+    ctx = realsense.rs.context()
+    configs = {
+        name: realsense.CaptureConfig(serial, 64, 48, sync_mode=mode)
+        for name, serial, mode in (("left", "111", 1), ("right", "222", 2))
+    }
+    cameras = {
+        name: realsense.CameraOutputs.create(config, f"image_{name}", f"depth_{name}")
+        for name, config in configs.items()
+    }
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    threads = [
+        threading.Thread(
+            target=realsense.capture_realsense_data,
+            args=(configs[name], cameras[name], stop_event, close_event, ctx),
+        )
+        for name in configs
+    ]
+    for thread in threads:
+        thread.start()
+    assert wait_for_data(
+        *(store for camera in cameras.values() for store in (camera.image_store, camera.depth_store)),
+    )
+    multi.send_cameras_through_dora(cameras, stop_event, close_event)
+    for thread in threads:
+        thread.join(timeout=2.0)
+
+    assert not close_event.is_set()
+    for name, serial in (("left", "111"), ("right", "222")):
+        assert node.outputs(f"image_{name}") and node.outputs(f"depth_{name}")
+        image = node.outputs(f"image_{name}")[-1][0]
+        assert image.column("serial_number")[0].as_py() == serial
+
+
+def test_sim_depth_codec(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Compressed depth decodes back to the clamped frame with the consumer helpers."""
+    from dora_pika_client import tensor
+
+    from dora_pyrealsense.main import DepthConfig
+
+    node = _run_sim(monkeypatch, 64, 48, "", "rgb8", depth_config=DepthConfig(codec="zstd"))
+    batch = node.outputs("depth")[-1][0]
+    assert batch.schema.field("depth").metadata[b"codec"] == b"zstd"
+    assert batch.column("depth")[0].values.nbytes < 64 * 48 * 2
+    depth = tensor(batch, "depth")
+    assert depth.shape == (48, 64) and depth.dtype.name == "uint16"
+    assert 0 < depth.max() <= 5000
+
+
+def test_sim_depth_decimation(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Decimation by 2 halves the published depth and rescales its intrinsics."""
+    from dora_pika_client import tensor
+
+    from dora_pyrealsense.main import DepthConfig
+
+    config = DepthConfig(filters=("decimation", "spatial"), decimation=2, max_depth=4000)
+    node = _run_sim(monkeypatch, 64, 48, "", "rgb8", depth_config=config)
+    batch = node.outputs("depth")[-1][0]
+    depth = tensor(batch, "depth")
+    assert depth.shape == (24, 32)
+    assert batch.column("width")[0].as_py() == 32 and batch.column("height")[0].as_py() == 24
+    assert batch.column("camera_info")[0].as_py() == 2  # the undecimated depth was 1
+    info = node.outputs("camera_info")[-1][0].to_pylist()
+    depth_info = next(row for row in info if row["stream"] == "depth")
+    assert (depth_info["width"], depth_info["height"]) == (32, 24)
+    fx, fy, ppx, ppy = depth_info["intrinsics"]
+    assert fx == pytest.approx(605.0 * 64 / 640 / 2)
+    assert ppx == pytest.approx(((64 / 2 - 0.5) + 0.5) / 2 - 0.5)
+    assert 0 < depth.max() <= 4000
+
+
+def test_deproject_points() -> None:
+    """Points lie on the pixel rays; crop, stride and voxel downsampling reduce them."""
+    import numpy as np
+
+    from dora_pyrealsense.pointcloud import PointCloudConfig, deproject_points
+
+    depth = np.full((4, 6), 1000, dtype=np.uint16)
+    depth[0, 0] = 0
+    depth[3, 5] = 3000
+    intrinsics = [2.0, 2.0, 2.5, 1.5]
+    color = np.full((4, 6, 3), 255, dtype=np.uint8)
+
+    points = deproject_points(depth, intrinsics, 0.001, PointCloudConfig("xyzrgb"), color)
+    assert points.shape == (23, 6) and points.dtype == np.float32
+    np.testing.assert_allclose(
+        points[-1, :3], [(5 - 2.5) / 2 * 3.0, (3 - 1.5) / 2 * 3.0, 3.0], rtol=1e-6,
+    )
+    np.testing.assert_allclose(points[:, 3:], 1.0)
+
+    cropped = deproject_points(depth, intrinsics, 0.001, PointCloudConfig("xyz", max_depth=2.0))
+    assert cropped.shape == (22, 3) and cropped[:, 2].max() == 1.0
+    strided = deproject_points(depth, intrinsics, 0.001, PointCloudConfig("xyz", stride=2))
+    assert strided.shape == (5, 3)
+    voxels = deproject_points(depth, intrinsics, 0.001, PointCloudConfig("xyz", voxel=10.0))
+    # One voxel per quadrant around the optical axis.
+    assert voxels.shape == (4, 3)
+
+
+def test_sim_pointcloud(monkeypatch: pytest.MonkeyPatch) -> None:
+    """The sim node publishes XYZRGB points of the clamped depth, decodable per point."""
+    from dora_pika_client import tensor
+
+    from dora_pyrealsense.pointcloud import PointCloudConfig
+
+    config = PointCloudConfig("xyzrgb", stride=2, min_depth=0.5)
+    node = _run_sim(monkeypatch, 64, 48, "", "rgb8", pointcloud_config=config)
+    batch = node.outputs("pointcloud")[-1][0]
+    points = tensor(batch, "points")
+    assert points.shape == (batch.column("count")[0].as_py(), 6)
+    assert 0 < len(points) <= 32 * 24
+    assert points[:, 2].min() > 0.5 and points[:, 2].max() <= 5.0
+    assert 0.0 <= points[:, 3:].min() and points[:, 3:].max() <= 1.0
+    depth_numbers = [b.column("frame_number")[0].as_py() for b, _ in node.outputs("depth")]
+    assert batch.column("frame_number")[0].as_py() in depth_numbers
+
+
+def test_sim_imu(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Every accel/gyro sample arrives once, batched per send, with device timestamps."""
+    import numpy as np
+
+    node = _run_sim(monkeypatch, 64, 48, "", "rgb8", ticks=20, imu=True)
+    batches = [batch for batch, _ in node.outputs("imu")]
+    seqs = [metadata["seq"] for _, metadata in node.outputs("imu")]
+    assert seqs == list(range(1, len(seqs) + 1))
+    assert max(batch.num_rows for batch in batches) > 2
+    for stream, gravity in (("accel", -9.81), ("gyro", 0.0)):
+        numbers, timestamps, y = [], [], []
+        for batch in batches:
+            rows = batch.filter(batch.column("stream").to_numpy(zero_copy_only=False) == stream)
+            numbers += rows.column("frame_number").to_pylist()
+            timestamps += rows.column("timestamp").to_pylist()
+            y += rows.column("y").to_pylist()
+        assert numbers == list(range(numbers[0], numbers[0] + len(numbers)))
+        assert timestamps == sorted(timestamps) and timestamps[0] > 0
+        np.testing.assert_allclose(y, gravity, rtol=1e-6)
+    assert batches[0].column("serial_number")[0].as_py() == "sim"
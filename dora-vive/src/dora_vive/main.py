@@ -4,6 +4,7 @@ This module provides a Dora node that sends vive data, include imu, pose.
 """
 
 import logging
+import os
 import signal
 import sys
 import threading
@@ -11,111 +12,78 @@ import time
 from dataclasses import dataclass, field
 
 import pyarrow as pa
-import pysurvive
 from dora import Node
-from typing_extensions import Self
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.timing import StageTimer
 
 from dora_vive.pa_schema import pa_imu_schema as imu_schema
 from dora_vive.pa_schema import pa_pose_schema as pose_schema
 
+# hardware (default) or sim: a simulated tracker replacing pysurvive
+BACKEND = os.getenv("BACKEND", "hardware")
+if BACKEND == "sim":
+    from dora_vive import sim as pysurvive
+else:
+    import pysurvive
+
 logger = logging.getLogger(__name__)
 
+# Opt-in per-stage timing (STAGE_TIMING=1), see dora_pika_common.timing
+stage_timer = StageTimer("vive")
+
 
 @dataclass
 class IMUData:
-    """Stores IMU data from Vive trackers with thread-safe access."""
+    """IMU slot from Vive trackers, exchanged through a LatestValue."""
 
-    _lock: threading.Lock = field(default_factory=threading.Lock)
-    _has_data: bool = False
     acc: list[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
     gyro: list[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
     mag: list[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
     serial_number: str = ""
 
-    def update_data(
-        self: Self,
-        serial_number: str,
-        acc: list[float],
-        gyro: list[float],
-        mag: list[float],
-    ) -> None:
-        """Update IMU data."""
-        with self._lock:
-            self.serial_number = serial_number
-            self.acc = acc
-            self.gyro = gyro
-            self.mag = mag
-            self._has_data = True
-
-    def read_data(self: Self) -> tuple[bool, str, list[float], list[float], list[float]]:
-        """Read IMU data."""
-        with self._lock:
-            return (
-                self._has_data,
-                self.serial_number,
-                self.acc,
-                self.gyro,
-                self.mag,
-            )
-
 
 @dataclass
 class PoseData:
-    """Stores Pose data from Vive trackers with thread-safe access."""
+    """Pose slot from Vive trackers, exchanged through a LatestValue."""
 
-    _lock: threading.Lock = field(default_factory=threading.Lock)
-    _has_data: bool = False
     position: list[float] = field(default_factory=lambda: [0.0, 0.0, 0.0])
     rotation: list[float] = field(default_factory=lambda: [1.0, 0.0, 0.0, 0.0])
     serial_number: str = ""
 
-    def update_data(
-        self: Self,
-        serial_number: str,
-        position: list[float],
-        rotation: list[float],
-    ) -> None:
-        """Update pose data."""
-        with self._lock:
-            self.position = position
-            self.rotation = rotation
-            self.serial_number = serial_number
-            self._has_data = True
-
-    def read_data(self: Self) -> tuple[bool, str, list[float], list[float]]:
-        """Read pose data."""
-        with self._lock:
-            return self._has_data, self.serial_number, self.position, self.rotation
-
-
-def make_imu_func(imu_data: IMUData):  # noqa: ANN201
+
+def make_imu_func(imu_store: LatestValue[IMUData]):  # noqa: ANN201
     """Returns a closure that handles IMU callbacks from pysurvive."""
 
     def imu_func(ctx, _mode, accelgyro: list[float], _timecode, _dev_id) -> None:  # noqa: ANN001
-        acc = accelgyro[:3]
-        gyro = accelgyro[3:6]
-        mag = accelgyro[6:]
-        serial_number = ctx.contents.serial_number.decode("utf-8")
-        imu_data.update_data(serial_number, acc, gyro, mag)
+        imu = imu_store.acquire()
+        imu.acc = accelgyro[:3]
+        imu.gyro = accelgyro[3:6]
+        imu.mag = accelgyro[6:]
+        imu.serial_number = ctx.contents.serial_number.decode("utf-8")
+        imu_store.publish()
+        stage_timer.count("imu")
 
     return imu_func
 
 
-def make_pose_func(pose_data: PoseData):  # noqa: ANN201
+def make_pose_func(pose_store: LatestValue[PoseData]):  # noqa: ANN201
     """Returns a closure that handles Pose callbacks from pysurvive."""
 
     def pose_func(ctx, _timecode, pose: list[float]) -> None:  # noqa: ANN001
-        position = pose[:3]
-        rotation = pose[3:]
-        serial_number = ctx.contents.serial_number.decode("utf-8")
-        pose_data.update_data(serial_number, position, rotation)
+        pose_slot = pose_store.acquire()
+        pose_slot.position = pose[:3]
+        pose_slot.rotation = pose[3:]
+        pose_slot.serial_number = ctx.contents.serial_number.decode("utf-8")
+        pose_store.publish()
+        stage_timer.count("pose")
 
     return pose_func
 
 
 def receive_data_from_survive(
-    imu_data: IMUData,
-    pose_data: PoseData,
+    imu_store: LatestValue[IMUData],
+    pose_store: LatestValue[PoseData],
     dora_stop_event: threading.Event,
     survive_close_event: threading.Event,
 ) -> None:
@@ -127,11 +95,13 @@ def receive_data_from_survive(
         return
 
     try:
-        pysurvive.install_imu_fn(ctx, make_imu_func(imu_data))
-        pysurvive.install_pose_fn(ctx, make_pose_func(pose_data))
+        pysurvive.install_imu_fn(ctx, make_imu_func(imu_store))
+        pysurvive.install_pose_fn(ctx, make_pose_func(pose_store))
 
         while not dora_stop_event.is_set():
-            if pysurvive.survive_poll(ctx) != 0:
+            with stage_timer.stage("survive_poll"):
+                status = pysurvive.survive_poll(ctx)
+            if status != 0:
                 logger.error("Error polling from pysurvive.")
                 survive_close_event.set()
                 break
@@ -146,45 +116,43 @@ def receive_data_from_survive(
 
 
 def send_data_through_dora(
-    imu_data: IMUData,
-    pose_data: PoseData,
+    imu_store: LatestValue[IMUData],
+    pose_store: LatestValue[PoseData],
     dora_stop_event: threading.Event,
     survive_close_event: threading.Event,
 ) -> None:
     """Sends IMU and Pose data via Dora outputs."""
     node = Node()
+    publisher = Publisher(node, {"imu": imu_store, "pose": pose_store}, timer=stage_timer)
     try:
-        for event in node:
+        for event in publisher:
             if survive_close_event.is_set():
                 dora_stop_event.set()
                 break
             if event["type"] == "INPUT" and event["id"] == "tick":
-                has_imu, sn_imu, acc, gyro, mag = imu_data.read_data()
-                has_pose, sn_pose, pos, rot = pose_data.read_data()
-                if has_imu:
+                imu_seq, imu = publisher.read("imu")
+                pose_seq, pose = publisher.read("pose")
+                if imu is not None:
                     imu_batch = pa.record_batch(
                         {
-                            "serial_number": [sn_imu],
-                            "acc": [acc],
-                            "gyro": [gyro],
-                            "mag": [mag],
+                            "serial_number": [imu.serial_number],
+                            "acc": [imu.acc],
+                            "gyro": [imu.gyro],
+                            "mag": [imu.mag],
                         },
                         schema=imu_schema,
                     )
-                    node.send_output("imu", imu_batch)
-                if has_pose:
-                    # print(f"pos:{pos}")
+                    publisher.send("imu", imu_batch, imu_seq)
+                if pose is not None:
                     pose_batch = pa.record_batch(
                         {
-                            "serial_number": [sn_pose],
-                            "position": [pos],
-                            "rotation": [rot],
+                            "serial_number": [pose.serial_number],
+                            "position": [pose.position],
+                            "rotation": [pose.rotation],
                         },
                         schema=pose_schema,
                     )
-                    node.send_output("pose", pose_batch)
-
-                time.sleep(0.001)
+                    publisher.send("pose", pose_batch, pose_seq)
 
             elif event["type"] == "STOP":
                 dora_stop_event.set()
@@ -207,24 +175,25 @@ if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
     # 创建事件和数据存储
-    imu_data = IMUData()
-    pose_data = PoseData()
+    imu_store = LatestValue(IMUData)
+    pose_store = LatestValue(PoseData)
     dora_stop_event = threading.Event()
     survive_close_event = threading.Event()
 
     # 设置信号处理
     signal.signal(signal.SIGINT, signal_handler)
+    stage_timer.install_signal_handler()
     logger.info("Press Ctrl+C to exit...")
 
     # 启动线程
     survive_thread = threading.Thread(
         target=receive_data_from_survive,
-        args=(imu_data, pose_data, dora_stop_event, survive_close_event),
+        args=(imu_store, pose_store, dora_stop_event, survive_close_event),
         daemon=True,  # 设置为守护线程，主线程退出时自动终止
     )
     dora_thread = threading.Thread(
         target=send_data_through_dora,
-        args=(imu_data, pose_data, dora_stop_event, survive_close_event),
+        args=(imu_store, pose_store, dora_stop_event, survive_close_event),
         daemon=True,
     )
 
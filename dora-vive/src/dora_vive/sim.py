@@ -0,0 +1,105 @@
+"""Simulated Vive tracker backend (``BACKEND=sim``).
+
+Implements the subset of the ``pysurvive`` API used by the node. A single
+tracker (``SIM_SERIAL``, default ``LHR-SIM00000``) moves on a 0.2 m circle at
+0.5 Hz while yawing; `survive_poll` fires the IMU callback at ~250 Hz and the
+pose callback at ~120 Hz, like a Vive tracker 3.0.
+"""
+
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from typing_extensions import Self
+
+IMU_RATE = 250.0
+POSE_RATE = 120.0
+GRAVITY = 9.80665
+
+
+@dataclass
+class SimObjectContents:
+    """Fields of ``SurviveObject`` read by the node."""
+
+    serial_number: bytes
+
+
+class SimObject:
+    """Stand-in for the ``POINTER(SurviveObject)`` passed to callbacks."""
+
+    def __init__(self: Self, serial_number: str) -> None:
+        self.contents = SimObjectContents(serial_number.encode("utf-8"))
+
+
+class SimContext:
+    """Stand-in for the ``SurviveContext`` returned by ``pysurvive.init``."""
+
+    def __init__(self: Self) -> None:
+        self.tracker = SimObject(os.getenv("SIM_SERIAL", "LHR-SIM00000"))
+        self.imu_fn: Optional[Callable] = None
+        self.pose_fn: Optional[Callable] = None
+        self.start = time.perf_counter()
+        self.imu_count = 0
+        self.pose_count = 0
+        self.closed = False
+
+
+def init(argv: list[str]) -> SimContext:
+    return SimContext()
+
+
+def install_imu_fn(ctx: SimContext, fn: Callable) -> None:
+    ctx.imu_fn = fn
+
+
+def install_pose_fn(ctx: SimContext, fn: Callable) -> None:
+    ctx.pose_fn = fn
+
+
+def _pose(t: float) -> list[float]:
+    angle = 2.0 * math.pi * 0.5 * t
+    yaw = 0.5 * math.sin(angle)
+    return [
+        0.2 * math.cos(angle),
+        0.2 * math.sin(angle),
+        1.0,
+        math.cos(yaw / 2.0),
+        0.0,
+        0.0,
+        math.sin(yaw / 2.0),
+    ]
+
+
+def _accelgyro(t: float) -> list[float]:
+    omega = 2.0 * math.pi * 0.5
+    angle = omega * t
+    # Centripetal acceleration of the circle in g, yaw rate in rad/s, unit field.
+    acc = [-0.2 * omega**2 * math.cos(angle) / GRAVITY,
+           -0.2 * omega**2 * math.sin(angle) / GRAVITY,
+           1.0]
+    gyro = [0.0, 0.0, 0.5 * omega * math.cos(angle)]
+    return acc + gyro + [1.0, 0.0, 0.0]
+
+
+def survive_poll(ctx: SimContext) -> int:
+    """Fire every callback that is due since the previous poll; 0 on success."""
+    if ctx.closed:
+        return -1
+    elapsed = time.perf_counter() - ctx.start
+    while ctx.imu_count < int(elapsed * IMU_RATE):
+        t = ctx.imu_count / IMU_RATE
+        ctx.imu_count += 1
+        if ctx.imu_fn is not None:
+            ctx.imu_fn(ctx.tracker, 0, _accelgyro(t), int(t * 48e6), 0)
+    while ctx.pose_count < int(elapsed * POSE_RATE):
+        t = ctx.pose_count / POSE_RATE
+        ctx.pose_count += 1
+        if ctx.pose_fn is not None:
+            ctx.pose_fn(ctx.tracker, int(t * 48e6), _pose(t))
+    return 0
+
+
+def survive_close(ctx: SimContext) -> None:
+    ctx.closed = True
@@ -7,3 +7,37 @@
 
 # def test_main() -> None:
 #   main()
+
+import pytest
+
+
+def test_sim_capture_to_publish(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Runs the survive and send threads against the simulated tracker."""
+    import threading
+
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    import dora_vive.main as vive
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(vive, "Node", lambda: node)
+
+    imu_store = LatestValue(vive.IMUData)
+    pose_store = LatestValue(vive.PoseData)
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    survive = threading.Thread(
+        target=vive.receive_data_from_survive,
+        args=(imu_store, pose_store, stop_event, close_event),
+    )
+    survive.start()
+    assert wait_for_data(imu_store, pose_store)
+    vive.send_data_through_dora(imu_store, pose_store, stop_event, close_event)
+    survive.join(timeout=2.0)
+
+    imus = node.outputs("imu")
+    poses = node.outputs("pose")
+    assert imus and poses
+    assert imus[-1][0].column("serial_number")[0].as_py() == "LHR-SIM00000"
+    assert len(poses[-1][0].column("rotation")[0]) == 4
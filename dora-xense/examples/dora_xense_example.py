@@ -3,8 +3,8 @@
 import logging
 
 import cv2
-import numpy as np
 from dora import Node
+from dora_pika_client import tensor
 
 logger = logging.getLogger(__name__)
 # sensor_0 = Sensor
@@ -30,8 +30,7 @@ def main() -> None:
           frame_count += 1
           fps = frame_count / (elapsed + 0.00000000000001)
           print(f"xense传感器当前帧率: {fps:.2f} FPS, 收到帧数{frame_count}， 运行时间{elapsed}")
-          image = struct["image"]
-          frame = np.array(image.values).reshape(400, 700, 3).astype(np.uint8)
+          frame = tensor(event["value"], "image")
           cv2.imshow("left_image", frame)
           cv2.waitKey(1)  # 刷新显示
       elif event["type"] == "STOP":
@@ -3,74 +3,45 @@ import os
 import threading
 import time
 from dataclasses import dataclass, field
-from typing import Optional, tuple
+from typing import Optional
 
 import cv2
 import numpy as np
-import pyarrow as pa
 from dora import Node
-from typing_extensions import Self
+from dora_pika_common.arrow import record_batch
+from dora_pika_common.latest import LatestValue
+from dora_pika_common.publish import Publisher
+from dora_pika_common.timing import StageTimer
 
-from dora_xense.pa_schema import pa_xense_schema as xense_schema
-from xensesdk.xenseInterface.XenseSensor import Sensor
+from dora_xense.pa_schema import xense_schema
+
+# hardware (default) or sim: a simulated sensor replacing xensesdk
+BACKEND = os.getenv("BACKEND", "hardware")
+if BACKEND == "sim":
+    from dora_xense.sim import Sensor
+else:
+    from xensesdk.xenseInterface.XenseSensor import Sensor
 
 logger = logging.getLogger(__name__)
 
+# Opt-in per-stage timing (STAGE_TIMING=1), see dora_pika_common.timing
+stage_timer = StageTimer("xense")
+
 
 @dataclass
 class XenseData:
-    """"""
-    _lock: threading.Lock = field(default_factory=threading.Lock)
-    _has_data: bool = False
+    """Xense 传感器数据槽位，通过 LatestValue 交换"""
 
     # 图像数据
-    rectify_img: Optional[np.ndarray] = field(default_factory=lambda: np.zeros((400, 700, 3), dtype=np.uint8))
-    bgr_img: Optional[np.ndarray] = field(default_factory=lambda: np.zeros((400, 700, 3), dtype=np.uint8))
+    bgr_img: np.ndarray = field(default_factory=lambda: np.zeros((400, 700, 3), dtype=np.uint8))
     # 深度数据
-    depth: Optional[np.ndarray] = field(default_factory=lambda: np.zeros((400, 700), dtype=np.float32))
+    depth: np.ndarray = field(default_factory=lambda: np.zeros((400, 700), dtype=np.float32))
     # 力数据
-    force_resultant: Optional[np.ndarray] = field(default_factory=lambda: np.zeros((6, ), dtype=np.double))
+    force_resultant: np.ndarray = field(default_factory=lambda: np.zeros((6, ), dtype=np.double))
     # 3D网格流数据
-    mesh3d_flow: Optional[np.ndarray] = field(default_factory=lambda: np.zeros((35, 20, 3), dtype=np.double))
+    mesh3d_flow: np.ndarray = field(default_factory=lambda: np.zeros((35, 20, 3), dtype=np.double))
     timestamp: int = 0
 
-    def update_data(
-        self: Self,
-        rectify_img: np.ndarray,
-        depth: np.ndarray,
-        force_resultant: np.ndarray,
-        mesh3d_flow: np.ndarray,
-        timestamp: int,
-
-    ) -> None:
-        """更新传感器数据"""
-        with self._lock:
-            self.rectify_img = rectify_img
-            self.depth = depth
-            self.force_resultant = force_resultant
-            self.mesh3d_flow = mesh3d_flow
-            self.timestamp = timestamp
-
-            # 转换图像格式为BGR
-            if rectify_img.shape[2] == 3:
-                self.bgr_img = cv2.cvtColor(rectify_img, cv2.COLOR_RGB2BGR)
-            else:
-                self.bgr_img = rectify_img
-
-            self._has_data = True
-
-    def read_data(self: Self) -> tuple[bool, dict, np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]:
-        """读取传感器数据"""
-        with self._lock:
-            return (
-                self._has_data,
-                self.bgr_img.copy() if self.bgr_img is not None else None,
-                self.depth.copy() if self.depth is not None else None,
-                self.force_resultant.copy() if self.force_resultant is not None else None,
-                self.mesh3d_flow.copy() if self.mesh3d_flow is not None else None,
-                self.timestamp,
-            )
-
 
 def initialize_sensor(sensor_id: str, use_gpu: bool, rectify_size: tuple) -> Optional[Sensor]:
     """初始化Xense传感器"""
@@ -89,7 +60,7 @@ def initialize_sensor(sensor_id: str, use_gpu: bool, rectify_size: tuple) -> Opt
 
 
 def receive_data_from_xense(
-    xense_data: XenseData,
+    xense_store: LatestValue[XenseData],
     config: dict,
     dora_stop_event: threading.Event,
     sensor_close_event: threading.Event
@@ -108,28 +79,36 @@ def receive_data_from_xense(
         while not dora_stop_event.is_set():
             try:
                 # 获取传感器数据
-                rectify_img, depth, force_resultant, mesh3d_flow = sensor.selectSensorInfo(
-                    Sensor.OutputType.Rectify,
-                    Sensor.OutputType.Depth,
-                    Sensor.OutputType.ForceResultant,
-                    Sensor.OutputType.Mesh3DFlow
-                )
+                with stage_timer.stage("selectSensorInfo"):
+                    rectify_img, depth, force_resultant, mesh3d_flow = sensor.selectSensorInfo(
+                        Sensor.OutputType.Rectify,
+                        Sensor.OutputType.Depth,
+                        Sensor.OutputType.ForceResultant,
+                        Sensor.OutputType.Mesh3DFlow
+                    )
             except Exception as e:
                 logger.error(f"传感器数据获取错误: {str(e)}")
                 time.sleep(0.1)  # 错误时延长休眠时间
 
             # 确保数据有效
             if rectify_img is not None and depth is not None:
+                # 更新数据，BGR 转换直接写入空闲槽位
+                data = xense_store.acquire()
+                with stage_timer.stage("cvtColor"):
+                    if rectify_img.ndim == 3 and rectify_img.shape[2] == 3:
+                        if data.bgr_img.shape != rectify_img.shape:
+                            data.bgr_img = np.empty_like(rectify_img)
+                        cv2.cvtColor(rectify_img, cv2.COLOR_RGB2BGR, dst=data.bgr_img)
+                    else:
+                        data.bgr_img = np.ascontiguousarray(rectify_img)
                 # 确保数据连续
-                rectify_img = np.ascontiguousarray(rectify_img)
-                depth = np.ascontiguousarray(depth)
-                force_resultant = np.ascontiguousarray(force_resultant)
-                mesh3d_flow = np.ascontiguousarray(mesh3d_flow)
-                timestamp = int(time.time_ns())
-                # 更新数据
-                xense_data.update_data(
-                    rectify_img, depth, force_resultant, mesh3d_flow, timestamp
-                )
+                with stage_timer.stage("ascontiguousarray"):
+                    data.depth = np.ascontiguousarray(depth)
+                    data.force_resultant = np.ascontiguousarray(force_resultant)
+                    data.mesh3d_flow = np.ascontiguousarray(mesh3d_flow)
+                data.timestamp = int(time.time_ns())
+                xense_store.publish()
+                stage_timer.count("captured")
             else:
                 time.sleep(0.01)  # 无数据时短暂休眠
 
@@ -147,14 +126,17 @@ def receive_data_from_xense(
 
 
 def send_data_through_dora(
-    xense_data: XenseData,
+    xense_store: LatestValue[XenseData],
     dora_stop_event: threading.Event,
-    sensor_close_event: threading.Event
+    sensor_close_event: threading.Event,
+    node: Optional[Node] = None,
 ) -> None:
     """通过Dora发送数据的线程函数"""
-    node = Node()
+    if node is None:
+        node = Node()
+    publisher = Publisher(node, {"xense_data": xense_store}, timer=stage_timer)
     try:
-        for event in node:
+        for event in publisher:
             # 检查传感器是否已关闭
             if sensor_close_event.is_set():
                 dora_stop_event.set()
@@ -162,22 +144,21 @@ def send_data_through_dora(
 
             # 处理Dora输入事件
             if event["type"] == "INPUT" and event["id"] == "tick":
-                has_data, bgr_img, depth, force, mesh, timestamp = xense_data.read_data()
-
-                if has_data:
-                    image_batch = pa.record_batch(
-                        {
-                            "image": [bgr_img.ravel()],
-                            "depth": [depth.ravel()],
-                            "force": [force.ravel()],
-                            "mesh" : [mesh.ravel()],
-                            "timestamp": [timestamp]
-                        },
-                        schema = xense_schema
-                    )
-                    node.send_output("xense_data", image_batch)
-
-                time.sleep(0.001)  # 控制发送频率
+                seq, data = publisher.read("xense_data")
+
+                if data is not None:
+                    with stage_timer.stage("batch/xense_data"):
+                        image_batch = record_batch(
+                            {
+                                "image": data.bgr_img,
+                                "depth": data.depth,
+                                "force": data.force_resultant,
+                                "mesh" : data.mesh3d_flow,
+                                "timestamp": data.timestamp
+                            },
+                            schema = xense_schema(*data.bgr_img.shape[:2])
+                        )
+                    publisher.send("xense_data", image_batch, seq)
 
             elif event["type"] == "STOP":
                 dora_stop_event.set()
@@ -195,6 +176,7 @@ def main() -> None:
         level=logging.INFO,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
+    stage_timer.install_signal_handler()
 
     # 传感器配置
     config = {
@@ -203,20 +185,23 @@ def main() -> None:
         "rectify_size": os.getenv("rectify_size", "")
     }
 
+    # Created here so that main() fails right away outside a dataflow.
+    node = Node()
+
     # 初始化数据存储类
-    xense_data = XenseData()
+    xense_store = LatestValue(XenseData)
     dora_stop_event = threading.Event()
     sensor_close_event = threading.Event()
 
     # 启动线程
     sensor_thread = threading.Thread(
         target=receive_data_from_xense,
-        args=(xense_data, config, dora_stop_event, sensor_close_event),
+        args=(xense_store, config, dora_stop_event, sensor_close_event),
         daemon=True
     )
     dora_thread = threading.Thread(
         target=send_data_through_dora,
-        args=(xense_data, dora_stop_event, sensor_close_event),
+        args=(xense_store, dora_stop_event, sensor_close_event, node),
         daemon=True
     )
 
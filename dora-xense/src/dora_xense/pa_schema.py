@@ -1,17 +1,24 @@
+from functools import lru_cache
+
 import pyarrow as pa
+from dora_pika_common.arrow import tensor_field
 
 pa_vec3 = pa.list_(pa.float64(), 3)
-pa_image = pa.list_(pa.uint8(), 700*400*3)
-pa_depth = pa.list_(pa.float32(), 700*400)
-pa_mesh = pa.list_(pa.float64(), 35*20*3)
 pa_force = pa.list_(pa.float64(), 6)
 
-# 定义 image_schema
-pa_xense_fields = [
-  pa.field("image", pa_image),
-  pa.field("depth", pa_depth),
-  pa.field("force", pa_force),
-  pa.field("mesh", pa_mesh),
-  pa.field("timestamp", pa.int64()),
-]
-pa_xense_schema = pa.schema(pa_xense_fields)
+
+# 定义 image_schema，按 rectify_size 构建
+@lru_cache
+def xense_schema(height: int, width: int) -> pa.Schema:
+  """Xense schema for a ``height`` x ``width`` rectified image."""
+  return pa.schema([
+    tensor_field("image", (height, width, 3), pa.uint8()),
+    tensor_field("depth", (height, width), pa.float32()),
+    pa.field("force", pa_force),
+    tensor_field("mesh", (35, 20, 3), pa.float64()),
+    pa.field("timestamp", pa.int64()),
+  ])
+
+
+# 默认 rectify_size [700,400] 的 schema
+pa_xense_schema = xense_schema(400, 700)
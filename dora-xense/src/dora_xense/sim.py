@@ -0,0 +1,69 @@
+"""Simulated Xense backend (``BACKEND=sim``).
+
+`SimSensor` implements the subset of ``xensesdk`` ``Sensor`` used by the node:
+``Sensor.create(...)``, ``selectSensorInfo(*OutputType)`` and ``release``.
+Frames are paced at ``SIM_FPS`` (default 30); the rectified RGB image has the
+configured ``rectify_size`` (width, height), the depth map follows the same
+resolution and the 35x20 mesh / 6-axis force follow a pressing contact.
+"""
+
+import enum
+import os
+
+import numpy as np
+from dora_pika_common.sim import FrameSource
+from typing_extensions import Self
+
+
+class OutputType(enum.Enum):
+    """Subset of ``Sensor.OutputType``."""
+
+    Rectify = "Rectify"
+    Depth = "Depth"
+    ForceResultant = "ForceResultant"
+    Mesh3DFlow = "Mesh3DFlow"
+
+
+class SimSensor:
+    """Stand-in for ``xensesdk.xenseInterface.XenseSensor.Sensor``."""
+
+    OutputType = OutputType
+
+    def __init__(self: Self, cam_id: str, rectify_size: tuple[int, int]) -> None:
+        self.cam_id = cam_id
+        width, height = rectify_size
+        fps = float(os.getenv("SIM_FPS", "30"))
+        self._rectify = FrameSource((height, width, 3), np.uint8, fps)
+        self._depth = FrameSource((height, width), np.float32, 0, replay_path="", high=2.0)
+
+    @classmethod
+    def create(
+        cls: type["SimSensor"],
+        cam_id: str,
+        use_gpu: bool = False,
+        rectify_size: tuple[int, int] = (700, 400),
+        check_serial: bool = True,
+    ) -> "SimSensor":
+        return cls(cam_id, rectify_size)
+
+    def _press(self: Self, index: int) -> float:
+        return 0.5 * (1.0 - np.cos(2.0 * np.pi * (index % 60) / 60))
+
+    def selectSensorInfo(self: Self, *outputs: OutputType) -> tuple:  # noqa: N802
+        rectify = self._rectify.read()
+        press = self._press(self._rectify.index)
+        mesh = np.zeros((35, 20, 3), dtype=np.float64)
+        mesh[..., 2] = -press
+        values = {
+            OutputType.Rectify: rectify,
+            OutputType.Depth: self._depth.read(),
+            OutputType.ForceResultant: np.array([0.0, 0.0, 5.0 * press, 0.0, 0.0, 0.0]),
+            OutputType.Mesh3DFlow: mesh,
+        }
+        return tuple(values[output] for output in outputs)
+
+    def release(self: Self) -> None:
+        pass
+
+
+Sensor = SimSensor
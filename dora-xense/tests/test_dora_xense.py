@@ -11,3 +11,38 @@ def test_import_main() -> None:
     # as we're not running in a Dora dataflow.
     with pytest.raises(RuntimeError):
         main()
+
+
+def test_sim_capture_to_publish(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Runs the receive and send threads against the simulated sensor."""
+    import threading
+
+    import numpy as np
+    from dora_pika_client import decode
+    from dora_pika_common.latest import LatestValue
+    from dora_pika_common.testing import FakeNode, wait_for_data
+
+    import dora_xense.main as xense
+
+    node = FakeNode(ticks=10)
+    monkeypatch.setattr(xense, "Node", lambda: node)
+
+    xense_store = LatestValue(xense.XenseData)
+    stop_event = threading.Event()
+    close_event = threading.Event()
+    config = {"sensor_id": "OG000054", "use_gpu": "false", "rectify_size": "[700,400]"}
+    receiver = threading.Thread(
+        target=xense.receive_data_from_xense,
+        args=(xense_store, config, stop_event, close_event),
+    )
+    receiver.start()
+    assert wait_for_data(xense_store)
+    xense.send_data_through_dora(xense_store, stop_event, close_event)
+    receiver.join(timeout=2.0)
+
+    outputs = node.outputs("xense_data")
+    assert outputs
+    data = decode(outputs[-1][0])
+    assert data["image"].shape == (400, 700, 3) and data["image"].dtype == np.uint8
+    assert data["depth"].shape == (400, 700)
+    assert data["mesh"].shape == (35, 20, 3)